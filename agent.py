@@ -1,30 +1,42 @@
 from inference import LogicInference
 from planning import Planning
-from typing import Tuple, List, Dict, Set
+from environment import Action, ACTION_NAMES, ACTION_CODES, GLITTER
+from typing import Tuple, List, Dict, Optional, Set
 import random
 
 class HybridAgent:
-    def __init__(self, world_size: int = 8):
+    def __init__(self, world_size: int = 8, pathfinder: str = "astar", time_budget: Optional[float] = None):
         """
         Khởi tạo HybridAgent, kết hợp các module LogicInference và Planning.
 
         Đối số:
             world_size(int): Kích thước của lưới thế giới trò chơi (mặc định là 8).
+            pathfinder(str): Thuật toán tìm đường của Planning ("astar", "hierarchical" hoặc "dstar").
+            time_budget(float | None): Thời gian tối đa (giây) cho mỗi lần lập kế hoạch; hết hạn thì
+                agent đứng yên (wait) và tính tiếp ở bước sau. None = không giới hạn.
         """
         self.logic_inference = LogicInference(world_size)
-        self.planning = Planning(self.logic_inference)
+        self.planning = Planning(self.logic_inference, pathfinder, time_budget)
         self.last_action = ""
+        self.last_action_code = Action.WAIT
 
     def update_knowledge(self, pos: Tuple[int, int], percepts: Dict, world) -> None:
         """
         Cập nhật kiến thức của agent dựa trên vị trí hiện tại và các cảm nhận từ thế giới.
         Args:
             pos (Tuple[int, int]): Vị trí hiện tại của agent.
-            percepts (Dict): Các cảm nhận từ thế giới (ví dụ: "stench", "breeze", "glitter").
+            percepts (Dict | int): Các cảm nhận từ thế giới, dạng bitmask hoặc dict (ví dụ: "stench", "breeze", "glitter").
             world: thê giới trò chơi cung cấp trạng thái và cảm nhận.
         """
         self.logic_inference.update_knowledge(pos, percepts, world)
 
+    def notify_wumpus_moved(self, moves: int = 1) -> None:
+        """
+        Báo cho agent rằng các Wumpus vừa di chuyển (ADVANCE_MODE).
+        Chỉ các niềm tin về Wumpus trong vùng chúng có thể tới bị vô hiệu hoá.
+        """
+        self.logic_inference.on_wumpus_moved(moves)
+
     def plan_next_action(self, current_pos: Tuple[int, int], current_dir: str, world) -> str:
         """
         Lập kế hoạch hành động tiếp theo dựa trên vị trí hiện tại, hướng đi và trạng thái của thế giới.
@@ -35,9 +47,16 @@ class HybridAgent:
         Trả về:
             str: Hành động tiếp theo của agent (ví dụ: "move_forward", "turn_left", "grab", "climb").
         """
-        action = self.planning.plan_next_action(current_pos, current_dir, world)
-        if action != "wait":
-            self.last_action = action
+        return ACTION_NAMES[self.act(current_pos, current_dir, world)]
+
+    def act(self, current_pos: Tuple[int, int], current_dir: str, world) -> Action:
+        """
+        Giống plan_next_action nhưng trả về mã Action, dùng cho vòng lặp step.
+        """
+        action = self.planning.next_action(current_pos, current_dir, world)
+        if action != Action.WAIT:
+            self.last_action_code = action
+            self.last_action = ACTION_NAMES[action]
         return action
 
     # Expose necessary attributes from LogicInference for UI or other components
@@ -85,6 +104,7 @@ class RandomAgent:
     def __init__(self):
         self._current_plan: List[str] = []
         self.last_action: str = ""
+        self.last_action_code = Action.WAIT
         # Phân phối hành động (tổng = 1). Có thể đặt đều 1/3 – 1/3 – 1/3
         self.action_probs = {
             "move_forward": 0.5,
@@ -97,14 +117,21 @@ class RandomAgent:
         pass  # không học gì, không suy luận
 
     def plan_next_action(self, current_pos: Tuple[int, int], current_dir: str, world) -> str:
+        return ACTION_NAMES[self.act(current_pos, current_dir, world)]
+
+    def act(self, current_pos: Tuple[int, int], current_dir: str, world) -> Action:
         # 2 phản xạ tối thiểu
-        if world.percepts.get("glitter", False):
-            self.last_action = "grab"
-            return "grab"
-        if world.has_gold and current_pos == (0, 0):
-            self.last_action = "climb"
-            return "climb"
+        if world.percept_bits & GLITTER:
+            action = Action.GRAB
+        elif world.has_gold and current_pos == (0, 0):
+            action = Action.CLIMB
+        else:
+            action = self._random_action(world)
+        self.last_action_code = action
+        self.last_action = ACTION_NAMES[action]
+        return action
 
+    def _random_action(self, world) -> Action:
         # Lấy hành động ngẫu nhiên theo xác suất đã cấu hình
         items = list(self.action_probs.items())
         # Nếu không còn tên thì bỏ "shoot"
@@ -114,8 +141,7 @@ class RandomAgent:
         s = sum(p for _, p in items) or 1.0
         actions, probs = zip(*[(a, p/s) for a,p in items])
         action = random.choices(actions, weights=probs, k=1)[0]
-        self.last_action = action
-        return action
+        return ACTION_CODES[action]
 
     # Các thuộc tính cho GUI khỏi lỗi khi render
     @property
@@ -0,0 +1,237 @@
+"""
+Benchmark cho môi trường, suy luận, lập kế hoạch và render.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --quick --baseline bench_baseline.json --threshold 0.25
+    python benchmark.py --save-baseline bench_baseline.json
+
+Kết quả được ghi ra JSON; khi có --baseline, mỗi chỉ số được so với baseline và
+chương trình trả về mã lỗi 1 nếu có chỉ số nào tệ hơn quá ngưỡng.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from environment import WumpusWorld
+from agent import HybridAgent
+from runner import run_episode
+
+# "lower" = càng nhỏ càng tốt (thời gian), "higher" = càng lớn càng tốt (thông lượng)
+LOWER, HIGHER = "lower", "higher"
+# Hạn thời gian lập kế hoạch (giây) cho biến thể có giới hạn của plan_next_action
+PLAN_BUDGET = 0.002
+
+
+def _samples(fn: Callable[[], None], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _latency(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return {"value": statistics.median(ordered) * 1e6, "p95": p95 * 1e6, "max": ordered[-1] * 1e6,
+            "unit": "us", "better": LOWER}
+
+
+def bench_world_generation(sizes, repeat) -> Dict[str, Dict]:
+    results = {}
+    for size in sizes:
+        seeds = iter(range(10 ** 6))
+        samples = _samples(lambda: WumpusWorld(size, 2, 0.2, seed=next(seeds)), repeat)
+        results[f"world_generation/n={size}"] = _latency(samples)
+    return results
+
+
+def bench_move_forward(sizes, repeat) -> Dict[str, Dict]:
+    """Thông lượng move_forward + cập nhật percept (đi qua lại trên một hàng không có pit)."""
+    results = {}
+    for size in sizes:
+        world = WumpusWorld(size, 0, 0.0, seed=1)
+        moves = 10000
+        start = time.perf_counter()
+        for i in range(moves):
+            if not world.move_forward():
+                world.agent_dir = "left" if world.agent_dir == "right" else "right"
+        elapsed = time.perf_counter() - start
+        results[f"move_forward/n={size}"] = {"value": moves / elapsed, "unit": "moves/s", "better": HIGHER}
+    return results
+
+
+def _trajectory(size, k, p, seed, steps, update_times=None):
+    """
+    Ghi lại các trạng thái (world, agent) của một episode để đo từng pha riêng lẻ.
+    Nếu có update_times, thời gian của từng lần update_knowledge dọc episode được thêm vào đó.
+    """
+    world = WumpusWorld(size, k, p, seed=seed)
+    agent = HybridAgent(size)
+    for _ in range(steps):
+        if world.is_game_over(agent) != "continue":
+            break
+        start = time.perf_counter()
+        agent.update_knowledge(world.agent_pos, world.percept_bits, world)
+        if update_times is not None:
+            update_times.append(time.perf_counter() - start)
+        world.step(agent.act(world.agent_pos, world.agent_dir, world))
+    return world, agent
+
+
+def bench_update_knowledge(sizes, repeat) -> Dict[str, Dict]:
+    """Mỗi mẫu là một lần update_knowledge với observation mới, lấy dọc các episode thật."""
+    results = {}
+    for size in sizes:
+        samples: List[float] = []
+        seed = 7
+        # Episode có thể kết thúc sớm, nên chạy thêm seed đến khi đủ mẫu
+        while len(samples) < repeat and seed < 7 + repeat:
+            _trajectory(size, 2, 0.1, seed, size * 2, update_times=samples)
+            seed += 1
+        results[f"update_knowledge/n={size}"] = _latency(samples)
+    return results
+
+
+def bench_plan_next_action(sizes, repeat) -> Dict[str, Dict]:
+    results = {}
+    for size in sizes:
+        world, agent = _trajectory(size, 2, 0.1, 7, size * 2)
+        samples = _samples(lambda: agent.act(world.agent_pos, world.agent_dir, world), repeat)
+        results[f"plan_next_action/n={size}"] = _latency(samples)
+        # Có hạn thời gian: độ trễ tối đa ~ PLAN_BUDGET + một lát tìm kiếm, bất kể kích thước bản đồ
+        agent.planning.time_budget = PLAN_BUDGET
+        samples = _samples(lambda: agent.act(world.agent_pos, world.agent_dir, world), repeat)
+        results[f"plan_next_action/budget={PLAN_BUDGET * 1e3:g}ms/n={size}"] = _latency(samples)
+    return results
+
+
+def bench_episodes(sizes, pit_probs, wumpus_counts, episodes, max_steps) -> Dict[str, Dict]:
+    results = {}
+    for size in sizes:
+        for p in pit_probs:
+            for k in wumpus_counts:
+                steps = 0
+                elapsed = 0.0
+                for seed in range(episodes):
+                    record = run_episode(size, k, p, seed, max_steps=max_steps)
+                    steps += record["steps"]
+                    elapsed += record["wall_time"]
+                results[f"episode/n={size}/p={p}/k={k}"] = {
+                    "value": steps / elapsed if elapsed else 0.0,
+                    "unit": "steps/s",
+                    "better": HIGHER,
+                }
+    return results
+
+
+def bench_gui_render(sizes, repeat) -> Dict[str, Dict]:
+    """Thời gian một khung hình GUI.render không cần màn hình (SDL dummy driver)."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    try:
+        from gui import GUI
+    except ImportError:
+        return {}
+    results = {}
+    for size in sizes:
+        world, agent = _trajectory(size, 2, 0.1, 7, size * 2)
+        ui = GUI(world, agent)
+        ui.render()
+        results[f"gui_render/n={size}"] = _latency(_samples(ui.render, repeat))
+    return results
+
+
+def run_all(quick: bool = False) -> Dict[str, Dict]:
+    if quick:
+        sizes, repeat, episodes = [4, 16, 64], 20, 3
+        episode_sizes, pit_probs, wumpus_counts = [4, 16, 64], [0.1, 0.2], [1, 2]
+        render_sizes = [8, 32]
+    else:
+        sizes, repeat, episodes = [4, 8, 16, 32, 64, 128, 256, 500], 50, 10
+        episode_sizes, pit_probs, wumpus_counts = [4, 8, 16, 32, 64, 128, 256, 500], [0.1, 0.2, 0.3], [1, 2, 5]
+        render_sizes = [8, 20, 50, 100]
+
+    results: Dict[str, Dict] = {}
+    results.update(bench_world_generation(sizes, repeat))
+    results.update(bench_move_forward(sizes, repeat))
+    results.update(bench_update_knowledge(sizes, repeat))
+    results.update(bench_plan_next_action(sizes, repeat))
+    results.update(bench_episodes(episode_sizes, pit_probs, wumpus_counts, episodes, max_steps=500))
+    results.update(bench_gui_render(render_sizes, repeat))
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Trả về (regressions, missing): các chỉ số bị chậm đi quá threshold (tỉ lệ, ví dụ 0.2 = 20%)
+    và các chỉ số chỉ có ở một phía nên không so sánh được.
+    """
+    regressions = []
+    missing = [f"{name}: not in baseline" for name in results if name not in baseline]
+    missing += [f"{name}: not in results" for name in baseline if name not in results]
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        if result["better"] == LOWER:
+            change = result["value"] / base["value"] - 1
+        else:
+            change = base["value"] / result["value"] - 1 if result["value"] else float("inf")
+        if change > threshold:
+            regressions.append(f"{name}: {base['value']:.1f} -> {result['value']:.1f} {result['unit']} (+{change:.0%} worse)")
+    return regressions, missing
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Wumpus World benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.quick)
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:40s} {result['value']:12.1f} {result['unit']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions, missing = compare(results, baseline, args.threshold)
+        if missing:
+            print("\nNot compared:")
+            for line in missing:
+                print("  " + line)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
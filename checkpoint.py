@@ -0,0 +1,442 @@
+"""
+Checkpoint nhị phân có phiên bản của thế giới và agent, để tạm dừng/chạy tiếp các lượt dài
+(ADVANCE_MODE, bản đồ lớn) hoặc chuyển trạng thái sang tiến trình khác.
+
+    python checkpoint.py run run.ckpt --size 64 --k 8 --advance --every 50 --max-steps 5000
+    python checkpoint.py resume run.ckpt --max-steps 5000
+    python checkpoint.py info run.ckpt
+
+Mỗi frame gồm header cố định và thân nén zlib. Thân có phần kích thước cố định (trạng thái
+thế giới, các tập ô đóng gói thành bitmap N*N bit, trạng thái random) và phần thay đổi (các
+dict thời điểm của LogicInference, kế hoạch, nhật ký kiến thức). Frame DELTA lưu phần cố định
+dưới dạng XOR với frame trước (hầu hết là byte 0, nén rất tốt) và chỉ các dòng nhật ký mới.
+
+Mọi thứ được ghi theo thứ tự chuẩn (bitmap, các dict thời điểm sắp xếp theo ô) và HybridAgent
+duyệt các tập kiến thức theo thứ tự sắp xếp, nên chạy tiếp từ một checkpoint (kèm trạng thái
+random) cho đúng quỹ đạo của lượt chạy không bị gián đoạn.
+"""
+import argparse
+import random
+import struct
+import sys
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agent import HybridAgent, RandomAgent
+from environment import Action, ACTION_NAMES, WumpusWorld
+from movingwumpus import MovingWumpusModule
+from planning import Planning
+from runner import default_max_steps
+
+MAGIC = b"WCKP"
+VERSION = 1
+# magic, version, loại frame, cờ, bước, crc32 của phần cố định, độ dài thân đã nén
+FRAME = struct.Struct("<4sHBBIII")
+FULL = 0
+DELTA = 1
+HAS_RNG = 1
+
+DIRECTIONS = ("up", "right", "down", "left")
+GAME_STATES = (None, "win", "lose")
+AGENT_KINDS = (HybridAgent, RandomAgent)
+NO_ACTION = 0xFF
+
+# grid, k, p, seed, vị trí và hướng agent, cờ, trạng thái ván, điểm, số lần thử khi sinh, percept
+WORLD_HEAD = struct.Struct("<HHdqHHBBBiIB")
+HAS_GOLD = 1
+HAS_ARROW = 2
+WUMPUS_ALIVE = 4
+# loại agent, hành động cuối, pathfinder, vị trí hiện tại, wumpus_epoch
+AGENT_HEAD = struct.Struct("<BBBHHI")
+RNG_STATE = struct.Struct("<625I?d")
+SEEN_AT = struct.Struct("<HHI")
+COUNT = struct.Struct("<I")
+LOG_HEAD = struct.Struct("<II")  # số dòng giữ lại từ frame trước, số dòng mới
+LINE = struct.Struct("<H")
+
+# Thứ tự các tập ô của LogicInference trong phần cố định
+KNOWLEDGE_SETS = (
+    "safe_cells", "visited_cells", "unsafe_cells", "warning_cells", "pit_cells",
+    "wumpus_cells", "breeze_cells", "stench_cells", "pit_free_cells",
+)
+
+
+class CheckpointError(ValueError):
+    """Frame hỏng, sai phiên bản hoặc delta không khớp với frame trước."""
+
+
+def pack_cells(cells, n: int) -> bytes:
+    bits = 0
+    for x, y in cells:
+        bits |= 1 << (x * n + y)
+    return bits.to_bytes((n * n + 7) // 8, "little")
+
+
+def unpack_cells(data: bytes, n: int) -> set:
+    cells = set()
+    for i, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            index = 8 * i + low.bit_length() - 1
+            cells.add(divmod(index, n))
+            byte ^= low
+    return cells
+
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+class _State:
+    """Trạng thái đã mã hoá: phần cố định, phần thay đổi và nhật ký kiến thức."""
+
+    __slots__ = ("fixed", "variable", "log", "rng")
+
+    def __init__(self, fixed: bytes, variable: bytes, log: List[str], rng: bool):
+        self.fixed = fixed
+        self.variable = variable
+        self.log = log
+        self.rng = rng
+
+
+def _encode_state(world, agent, pits: Optional[bytes] = None, include_rng: bool = True) -> _State:
+    n = world.grid_size
+    if pits is None:
+        pits = pack_cells(world.static_cells()[0], n)
+    flags = (HAS_GOLD if world.has_gold else 0) | (HAS_ARROW if world.has_arrow else 0) \
+        | (WUMPUS_ALIVE if world.wumpus_alive else 0)
+    gold = () if world.has_gold else world.initial_gold
+    parts = [
+        WORLD_HEAD.pack(
+            n, world.K, world.pit_prob, world.seed, world.agent_pos[0], world.agent_pos[1],
+            DIRECTIONS.index(world.agent_dir), flags, GAME_STATES.index(world.game_over_state),
+            world.score, world.generation_attempts, world.percept_bits,
+        ),
+        pits,
+        pack_cells(gold, n),
+        pack_cells(world.wumpus_positions, n),
+    ]
+
+    last_action = ACTION_NAMES.index(agent.last_action) if agent.last_action else NO_ACTION
+    variable = []
+    log: List[str] = []
+    if isinstance(agent, HybridAgent):
+        inference = agent.logic_inference
+        parts.append(AGENT_HEAD.pack(
+            0, last_action, Planning.PATHFINDERS.index(agent.planning.pathfinder),
+            inference.current_pos[0], inference.current_pos[1], inference.wumpus_epoch,
+        ))
+        parts.extend(pack_cells(getattr(inference, name), n) for name in KNOWLEDGE_SETS)
+        for seen in (inference.wumpus_seen_at, inference.stench_seen_at):
+            variable.append(COUNT.pack(len(seen)))
+            variable.extend(SEEN_AT.pack(x, y, seen[x, y]) for x, y in sorted(seen))
+        plan = bytes(int(action) for action in agent.planning.current_plan)
+        variable.append(COUNT.pack(len(plan)) + plan)
+        log = inference.knowledge_base
+    elif isinstance(agent, RandomAgent):
+        parts.append(AGENT_HEAD.pack(1, last_action, 0, 0, 0, 0))
+    else:
+        raise TypeError(f"Cannot checkpoint agent of type {type(agent).__name__}")
+
+    if include_rng:
+        _, internal, gauss = random.getstate()
+        parts.append(RNG_STATE.pack(*internal, gauss is not None, gauss or 0.0))
+    return _State(b"".join(parts), b"".join(variable), log, include_rng)
+
+
+def encode(world, agent, step: int = 0, base: Optional[_State] = None,
+           pits: Optional[bytes] = None, include_rng: bool = True, level: int = 6) -> Tuple[bytes, _State]:
+    """
+    Mã hoá một frame; nếu có base (trạng thái của frame trước) và cùng cấu trúc thì là DELTA.
+    Trả về (frame, trạng thái để làm base cho frame sau).
+    """
+    state = _encode_state(world, agent, pits, include_rng)
+    delta = base is not None and len(base.fixed) == len(state.fixed) and base.rng == state.rng \
+        and len(base.log) <= len(state.log)
+    if delta:
+        fixed = _xor(state.fixed, base.fixed)
+        kept = len(base.log)
+    else:
+        fixed = state.fixed
+        kept = 0
+    new_lines = state.log[kept:]
+    body = b"".join([
+        COUNT.pack(len(fixed)), fixed, COUNT.pack(len(state.variable)), state.variable,
+        LOG_HEAD.pack(kept, len(new_lines)),
+        b"".join(LINE.pack(len(raw)) + raw for raw in (line.encode() for line in new_lines)),
+    ])
+    body = zlib.compress(body, level)
+    # Sao chép nhật ký: agent tiếp tục ghi thêm vào list của nó
+    state.log = list(state.log)
+    header = FRAME.pack(MAGIC, VERSION, DELTA if delta else FULL, HAS_RNG if include_rng else 0,
+                        step, zlib.crc32(state.fixed), len(body))
+    return header + body, state
+
+
+def _decode_body(kind: int, flags: int, crc: int, body: bytes, base: Optional[_State]) -> _State:
+    raw = zlib.decompress(body)
+    offset = 0
+
+    def take(size: int) -> bytes:
+        nonlocal offset
+        chunk = raw[offset:offset + size]
+        offset += size
+        return chunk
+
+    fixed = take(COUNT.unpack(take(COUNT.size))[0])
+    variable = take(COUNT.unpack(take(COUNT.size))[0])
+    kept, count = LOG_HEAD.unpack(take(LOG_HEAD.size))
+    lines = [take(LINE.unpack(take(LINE.size))[0]).decode() for _ in range(count)]
+    if kind == DELTA:
+        if base is None or len(base.fixed) != len(fixed) or len(base.log) < kept:
+            raise CheckpointError("delta frame without a matching base frame")
+        fixed = _xor(fixed, base.fixed)
+        lines = base.log[:kept] + lines
+    if zlib.crc32(fixed) != crc:
+        raise CheckpointError("checksum mismatch (corrupt frame or wrong base)")
+    return _State(fixed, variable, lines, bool(flags & HAS_RNG))
+
+
+def _decode_state(state: _State, restore_rng: bool = True):
+    fixed = state.fixed
+    (n, k, p, seed, ax, ay, direction, flags, game, score, attempts, percept_bits) = WORLD_HEAD.unpack_from(fixed)
+    size = (n * n + 7) // 8
+    offset = WORLD_HEAD.size
+
+    def cells() -> set:
+        nonlocal offset
+        offset += size
+        return unpack_cells(fixed[offset - size:offset], n)
+
+    pits, gold, wumpus = cells(), cells(), cells()
+    world = WumpusWorld.from_layout(n, k, p, seed, pits, wumpus, gold)
+    world.agent_pos = (ax, ay)
+    world.agent_dir = DIRECTIONS[direction]
+    world.has_gold = bool(flags & HAS_GOLD)
+    world.has_arrow = bool(flags & HAS_ARROW)
+    world.wumpus_alive = bool(flags & WUMPUS_ALIVE)
+    world.game_over_state = GAME_STATES[game]
+    world.score = score
+    world.generation_attempts = attempts
+    world.percept_bits = percept_bits
+
+    kind, last_action, pathfinder, cx, cy, epoch = AGENT_HEAD.unpack_from(fixed, offset)
+    offset += AGENT_HEAD.size
+    if AGENT_KINDS[kind] is HybridAgent:
+        agent = HybridAgent(n, Planning.PATHFINDERS[pathfinder])
+        inference = agent.logic_inference
+        for name in KNOWLEDGE_SETS:
+            setattr(inference, name, cells())
+        inference.current_pos = (cx, cy)
+        inference.wumpus_epoch = epoch
+        inference.knowledge_base = list(state.log)
+        pos = 0
+        for seen in (inference.wumpus_seen_at, inference.stench_seen_at):
+            (count,) = COUNT.unpack_from(state.variable, pos)
+            pos += COUNT.size
+            for _ in range(count):
+                x, y, at = SEEN_AT.unpack_from(state.variable, pos)
+                seen[(x, y)] = at
+                pos += SEEN_AT.size
+        (count,) = COUNT.unpack_from(state.variable, pos)
+        pos += COUNT.size
+        agent.planning.current_plan = [Action(code) for code in state.variable[pos:pos + count]]
+    else:
+        agent = RandomAgent()
+    if last_action != NO_ACTION:
+        agent.last_action_code = Action(last_action)
+        agent.last_action = ACTION_NAMES[last_action]
+
+    if state.rng and restore_rng:
+        values = RNG_STATE.unpack_from(fixed, offset)
+        random.setstate((3, tuple(values[:625]), values[626] if values[625] else None))
+    return world, agent
+
+
+def dumps(world, agent, step: int = 0, include_rng: bool = True) -> bytes:
+    """Một frame FULL độc lập, ví dụ để gửi sang tiến trình khác."""
+    return encode(world, agent, step, include_rng=include_rng)[0]
+
+
+def loads(data: bytes, restore_rng: bool = True):
+    """Ngược lại của dumps(): trả về (world, agent, step)."""
+    frames = list(iter_frames(data))
+    if not frames:
+        raise CheckpointError("no complete frame")
+    step, state = frames[-1]
+    world, agent = _decode_state(state, restore_rng)
+    return world, agent, step
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, _State]]:
+    """Giải mã lần lượt các frame (full và delta); dừng ở frame cuối bị ghi dở."""
+    offset = 0
+    base = None
+    while offset + FRAME.size <= len(data):
+        magic, version, kind, flags, step, crc, length = FRAME.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise CheckpointError(f"bad magic at offset {offset}")
+        if version != VERSION:
+            raise CheckpointError(f"unsupported checkpoint version {version}")
+        start = offset + FRAME.size
+        if start + length > len(data):
+            return  # frame cuối bị cắt khi tiến trình dừng giữa chừng
+        base = _decode_body(kind, flags, crc, data[start:start + length], base)
+        yield step, base
+        offset = start + length
+
+
+def restore(path: str, step: Optional[int] = None, restore_rng: bool = True):
+    """Đọc file checkpoint; trả về (world, agent, step) của frame cuối (hoặc frame tại step)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    found = None
+    for frame_step, state in iter_frames(data):
+        found = (frame_step, state)
+        if step is not None and frame_step >= step:
+            break
+    if found is None:
+        raise CheckpointError(f"{path}: no complete frame")
+    world, agent = _decode_state(found[1], restore_rng)
+    return world, agent, found[0]
+
+
+class CheckpointWriter:
+    """
+    Ghi nối frame vào file: FULL mỗi full_every frame (và frame đầu tiên), còn lại DELTA.
+    Bitmap pit (không đổi trong một ván) chỉ tính một lần cho mỗi world.
+    """
+
+    def __init__(self, path: str, full_every: int = 50, include_rng: bool = True, level: int = 6):
+        self.path = path
+        self.full_every = full_every
+        self.include_rng = include_rng
+        self.level = level
+        self._file = open(path, "ab")
+        # Frame cuối bị ghi dở (tiến trình bị dừng): cắt bỏ để frame mới nối tiếp đúng chỗ
+        self._file.truncate(self._complete_length(path))
+        self._base: Optional[_State] = None
+        self._since_full = 0
+        self._pits: Tuple[object, bytes] = (None, b"")
+        self.frames = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def _complete_length(path: str) -> int:
+        offset = 0
+        with open(path, "rb") as f:
+            while True:
+                head = f.read(FRAME.size)
+                if len(head) < FRAME.size or head[:4] != MAGIC:
+                    return offset
+                length = FRAME.unpack(head)[-1]
+                if len(f.read(length)) < length:
+                    return offset
+                offset += FRAME.size + length
+
+    def save(self, world, agent, step: int) -> int:
+        if self._pits[0] is not world:
+            self._pits = (world, pack_cells(world.static_cells()[0], world.grid_size))
+            self._base = None
+        base = self._base if self._since_full < self.full_every else None
+        frame, self._base = encode(world, agent, step, base, self._pits[1], self.include_rng, self.level)
+        self._since_full = self._since_full + 1 if base is not None else 1
+        self._file.write(frame)
+        self._file.flush()
+        self.frames += 1
+        self.bytes_written += len(frame)
+        return len(frame)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def run(world, agent, writer: Optional[CheckpointWriter], every: int = 50, start_step: int = 0,
+        max_steps: Optional[int] = None, advance_mode: bool = False) -> Dict:
+    """Vòng lặp như runner.run_episode, lưu checkpoint mỗi `every` bước và ở bước cuối."""
+    mover = MovingWumpusModule(world) if advance_mode else None
+    if max_steps is None:
+        max_steps = default_max_steps(world.grid_size)
+    steps = start_step
+    state = world.is_game_over(agent)
+    while state == "continue" and steps < max_steps:
+        agent.update_knowledge(world.agent_pos, world.percept_bits, world)
+        world.step(agent.act(world.agent_pos, world.agent_dir, world))
+        steps += 1
+        if mover is not None and steps % 5 == 0:
+            mover.update(world, None, agent)
+        state = world.is_game_over(agent)
+        if writer is not None and steps % every == 0:
+            writer.save(world, agent, steps)
+    if writer is not None and steps % every != 0 and steps != start_step:
+        writer.save(world, agent, steps)
+    return {
+        "seed": world.seed,
+        "world_size": world.grid_size,
+        "outcome": state if state != "continue" else "stall",
+        "score": world.score,
+        "steps": steps,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run, checkpoint and resume long episodes")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="start a new episode and checkpoint it")
+    p_run.add_argument("path")
+    p_run.add_argument("--size", type=int, default=8)
+    p_run.add_argument("--k", type=int, default=2)
+    p_run.add_argument("--p", type=float, default=0.2)
+    p_run.add_argument("--seed", type=int, default=36)
+    p_run.add_argument("--agent", choices=("hybrid", "random"), default="hybrid")
+
+    p_resume = sub.add_parser("resume", help="continue from the last frame of a checkpoint file")
+    p_resume.add_argument("path")
+    for p in (p_run, p_resume):
+        p.add_argument("--every", type=int, default=50, help="save every N steps")
+        p.add_argument("--full-every", type=int, default=50, help="write a full frame every N frames")
+        p.add_argument("--max-steps", type=int, default=None)
+        p.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+
+    p_info = sub.add_parser("info")
+    p_info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        with open(args.path, "rb") as f:
+            data = f.read()
+        frames = list(iter_frames(data))
+        if not frames:
+            print(f"{args.path}: no complete frame")
+            return 1
+        world, agent = _decode_state(frames[-1][1], restore_rng=False)
+        print(f"{len(frames)} frames, {len(data)} bytes, last step {frames[-1][0]}")
+        print(f"world {world.grid_size}x{world.grid_size} seed {world.seed}, agent at {world.agent_pos}, "
+              f"score {world.score}, state {world.game_over_state or 'continue'}")
+        print(f"{type(agent).__name__}: {len(agent.safe_cells) if hasattr(agent, 'logic_inference') else 0} safe cells, "
+              f"{len(agent.knowledge_base)} knowledge entries")
+        return 0
+
+    if args.command == "run":
+        with open(args.path, "wb"):
+            pass  # bắt đầu file mới
+        world = WumpusWorld(args.size, args.k, args.p, seed=args.seed)
+        agent = HybridAgent(args.size) if args.agent == "hybrid" else RandomAgent()
+        start = 0
+    else:
+        world, agent, start = restore(args.path)
+        print(f"Resumed at step {start}")
+
+    writer = CheckpointWriter(args.path, args.full_every)
+    try:
+        result = run(world, agent, writer, args.every, start, args.max_steps, args.advance)
+    finally:
+        writer.close()
+    print(f"{result['outcome']} after {result['steps']} steps, score {result['score']}; "
+          f"{writer.frames} frames, {writer.bytes_written} bytes -> {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
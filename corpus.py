@@ -0,0 +1,277 @@
+"""
+Corpus thế giới sinh sẵn, lưu trong một file nhị phân bản ghi cố định, đọc bằng mmap.
+
+    python corpus.py build worlds_8.wcorp --size 8 --k 2 --p 0.2 --count 1000000 --workers 8
+    python corpus.py info worlds_8.wcorp
+
+Mỗi bản ghi gồm seed, số lần thử khi sinh (để phát lại random), cờ metadata, vị trí vàng,
+độ dài đường an toàn tới vàng, vị trí K Wumpus và bitmap pit N*N bit. Các tiến trình
+dùng chung một file: trang được chia sẻ qua page cache của hệ điều hành, không ai sinh lại.
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from environment import WumpusWorld
+
+MAGIC = b"WCRP"
+VERSION = 1
+# magic, version, grid, k, p, số bản ghi, kích thước bản ghi (đệm tới 64 byte)
+HEADER = struct.Struct("<4sHHHdQI")
+HEADER_SIZE = 64
+# seed, attempts, flags, vị trí vàng, độ dài đường an toàn tới vàng
+RECORD_HEAD = struct.Struct("<IIBxHHH")
+# Số view tối thiểu được giữ trước khi WorldCorpus dọn các view không còn ai dùng
+EXPORT_PRUNE_MIN = 1024
+
+# Cờ metadata của từng thế giới
+GOLD_REACHABLE = 1  # có đường tới vàng không đi qua pit/Wumpus
+GOLD_AT_START = 2
+START_BREEZE = 4
+START_STENCH = 8
+NO_PATH = 0xFFFF
+
+
+def record_size(world_size: int, k: int) -> int:
+    return RECORD_HEAD.size + 4 * k + (world_size * world_size + 7) // 8
+
+
+def _safe_distance(world: WumpusWorld, goal: Tuple[int, int]) -> int:
+    """Số bước đi ngắn nhất từ (0,0) tới goal mà không bước vào pit hay Wumpus."""
+    grid = world.world
+    dist = {(0, 0): 0}
+    queue = deque([(0, 0)])
+    while queue:
+        cell = queue.popleft()
+        if cell == goal:
+            return dist[cell]
+        for nbr in world.get_neighbors(cell):
+            x, y = nbr
+            if nbr not in dist and not grid[x][y]["pit"] and not grid[x][y]["wumpus"]:
+                dist[nbr] = dist[cell] + 1
+                queue.append(nbr)
+    return NO_PATH
+
+
+def pack_world(world: WumpusWorld) -> bytes:
+    n = world.grid_size
+    gold = next((x, y) for x in range(n) for y in range(n) if world.world[x][y]["gold"])
+    distance = _safe_distance(world, gold)
+
+    flags = 0
+    if distance != NO_PATH:
+        flags |= GOLD_REACHABLE
+    if gold == (0, 0):
+        flags |= GOLD_AT_START
+    neighbors = world.get_neighbors((0, 0))
+    if any(world.world[x][y]["pit"] for x, y in neighbors):
+        flags |= START_BREEZE
+    if any(world.world[x][y]["wumpus"] for x, y in neighbors):
+        flags |= START_STENCH
+
+    bits = 0
+    for x in range(n):
+        row = world.world[x]
+        for y in range(n):
+            if row[y]["pit"]:
+                bits |= 1 << (x * n + y)
+
+    wumpus = [c for pos in sorted(world.wumpus_positions) for c in pos]
+    return b"".join((
+        RECORD_HEAD.pack(world.seed, world.generation_attempts, flags, gold[0], gold[1], distance),
+        struct.pack(f"<{len(wumpus)}H", *wumpus),
+        bits.to_bytes((n * n + 7) // 8, "little"),
+    ))
+
+
+def _pack_range(args) -> bytes:
+    world_size, k, p, first, count = args
+    return b"".join(pack_world(WumpusWorld(world_size, k, p, seed=s)) for s in range(first, first + count))
+
+
+def build_corpus(
+    path: str,
+    world_size: int,
+    k: int,
+    p: float,
+    count: int,
+    start_seed: int = 0,
+    workers: Optional[int] = None,
+    chunk: int = 2000,
+) -> None:
+    """
+    Sinh count thế giới (seed start_seed .. start_seed+count-1) song song và ghi ra path.
+    Các khối được ghi theo đúng thứ tự seed; file chỉ xuất hiện khi đã ghi xong.
+    """
+    jobs = [
+        (world_size, k, p, first, min(chunk, start_seed + count - first))
+        for first in range(start_seed, start_seed + count, chunk)
+    ]
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        header = HEADER.pack(MAGIC, VERSION, world_size, k, p, count, record_size(world_size, k))
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        if workers == 1:
+            for job in jobs:
+                f.write(_pack_range(job))
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                for blob in pool.imap(_pack_range, jobs):
+                    f.write(blob)
+    os.replace(tmp, path)
+
+
+class WorldCorpus:
+    """
+    Đọc corpus bằng mmap. record(i) và pit_bitmap(i) trả về memoryview vào file (không sao chép);
+    world(i) dựng WumpusWorld qua WumpusWorld.from_layout.
+    Các view đã trả ra được close() giải phóng, nên sau close() chúng không còn dùng được.
+    Muốn nhả view sớm thì dùng "with corpus.record(i) as view: ...".
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        # Các view đã trả ra ngoài; mmap chỉ đóng được khi mọi view đã được release
+        self._exported: List[memoryview] = []
+        self._prune_at = EXPORT_PRUNE_MIN
+        magic, version, self.world_size, self.k, self.p, self.count, self.record_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a world corpus (version {VERSION})")
+        if self.record_size != record_size(self.world_size, self.k):
+            raise ValueError(f"{path}: unexpected record size {self.record_size}")
+        self._wumpus = struct.Struct(f"<{2 * self.k}H")
+        self._bitmap_offset = RECORD_HEAD.size + self._wumpus.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        for view in self._exported:
+            view.release()
+        self._exported.clear()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _export(self, start: int, end: int) -> memoryview:
+        if len(self._exported) >= self._prune_at:
+            # Bỏ các view mà chỉ danh sách này còn giữ (danh sách, biến lặp và đối số getrefcount)
+            self._exported = [view for view in self._exported if sys.getrefcount(view) > 3]
+            self._prune_at = max(EXPORT_PRUNE_MIN, 2 * len(self._exported))
+        view = self._view[start:end]
+        self._exported.append(view)
+        return view
+
+    def _offset(self, index: int) -> int:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return HEADER_SIZE + index * self.record_size
+
+    def record(self, index: int) -> memoryview:
+        start = self._offset(index)
+        return self._export(start, start + self.record_size)
+
+    def pit_bitmap(self, index: int) -> memoryview:
+        start = self._offset(index) + self._bitmap_offset
+        return self._export(start, start + self.record_size - self._bitmap_offset)
+
+    def meta(self, index: int) -> Dict:
+        seed, attempts, flags, gx, gy, distance = RECORD_HEAD.unpack_from(self._mmap, self._offset(index))
+        return {
+            "seed": seed,
+            "attempts": attempts,
+            "flags": flags,
+            "gold": (gx, gy),
+            "gold_distance": None if distance == NO_PATH else distance,
+            "gold_reachable": bool(flags & GOLD_REACHABLE),
+        }
+
+    def flags(self, index: int) -> int:
+        return self._mmap[self._offset(index) + 8]
+
+    def select(self, require: int = 0, exclude: int = 0) -> Iterator[int]:
+        """Chỉ số các thế giới có đủ cờ require và không có cờ nào trong exclude."""
+        for index in range(self.count):
+            flags = self._mmap[HEADER_SIZE + index * self.record_size + 8]
+            if flags & require == require and not flags & exclude:
+                yield index
+
+    def wumpus(self, index: int) -> List[Tuple[int, int]]:
+        coords = self._wumpus.unpack_from(self._mmap, self._offset(index) + RECORD_HEAD.size)
+        return list(zip(coords[::2], coords[1::2]))
+
+    def pits(self, index: int) -> List[Tuple[int, int]]:
+        n = self.world_size
+        start = self._offset(index) + self._bitmap_offset
+        with self._view[start:start + self.record_size - self._bitmap_offset] as bitmap:
+            bits = int.from_bytes(bitmap, "little")
+        cells = []
+        while bits:
+            low = bits & -bits
+            idx = low.bit_length() - 1
+            cells.append(divmod(idx, n))
+            bits ^= low
+        return cells
+
+    def is_pit(self, index: int, x: int, y: int) -> bool:
+        bit = x * self.world_size + y
+        return bool(self._mmap[self._offset(index) + self._bitmap_offset + (bit >> 3)] >> (bit & 7) & 1)
+
+    def world(self, index: int, restore_rng: bool = True) -> WumpusWorld:
+        """
+        WumpusWorld của bản ghi index. Với restore_rng, trạng thái random toàn cục giống hệt
+        khi sinh bằng WumpusWorld(size, k, p, seed) (chi phí là rút lại các số ngẫu nhiên).
+        """
+        meta = self.meta(index)
+        return WumpusWorld.from_layout(
+            self.world_size,
+            self.k,
+            self.p,
+            meta["seed"],
+            self.pits(index),
+            self.wumpus(index),
+            [meta["gold"]],
+            attempts=meta["attempts"] if restore_rng else None,
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect a pre-generated world corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("path")
+    build.add_argument("--size", type=int, default=8)
+    build.add_argument("--k", type=int, default=2)
+    build.add_argument("--p", type=float, default=0.2)
+    build.add_argument("--count", type=int, default=100000)
+    build.add_argument("--start-seed", type=int, default=0)
+    build.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    info = sub.add_parser("info")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_corpus(args.path, args.size, args.k, args.p, args.count, args.start_seed, args.workers)
+    with WorldCorpus(args.path) as corpus:
+        reachable = sum(1 for _ in corpus.select(GOLD_REACHABLE))
+        print(f"{corpus.path}: {len(corpus)} worlds, n={corpus.world_size} k={corpus.k} p={corpus.p}, "
+              f"{corpus.record_size} bytes/record, gold reachable without risk: {reachable}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
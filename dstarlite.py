@@ -0,0 +1,205 @@
+import heapq
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    D* Lite cho một goal cố định. Tìm kiếm ngược từ goal về start nên khi agent
+    di chuyển hoặc vài ô đổi trạng thái an toàn, chỉ phần bị ảnh hưởng được sửa lại.
+    """
+
+    def __init__(self, goal: Cell, world_size: int, is_passable):
+        self.goal = goal
+        self.world_size = world_size
+        self.is_passable = is_passable
+        self.g: Dict[Cell, float] = {}
+        self.rhs: Dict[Cell, float] = {goal: 0}
+        self.km = 0
+        self.last_start: Optional[Cell] = None
+        self.start: Optional[Cell] = None
+        self._open: List[Tuple[Tuple[float, float], Cell]] = []
+        self._queued: Dict[Cell, Tuple[float, float]] = {}
+        self.expansions = 0
+        self.last_expansions = 0
+        self._push(goal, (self._h(goal), 0))
+
+    def _h(self, cell: Cell) -> int:
+        if self.start is None:
+            return 0
+        return abs(cell[0] - self.start[0]) + abs(cell[1] - self.start[1])
+
+    def _neighbors(self, cell: Cell) -> List[Cell]:
+        x, y = cell
+        result = []
+        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.world_size and 0 <= ny < self.world_size:
+                result.append((nx, ny))
+        return result
+
+    def _cost(self, target: Cell) -> float:
+        # Giá đi vào một ô chỉ phụ thuộc vào ô đích
+        return 1 if self.is_passable(target) else INF
+
+    def _key(self, cell: Cell) -> Tuple[float, float]:
+        best = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return (best + self._h(cell) + self.km, best)
+
+    def _push(self, cell: Cell, key: Tuple[float, float]) -> None:
+        self._queued[cell] = key
+        heapq.heappush(self._open, (key, cell))
+
+    def _top(self):
+        # Bỏ các entry cũ (lazy deletion)
+        while self._open:
+            key, cell = self._open[0]
+            if self._queued.get(cell) == key:
+                return key, cell
+            heapq.heappop(self._open)
+        return (INF, INF), None
+
+    def _update_vertex(self, cell: Cell) -> None:
+        if cell != self.goal:
+            self.rhs[cell] = min(
+                (self._cost(nbr) + self.g.get(nbr, INF) for nbr in self._neighbors(cell)),
+                default=INF,
+            )
+        self._queued.pop(cell, None)
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            self._push(cell, self._key(cell))
+
+    def cells_changed(self, cells) -> None:
+        """Báo cho planner các ô vừa đổi trạng thái đi được/không đi được."""
+        for cell in cells:
+            for nbr in self._neighbors(cell):
+                self._update_vertex(nbr)
+
+    def _compute_shortest_path(self) -> None:
+        start = self.start
+        while True:
+            top_key, cell = self._top()
+            if cell is None:
+                break
+            if not (top_key < self._key(start) or self.rhs.get(start, INF) != self.g.get(start, INF)):
+                break
+            heapq.heappop(self._open)
+            del self._queued[cell]
+            self.last_expansions += 1
+
+            new_key = self._key(cell)
+            if top_key < new_key:
+                self._push(cell, new_key)
+            elif self.g.get(cell, INF) > self.rhs.get(cell, INF):
+                self.g[cell] = self.rhs[cell]
+                for nbr in self._neighbors(cell):
+                    self._update_vertex(nbr)
+            else:
+                self.g[cell] = INF
+                self._update_vertex(cell)
+                for nbr in self._neighbors(cell):
+                    self._update_vertex(nbr)
+
+    def find_path(self, start: Cell) -> Optional[List[Cell]]:
+        self.last_expansions = 0
+        if self.last_start is None:
+            self.start = self.last_start = start
+            # Heuristic phụ thuộc start nên key của goal phải tính lại
+            self._queued.pop(self.goal, None)
+            self._push(self.goal, self._key(self.goal))
+        elif start != self.last_start:
+            self.km += abs(start[0] - self.last_start[0]) + abs(start[1] - self.last_start[1])
+            self.start = self.last_start = start
+
+        self._compute_shortest_path()
+        self.expansions += self.last_expansions
+
+        if self.g.get(start, INF) == INF and start != self.goal:
+            return None
+        path = [start]
+        current = start
+        while current != self.goal:
+            nxt = min(self._neighbors(current), key=lambda n: self._cost(n) + self.g.get(n, INF))
+            if self._cost(nxt) + self.g.get(nxt, INF) == INF or len(path) > self.world_size * self.world_size:
+                return None
+            path.append(nxt)
+            current = nxt
+        return path
+
+
+class IncrementalPlanner:
+    """
+    Giữ các instance D* Lite theo (goal, strict_safe) giữa các bước và chỉ sửa phần
+    tìm kiếm bị ảnh hưởng khi safe_cells/unsafe_cells của LogicInference thay đổi.
+    """
+
+    def __init__(self, logic_inference, max_goals: int = 32):
+        self.logic_inference = logic_inference
+        self.world_size = logic_inference.world_size
+        self.max_goals = max_goals
+        self._planners: "OrderedDict[Tuple[Cell, bool], Tuple[DStarLite, int]]" = OrderedDict()
+        self._safe: Set[Cell] = set()
+        self._unsafe: Set[Cell] = set()
+        # Nhật ký các ô đã thay đổi; mỗi planner nhớ vị trí đã áp dụng
+        self._changes: List[Cell] = []
+        self._log_offset = 0
+
+        self.replans = 0
+        self.expansions = 0
+        self.last_expansions = 0
+        self.expansion_history: deque = deque(maxlen=1000)
+
+    def _sync(self) -> None:
+        safe = self.logic_inference.safe_cells
+        unsafe = self.logic_inference.unsafe_cells
+        changed = (safe ^ self._safe) | (unsafe ^ self._unsafe)
+        if changed:
+            self._changes.extend(changed)
+            self._safe = set(safe)
+            self._unsafe = set(unsafe)
+
+    def _passable(self, strict_safe: bool):
+        li = self.logic_inference
+        if strict_safe:
+            return lambda cell: cell in li.safe_cells and cell not in li.unsafe_cells
+        return lambda cell: cell not in li.unsafe_cells
+
+    def _trim_log(self) -> None:
+        if not self._planners:
+            self._log_offset += len(self._changes)
+            self._changes.clear()
+            return
+        oldest = min(pos for _, pos in self._planners.values())
+        drop = oldest - self._log_offset
+        if drop > 0:
+            del self._changes[:drop]
+            self._log_offset = oldest
+
+    def find_path(self, start: Cell, goal: Cell, strict_safe: bool = False) -> Optional[List[Cell]]:
+        self.last_expansions = 0
+        if start == goal:
+            return [start]
+        self._sync()
+        log_end = self._log_offset + len(self._changes)
+
+        key = (goal, strict_safe)
+        entry = self._planners.pop(key, None)
+        if entry is None:
+            planner = DStarLite(goal, self.world_size, self._passable(strict_safe))
+        else:
+            planner, applied = entry
+            planner.cells_changed(self._changes[applied - self._log_offset:])
+        self._planners[key] = (planner, log_end)
+        while len(self._planners) > self.max_goals:
+            self._planners.popitem(last=False)
+        self._trim_log()
+
+        path = planner.find_path(start)
+        self.replans += 1
+        self.last_expansions = planner.last_expansions
+        self.expansions += planner.last_expansions
+        self.expansion_history.append(planner.last_expansions)
+        return path
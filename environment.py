@@ -1,8 +1,68 @@
 import random
-from enum import Enum
-from typing import Dict, List, Tuple
+from enum import Enum, IntEnum
+from typing import Dict, FrozenSet, List, Tuple
+
+
+class Action(IntEnum):
+    """Mã số nguyên của các hành động, dùng xuyên suốt vòng lặp step."""
+    WAIT = 0
+    MOVE_FORWARD = 1
+    TURN_LEFT = 2
+    TURN_RIGHT = 3
+    GRAB = 4
+    SHOOT = 5
+    CLIMB = 6
+
+    def __str__(self):
+        return ACTION_NAMES[self]
+
+
+ACTION_NAMES = ("wait", "move_forward", "turn_left", "turn_right", "grab", "shoot", "climb")
+ACTION_CODES = {name: Action(code) for code, name in enumerate(ACTION_NAMES)}
+
+# Percept dạng bitmask
+STENCH = 1
+BREEZE = 2
+GLITTER = 4
+BUMP = 8
+SCREAM = 16
+PERCEPT_BITS = (("stench", STENCH), ("breeze", BREEZE), ("glitter", GLITTER), ("bump", BUMP), ("scream", SCREAM))
+
+# Phiên bản luật chơi và cách tính điểm; tăng khi thay đổi để bỏ các kết quả đã lưu (oracle cache)
+RULES_VERSION = 1
+
+
+def percepts_to_dict(bits: int) -> Dict[str, bool]:
+    return {name: bool(bits & bit) for name, bit in PERCEPT_BITS}
+
+
+def percepts_to_bits(percepts) -> int:
+    if isinstance(percepts, int):
+        return percepts
+    bits = 0
+    for name, bit in PERCEPT_BITS:
+        if percepts.get(name, False):
+            bits |= bit
+    return bits
+
+
+def to_action(action) -> Action:
+    """Chuyển tên hành động (str) hoặc mã số về Action; tên không rõ được coi là wait."""
+    if isinstance(action, str):
+        return ACTION_CODES.get(action, Action.WAIT)
+    return Action(action)
+
+
+
+
 class WumpusWorld:
     def __init__(self, world_size = 8, k = 2, p = 0.2, seed=36):
+        self._init_state(world_size, k, p, seed)
+        random.seed(self.seed)
+        self.world = self._generate_world()
+        self.percept_bits = self._compute_percept_bits()
+
+    def _init_state(self, world_size, k, p, seed):
         self.grid_size = world_size
         self.agent_pos = (0, 0)
         self.agent_dir = "right"
@@ -14,9 +74,59 @@ class WumpusWorld:
         self.score = 0
         self.K = k
         self.pit_prob = p
+        # Chỉ mục vị trí Wumpus theo từng hàng x và từng cột y, để mũi tên tra cứu một lần
+        self.wumpus_positions: set = set()
+        self.wumpus_by_x: Dict[int, set] = {}
+        self.wumpus_by_y: Dict[int, set] = {}
+        # Số Wumpus kề mỗi ô, cập nhật cục bộ khi Wumpus xuất hiện/di chuyển/chết
+        self.stench_counts: Dict[Tuple[int, int], int] = {}
+        # ObservationBuffer (nếu có) được cập nhật tại chỗ khi agent di chuyển/quay
+        self.observation = None
+        # Số lần thử đặt Wumpus/vàng khi sinh, đủ để phát lại trạng thái random (from_layout)
+        self.generation_attempts = 0
+        # Vị trí vàng lúc sinh, không đổi khi agent nhặt vàng (static_cells() không phải quét N*N ô)
+        self.initial_gold: FrozenSet[Tuple[int, int]] = frozenset()
+
+    @classmethod
+    def from_layout(cls, world_size, k, p, seed, pits, wumpus, gold, attempts=None):
+        """
+        Dựng thế giới từ bố cục đã sinh sẵn (corpus, cache) thay vì chạy lại _generate_world.
+        Nếu biết attempts (generation_attempts lúc sinh), trạng thái random toàn cục được đưa
+        về đúng như khi sinh từ seed, nên Wumpus di chuyển/RandomAgent cho kết quả như cũ.
+        """
+        world = cls.__new__(cls)
+        world._init_state(world_size, k, p, seed)
+        grid = [[{"pit": False, "wumpus": False, "gold": False} for _ in range(world_size)]
+                for _ in range(world_size)]
+        for x, y in wumpus:
+            grid[x][y]["wumpus"] = True
+            world._index_wumpus((x, y))
+        for x, y in gold:
+            grid[x][y]["gold"] = True
+        world.initial_gold = frozenset(gold)
+        for x, y in pits:
+            grid[x][y]["pit"] = True
+        world.world = grid
+        if attempts is not None:
+            world.generation_attempts = attempts
+            world._replay_generation_rng(set(wumpus) | set(gold))
+        world.percept_bits = world._compute_percept_bits()
+        return world
+
+    def static_cells(self) -> Tuple[FrozenSet[Tuple[int, int]], FrozenSet[Tuple[int, int]]]:
+        """Pit và vàng ban đầu (không đổi trong một ván), tính một lần cho mọi ảnh chụp/checkpoint."""
+        n = self.grid_size
+        grid = self.world
+        pits = frozenset((x, y) for x in range(n) for y in range(n) if grid[x][y]["pit"])
+        return pits, self.initial_gold
+
+    def _replay_generation_rng(self, occupied):
+        """Rút lại đúng dãy số ngẫu nhiên mà _generate_world đã dùng."""
         random.seed(self.seed)
-        self.world = self._generate_world()
-        self.percepts = self._update_percepts()
+        for _ in range(2 * self.generation_attempts):
+            random.randint(0, self.grid_size - 1)
+        for _ in range(self.grid_size * self.grid_size - len(occupied | {(0, 0)})):
+            random.random()
 
     def _generate_world(self):
         world = [[{"pit": False, "wumpus": False, "gold": False} for _ in range(self.grid_size)]
@@ -25,18 +135,22 @@ class WumpusWorld:
         # Đặt k Wumpus (không ở (0,0))
         placed_wumpus = 0
         while placed_wumpus < self.K:
+            self.generation_attempts += 1
             wx = random.randint(0, self.grid_size - 1)
             wy = random.randint(0, self.grid_size - 1)
             if (wx, wy) != (0, 0) and not world[wx][wy]["wumpus"]:
                 world[wx][wy]["wumpus"] = True
+                self._index_wumpus((wx, wy))
                 placed_wumpus += 1
 
         # Đặt gold (không ở (0,0), không ở ô có Wumpus hoặc pit)
         while True:
+            self.generation_attempts += 1
             gx = random.randint(0, self.grid_size - 1)
             gy = random.randint(0, self.grid_size - 1)
             if not world[gx][gy]["wumpus"] and not world[gx][gy]["pit"]:
                 world[gx][gy]["gold"] = True
+                self.initial_gold = frozenset({(gx, gy)})
                 break
 
         # Đặt pit với xác suất p (không ở (0,0) và không ở ô có Wumpus hoặc gold)
@@ -48,30 +162,81 @@ class WumpusWorld:
 
         return world
 
-    def _update_percepts(self):
+    def _index_wumpus(self, pos):
+        x, y = pos
+        self.wumpus_positions.add(pos)
+        self.wumpus_by_x.setdefault(x, set()).add(y)
+        self.wumpus_by_y.setdefault(y, set()).add(x)
+        for nbr in self.get_neighbors(pos):
+            self.stench_counts[nbr] = self.stench_counts.get(nbr, 0) + 1
+
+    def _unindex_wumpus(self, pos):
+        x, y = pos
+        self.wumpus_positions.discard(pos)
+        self.wumpus_by_x.get(x, set()).discard(y)
+        self.wumpus_by_y.get(y, set()).discard(x)
+        for nbr in self.get_neighbors(pos):
+            count = self.stench_counts.get(nbr, 0) - 1
+            if count > 0:
+                self.stench_counts[nbr] = count
+            else:
+                self.stench_counts.pop(nbr, None)
+
+    def move_wumpus(self, old_pos, new_pos):
+        """Di chuyển một Wumpus, giữ grid và chỉ mục đồng bộ."""
+        self.world[old_pos[0]][old_pos[1]]["wumpus"] = False
+        self._unindex_wumpus(old_pos)
+        self.world[new_pos[0]][new_pos[1]]["wumpus"] = True
+        self._index_wumpus(new_pos)
+
+    def _first_wumpus_in_line(self, pos, direction):
+        """Tìm Wumpus gần nhất theo hướng bắn bằng chỉ mục hàng/cột."""
+        x, y = pos
+        if direction == "up":
+            hits = [i for i in self.wumpus_by_y.get(y, ()) if i > x]
+            return (min(hits), y) if hits else None
+        if direction == "down":
+            hits = [i for i in self.wumpus_by_y.get(y, ()) if i < x]
+            return (max(hits), y) if hits else None
+        if direction == "right":
+            hits = [j for j in self.wumpus_by_x.get(x, ()) if j > y]
+            return (x, min(hits)) if hits else None
+        if direction == "left":
+            hits = [j for j in self.wumpus_by_x.get(x, ()) if j < y]
+            return (x, max(hits)) if hits else None
+        return None
+
+    def _compute_percept_bits(self) -> int:
         x, y = self.agent_pos
-        percepts = {
-            "stench": False,
-            "breeze": False,
-            "glitter": False,
-            "bump": False,
-            "scream": False
-        }
+        bits = 0
 
         # Kiểm tra các ô lân cận để cập nhật percepts
+        if self.stench_counts.get(self.agent_pos, 0) > 0:
+            bits |= STENCH
         for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
             nx, ny = x + dx, y + dy
             if 0 <= nx < self.grid_size and 0 <= ny < self.grid_size:
-                cell = self.world[nx][ny]
-                if cell["wumpus"]:
-                    percepts["stench"] = True
-                if cell["pit"]:
-                    percepts["breeze"] = True
+                if self.world[nx][ny]["pit"]:
+                    bits |= BREEZE
+                    break
         # Kiểm tra nếu có vàng trong ô hiện tại
         if self.world[x][y]["gold"]:
-            percepts["glitter"] = True
+            bits |= GLITTER
 
-        return percepts
+        return bits
+
+    def _update_percepts(self):
+        """Adapter cũ: trả về percepts dạng dict."""
+        return percepts_to_dict(self._compute_percept_bits())
+
+    @property
+    def percepts(self) -> Dict[str, bool]:
+        """Percepts dạng dict (adapter), tạo từ percept_bits."""
+        return percepts_to_dict(self.percept_bits)
+
+    @percepts.setter
+    def percepts(self, value) -> None:
+        self.percept_bits = percepts_to_bits(value)
 
     def get_neighbors(self, pos):
         x, y = pos
@@ -97,12 +262,14 @@ class WumpusWorld:
 
         if 0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size:
             self.agent_pos = (new_x, new_y)
-            self.percepts = self._update_percepts()
+            self.percept_bits = self._compute_percept_bits()
             self.score -= 1
+            if self.observation is not None:
+                self.observation.set_agent(self.agent_pos, self.agent_dir)
             return True
 
         # Bump nếu chạm wall
-        self.percepts["bump"] = True
+        self.percept_bits |= BUMP
         return False
 
     def turn_left(self):
@@ -110,50 +277,32 @@ class WumpusWorld:
         idx = directions.index(self.agent_dir)
         self.agent_dir = directions[(idx + 1) % 4]
         self.score -= 1
+        if self.observation is not None:
+            self.observation.set_agent(self.agent_pos, self.agent_dir)
 
     def turn_right(self):
         directions = ["up", "right", "down", "left"]
         idx = directions.index(self.agent_dir)
         self.agent_dir = directions[(idx + 1) % 4]
         self.score -= 1
+        if self.observation is not None:
+            self.observation.set_agent(self.agent_pos, self.agent_dir)
 
     def shoot_arrow(self):
         if not self.has_arrow:
             return False
 
         self.has_arrow = False
-        x, y = self.agent_pos
-        hit = False
-
-        if self.agent_dir == "up":
-            for i in range(x - 1, self.grid_size):
-                if self.world[i][y]["wumpus"]:
-                    hit = True
-                    self.world[i][y]["wumpus"] = False  # Wumpus đã bị bắn
-                    break
-        elif self.agent_dir == "down":
-            for i in range(x + 1, -1, -1):
-                if self.world[i][y]["wumpus"]:
-                    self.world[i][y]["wumpus"] = False
-                    hit = True
-                    break
-        elif self.agent_dir == "left":
-            for j in range(y - 1, -1, -1):
-                if self.world[x][j]["wumpus"]:
-                    self.world[x][j]["wumpus"] = False
-                    hit = True
-                    break
-        elif self.agent_dir == "right":
-            for j in range(y + 1, self.grid_size):
-                if self.world[x][j]["wumpus"]:
-                    self.world[x][j]["wumpus"] = False
-                    hit = True
-                    break
+        target = self._first_wumpus_in_line(self.agent_pos, self.agent_dir)
+        hit = target is not None
+        if hit:
+            # Wumpus đã bị bắn
+            self.world[target[0]][target[1]]["wumpus"] = False
+            self._unindex_wumpus(target)
 
         if hit:
             self.wumpus_alive = False
-            self.percepts = self._update_percepts()
-            self.percepts["scream"] = True
+            self.percept_bits = self._compute_percept_bits() | SCREAM
             self.score -= 10
             return True
 
@@ -164,7 +313,7 @@ class WumpusWorld:
         if self.world[x][y]["gold"]:
             self.has_gold = True
             self.world[x][y]["gold"] = False
-            self.percepts["glitter"] = False
+            self.percept_bits &= ~GLITTER
             self.score += 10
             return True
         return False
@@ -180,16 +329,40 @@ class WumpusWorld:
         self.score += 1000
         return True
 
-    def is_game_over(self, agent):
-        if self.game_over_state is not None:
-            return self.game_over_state
+    # Bảng dispatch theo mã Action (WAIT không làm gì)
+    _ACTION_TABLE = (None, move_forward, turn_left, turn_right, grab_gold, shoot_arrow, climb_out)
+
+    def step(self, action) -> Tuple[int, int, bool]:
+        """
+        Thực hiện một hành động (mã Action hoặc tên) và trả về (percept_bits, reward, done),
+        với reward là thay đổi của score. Mã ngoài 0..6 là ValueError.
+        """
+        score = self.score
+        if not isinstance(action, int):
+            action = to_action(action)
+        elif not 0 <= action < len(self._ACTION_TABLE):
+            raise ValueError(f"invalid action {action!r}")
+        handler = self._ACTION_TABLE[action]
+        if handler is not None:
+            handler(self)
+        done = self.game_over_state is not None or self._check_hazard()
+        return self.percept_bits, self.score - score, done
 
+    def _check_hazard(self) -> bool:
         x, y = self.agent_pos
         cell = self.world[x][y]
 
         # Kiểm tra nếu agent rơi vào pit hoặc bị wumpus ăn
         if cell["pit"] or (cell["wumpus"]):
             self.game_over_state = "lose"
+            return True
+        return False
+
+    def is_game_over(self, agent):
+        if self.game_over_state is not None:
+            return self.game_over_state
+
+        if self._check_hazard():
             return "lose"
 
         # Kiêm tra nếu agent đã lấy vàng và trở về (0, 0)
@@ -0,0 +1,192 @@
+"""
+Xuất ảnh PNG của các episode được chọn mà không cần màn hình (SDL dummy driver).
+
+    python frames.py --agent hybrid --seeds 0-9999 --size 8 --outcomes lose --last 10 --output frames
+    python frames.py --seeds 0-999 --outcomes lose,stall --last 1 --scale 0.25      # chỉ ảnh thu nhỏ cuối
+
+Mỗi episode chạy như runner.run_episode, không chụp ảnh. Chỉ episode có kết quả được chọn mới
+được chạy lại (cùng seed nên giống hệt) và chụp ảnh (simthread) ở N bước cuối, rồi vẽ bằng chính
+draw_grid/draw_ui_panel của GUI trên một surface ngoài màn hình. Ảnh được ghi vào <output>/<agent>-n<size>-k<k>-p<p>-s<seed>/step_XXXXX.png.
+"""
+import os
+
+# Phải đặt trước khi pygame khởi tạo display. SDL mặc định bắt SIGTERM (thành sự kiện QUIT),
+# khiến Pool.terminate() không dừng được tiến trình con.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import multiprocessing
+import sys
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from environment import WumpusWorld
+from gui import GUI
+from runner import parse_seeds, run_episode
+from simthread import AgentSnapshot, Snapshot, WorldSnapshot
+
+# Một GUI cho mỗi tiến trình con, dùng lại cho mọi episode
+_worker_ui: Optional[GUI] = None
+
+
+def episode_dir(output: str, agent: str, world_size: int, k: int, p: float, seed: int) -> str:
+    name = f"{agent}-n{world_size}-k{k}-p{p}-s{seed}".replace(":", "_")
+    return os.path.join(output, name)
+
+
+def record_keyframes(
+    world_size: int,
+    k: int,
+    p: float,
+    seed: int,
+    agent: str = "hybrid",
+    last: int = 10,
+    advance_mode: bool = False,
+    max_steps: Optional[int] = None,
+    outcomes: Optional[Tuple[str, ...]] = None,
+) -> Tuple[Dict, List[Snapshot]]:
+    """
+    Chạy một episode; trả về (bản ghi, ảnh chụp của tối đa `last` bước cuối). Nếu có outcomes
+    và kết quả không nằm trong đó thì không chụp ảnh nào. Khi có outcomes, episode được chạy
+    trước không chụp ảnh rồi chạy lại chỉ chụp các bước sẽ xuất; không có outcomes thì chạy
+    một lần và giữ `last` ảnh chụp gần nhất.
+    """
+    first = 0
+    if outcomes is not None:
+        record = run_episode(
+            world_size, k, p, seed, agent=agent, max_steps=max_steps,
+            advance_mode=advance_mode, world=WumpusWorld(world_size, k, p, seed=seed),
+        )
+        if record["outcome"] not in outcomes:
+            return record, []
+        first = record["steps"] - last
+
+    world = WumpusWorld(world_size, k, p, seed=seed)
+    cells = world.static_cells()
+    frames: "deque[Snapshot]" = deque(maxlen=last)
+    steps = [0]
+
+    def on_step(w, player, action):
+        steps[0] += 1
+        if steps[0] > first:
+            frames.append(Snapshot(WorldSnapshot(w, cells, w.is_game_over(player)), AgentSnapshot(player), 0, steps[0]))
+
+    replay = run_episode(
+        world_size, k, p, seed, agent=agent, max_steps=max_steps,
+        advance_mode=advance_mode, world=world, on_step=on_step,
+    )
+    # Với outcomes, giữ bản ghi của lần chạy không chụp ảnh (wall_time không tính việc chụp)
+    return (replay if outcomes is None else record), list(frames)
+
+
+def _ui_for(snapshot: Snapshot, agent: str) -> GUI:
+    global _worker_ui
+    if _worker_ui is None:
+        _worker_ui = GUI(snapshot.world, snapshot.agent)
+    elif _worker_ui.GRID_SIZE != snapshot.world.grid_size:
+        _worker_ui._update(snapshot.world, snapshot.agent)
+    else:
+        # Cùng kích thước: chỉ đưa viewport về bám theo agent
+        _worker_ui.follow_agent = True
+    _worker_ui.agent_type = agent
+    return _worker_ui
+
+
+def render_frames(snapshots: List[Snapshot], directory: str, agent: str = "hybrid", scale: float = 1.0) -> int:
+    """Vẽ từng ảnh chụp (lưới + bảng thông tin + minimap, không có nút) ra PNG; trả về số ảnh."""
+    if not snapshots:
+        return 0
+    ui = _ui_for(snapshots[0], agent)
+    os.makedirs(directory, exist_ok=True)
+    # Vẽ lên surface ngoài màn hình thay cho cửa sổ
+    if ui.screen is pygame.display.get_surface():
+        ui.screen = pygame.Surface((ui.WINDOW_WIDTH, ui.WINDOW_HEIGHT))
+    for snapshot in snapshots:
+        ui.show(snapshot)
+        ui.screen.fill(ui.DARK_BG)
+        ui.draw_grid()
+        ui.draw_ui_panel()
+        ui.draw_minimap()
+        width = ui.view_cols * ui.CELL_SIZE + 2 * ui.MARGIN + ui.UI_WIDTH - 20 + ui.MARGIN // 2
+        frame = ui.screen.subsurface((0, 0, min(width, ui.WINDOW_WIDTH), ui.WINDOW_HEIGHT - 100))
+        if scale != 1.0:
+            size = (max(1, int(frame.get_width() * scale)), max(1, int(frame.get_height() * scale)))
+            frame = pygame.transform.smoothscale(frame, size)
+        pygame.image.save(frame, os.path.join(directory, f"step_{snapshot.steps:05d}.png"))
+    return len(snapshots)
+
+
+def _export_seed(job) -> Dict:
+    world_size, k, p, seed, agent, outcomes, last, advance_mode, max_steps, output, scale = job
+    record, snapshots = record_keyframes(world_size, k, p, seed, agent, last, advance_mode, max_steps, outcomes)
+    record["frames"] = 0
+    if snapshots:
+        record["frames"] = render_frames(
+            snapshots, episode_dir(output, agent, world_size, k, p, seed), agent, scale
+        )
+    return record
+
+
+def export_frames(
+    agent: str,
+    seeds: List[int],
+    world_size: int,
+    k: int,
+    p: float,
+    output: str = "frames",
+    outcomes: Tuple[str, ...] = ("lose",),
+    last: int = 10,
+    workers: Optional[int] = None,
+    advance_mode: bool = False,
+    max_steps: Optional[int] = None,
+    scale: float = 1.0,
+) -> Tuple[int, int]:
+    """Chạy các seed song song; trả về (số episode đã xuất ảnh, tổng số ảnh)."""
+    jobs = [
+        (world_size, k, p, seed, agent, tuple(outcomes), last, advance_mode, max_steps, output, scale)
+        for seed in seeds
+    ]
+    pool = multiprocessing.Pool(workers) if workers != 1 else None
+    episodes = frames = 0
+    try:
+        results = pool.imap_unordered(_export_seed, jobs, chunksize=8) if pool else map(_export_seed, jobs)
+        for record in results:
+            if record["frames"]:
+                episodes += 1
+                frames += record["frames"]
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return episodes, frames
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export PNG keyframes of selected episodes without a display")
+    parser.add_argument("--agent", default="hybrid", help="hybrid, random or module:Class")
+    parser.add_argument("--seeds", default="0-99", help="range 'a-b' or list 'a,b,c'")
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--p", type=float, default=0.2)
+    parser.add_argument("--outcomes", default="lose", help="comma separated: win, lose, stall")
+    parser.add_argument("--last", type=int, default=10, help="number of final steps to render per episode")
+    parser.add_argument("--scale", type=float, default=1.0, help="resize frames, e.g. 0.25 for thumbnails")
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", default="frames")
+    args = parser.parse_args(argv)
+
+    episodes, frames = export_frames(
+        args.agent, parse_seeds(args.seeds), args.size, args.k, args.p, args.output,
+        tuple(args.outcomes.split(",")), args.last, args.workers, args.advance, args.max_steps, args.scale,
+    )
+    print(f"Wrote {frames} frames for {episodes} episodes -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,21 @@
+import os
 import pygame
 from enum import Enum
+from itertools import chain
 from movingwumpus import MovingWumpusModule
+from profiling import PROFILER
+
+# Ảnh được nạp theo vị trí của module, không phụ thuộc thư mục đang chạy
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+try:
+    import numpy as np
+except ImportError:  # numpy chỉ cần cho minimap (pygame.surfarray)
+    np = None
 class GameMode(Enum):
     AUTO = "Auto"
     STEP = "Step"
+    TURBO = "Turbo"
 class GUI:
     def __init__(self, world, agent):
         pygame.init()
@@ -18,10 +30,12 @@ class GUI:
         self.BUTTON_HEIGHT = 40
         self.WINDOW_WIDTH = 1000
         self.WINDOW_HEIGHT = 700
-        available_grid_width = self.WINDOW_WIDTH - self.UI_WIDTH - 2 * self.MARGIN
-        available_grid_height = self.WINDOW_HEIGHT - 2 * self.MARGIN - 100
-        self.CELL_SIZE = min(available_grid_width // self.GRID_SIZE,
-                             available_grid_height // self.GRID_SIZE)
+        # Vùng vẽ lưới; bản đồ lớn hơn vùng này được xem qua viewport cuộn/zoom được
+        self.VIEW_WIDTH = self.WINDOW_WIDTH - self.UI_WIDTH - 2 * self.MARGIN
+        self.VIEW_HEIGHT = self.WINDOW_HEIGHT - 2 * self.MARGIN - 100
+        self.MIN_CELL_SIZE = 24
+        self.MAX_CELL_SIZE = 128
+        self.MINIMAP_SIZE = 130
         # Pygame setup
         self.screen = pygame.display.set_mode(
             (self.WINDOW_WIDTH, self.WINDOW_HEIGHT)
@@ -47,69 +61,168 @@ class GUI:
         self.ORANGE = (255, 165, 0)
         self.PURPLE = (128, 0, 128)
 
-        # Initial mode and buttons
+        # Initial mode
         self.mode = GameMode.STEP
-        self.buttons = self._create_buttons()
 
-        # Load hình ảnh và scale theo CELL_SIZE
-        self.agent_img = pygame.transform.scale(pygame.image.load("assets/agent.png"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.wumpus_img = pygame.transform.scale(pygame.image.load("assets/wumpus.png"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.gold_img = pygame.transform.scale(pygame.image.load("assets/gold.png"), (int(self.CELL_SIZE * 0.8), int(self.CELL_SIZE * 0.8)))
-        self.pit_img = pygame.transform.scale(pygame.image.load("assets/pit.png"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.block_img = pygame.transform.scale(pygame.image.load("assets/floor.jpg"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.breeze_img = pygame.transform.scale(pygame.image.load("assets/breeze.png"), (int(self.CELL_SIZE * 0.5), int(self.CELL_SIZE * 0.5)))
-        self.stench_img = pygame.transform.scale(pygame.image.load("assets/stench.png"), (int(self.CELL_SIZE * 0.5), int(self.CELL_SIZE * 0.5)))
+        # Ảnh gốc nạp một lần; bản đã scale được cache theo CELL_SIZE
+        self._images = {
+            name: pygame.image.load(os.path.join(ASSETS_DIR, f"{name}.{ext}"))
+            for name, ext in (("agent", "png"), ("wumpus", "png"), ("gold", "png"), ("pit", "png"),
+                              ("floor", "jpg"), ("breeze", "png"), ("stench", "png"))
+        }
+        self._scaled_cache = {}
+        self._minimap = None
+        self._minimap_key = None
+        self._reset_view()
 
         # NEW: Toggle for showing actual pit/Wumpus icons
         self.show_all = False
         self.show_config_popup = False
         self.ADVANCE_MODE = False
+        # Overlay thời gian theo pha (bật/tắt cùng PROFILER)
+        self.show_profiler = PROFILER.enabled
     def _update(self, new_world, new_agent):
         """Update the GUI with a new world state."""
         self.world = new_world
         self.agent = new_agent
-        self.buttons = self._create_buttons()
-        available_grid_width = self.WINDOW_WIDTH - self.UI_WIDTH - 2 * self.MARGIN
-        available_grid_height = self.WINDOW_HEIGHT - 2 * self.MARGIN - 100
         self.GRID_SIZE = new_world.grid_size
-        self.CELL_SIZE = min(available_grid_width // self.GRID_SIZE,
-                             available_grid_height // self.GRID_SIZE)
-        # Load hình ảnh và scale theo CELL_SIZE
-        self.agent_img = pygame.transform.scale(pygame.image.load("assets/agent.png"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.wumpus_img = pygame.transform.scale(pygame.image.load("assets/wumpus.png"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.gold_img = pygame.transform.scale(pygame.image.load("assets/gold.png"), (int(self.CELL_SIZE * 0.8), int(self.CELL_SIZE * 0.8)))
-        self.pit_img = pygame.transform.scale(pygame.image.load("assets/pit.png"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.block_img = pygame.transform.scale(pygame.image.load("assets/floor.jpg"), (self.CELL_SIZE, self.CELL_SIZE))
-        self.breeze_img = pygame.transform.scale(pygame.image.load("assets/breeze.png"), (int(self.CELL_SIZE * 0.5), int(self.CELL_SIZE * 0.5)))
-        self.stench_img = pygame.transform.scale(pygame.image.load("assets/stench.png"), (int(self.CELL_SIZE * 0.5), int(self.CELL_SIZE * 0.5)))
+        self._reset_view()
+
+    # ---- Viewport và zoom ----
+    def _reset_view(self):
+        """Cỡ ô mặc định: vừa cả bản đồ, nhưng không nhỏ hơn MIN_CELL_SIZE (khi đó dùng viewport)."""
+        self.fit_cell_size = max(1, min(self.VIEW_WIDTH // self.GRID_SIZE, self.VIEW_HEIGHT // self.GRID_SIZE))
+        self.view_row0 = 0  # hàng (x) thấp nhất đang hiển thị
+        self.view_col0 = 0  # cột (y) trái nhất đang hiển thị
+        self.follow_agent = True
+        self._set_cell_size(max(self.fit_cell_size, self.MIN_CELL_SIZE))
+
+    def _set_cell_size(self, size):
+        self.CELL_SIZE = max(self.fit_cell_size, min(self.MAX_CELL_SIZE, size))
+        self.view_rows = min(self.GRID_SIZE, self.VIEW_HEIGHT // self.CELL_SIZE)
+        self.view_cols = min(self.GRID_SIZE, self.VIEW_WIDTH // self.CELL_SIZE)
+        self._load_images()
+        self._clamp_view()
+        self.buttons = self._create_buttons()
+
+    def _load_images(self):
+        """Ảnh scale theo CELL_SIZE, cache theo cỡ ô để zoom không phải scale lại."""
+        images = self._scaled_cache.get(self.CELL_SIZE)
+        if images is None:
+            cell = self.CELL_SIZE
+            full, gold, small = (cell, cell), (int(cell * 0.8), int(cell * 0.8)), (int(cell * 0.5), int(cell * 0.5))
+            images = self._scaled_cache[cell] = {
+                "agent": pygame.transform.scale(self._images["agent"], full),
+                "wumpus": pygame.transform.scale(self._images["wumpus"], full),
+                "gold": pygame.transform.scale(self._images["gold"], gold),
+                "pit": pygame.transform.scale(self._images["pit"], full),
+                "block": pygame.transform.scale(self._images["floor"], full),
+                "breeze": pygame.transform.scale(self._images["breeze"], small),
+                "stench": pygame.transform.scale(self._images["stench"], small),
+            }
+        self.agent_img = images["agent"]
+        self.wumpus_img = images["wumpus"]
+        self.gold_img = images["gold"]
+        self.pit_img = images["pit"]
+        self.block_img = images["block"]
+        self.breeze_img = images["breeze"]
+        self.stench_img = images["stench"]
+
+    def _clamp_view(self):
+        self.view_row0 = max(0, min(self.view_row0, self.GRID_SIZE - self.view_rows))
+        self.view_col0 = max(0, min(self.view_col0, self.GRID_SIZE - self.view_cols))
+
+    def _center_view(self, row, col):
+        self.view_row0 = row - self.view_rows // 2
+        self.view_col0 = col - self.view_cols // 2
+        self._clamp_view()
+
+    def _follow(self):
+        """Giữ agent cách mép viewport ít nhất một ô; ra khỏi vùng đó thì căn giữa lại."""
+        if not self.follow_agent:
+            return
+        ax, ay = self.world.agent_pos
+        margin = 1 if min(self.view_rows, self.view_cols) >= 5 else 0
+        if not (self.view_row0 + margin <= ax < self.view_row0 + self.view_rows - margin) or \
+                not (self.view_col0 + margin <= ay < self.view_col0 + self.view_cols - margin):
+            self._center_view(ax, ay)
+
+    def _view_is_partial(self):
+        return self.view_rows < self.GRID_SIZE or self.view_cols < self.GRID_SIZE
+
+    def zoom(self, factor):
+        size = round(self.CELL_SIZE * factor)
+        if size == self.CELL_SIZE:
+            size += 1 if factor > 1 else -1
+        center = (self.view_row0 + self.view_rows // 2, self.view_col0 + self.view_cols // 2)
+        self._set_cell_size(size)
+        self._center_view(*center)
+
+    def pan(self, d_row, d_col):
+        self.follow_agent = False
+        self.view_row0 += d_row
+        self.view_col0 += d_col
+        self._clamp_view()
+
+    def handle_view_event(self, event):
+        """
+        Zoom (+/-, con lăn chuột), cuộn (phím mũi tên, tắt bám theo agent) và F (bám lại agent).
+        Trả về True nếu sự kiện đã được xử lý.
+        """
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom(1.25 if event.y > 0 else 0.8)
+            return True
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            self.zoom(1.25)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.zoom(0.8)
+        elif event.key == pygame.K_UP:
+            self.pan(1, 0)
+        elif event.key == pygame.K_DOWN:
+            self.pan(-1, 0)
+        elif event.key == pygame.K_LEFT:
+            self.pan(0, -1)
+        elif event.key == pygame.K_RIGHT:
+            self.pan(0, 1)
+        elif event.key == pygame.K_f:
+            self.follow_agent = True
+        else:
+            return False
+        return True
+
     def _flip_y(self, row_index):
-        """Chuyển chỉ số hàng thành toạ độ y đảo ngược."""
-        return self.MARGIN + (self.GRID_SIZE - 1 - row_index) * self.CELL_SIZE
+        """Chuyển chỉ số hàng thành toạ độ y đảo ngược (trong viewport)."""
+        return self.MARGIN + (self.view_row0 + self.view_rows - 1 - row_index) * self.CELL_SIZE
     def _create_buttons(self):
         """Define interactive buttons with positions and actions."""
-        base_y = self.GRID_SIZE * self.CELL_SIZE + 2 * self.MARGIN
+        base_y = self.view_rows * self.CELL_SIZE + 2 * self.MARGIN
         configs = [
             ("Step Mode", "step_mode"),
             ("Auto Mode", "auto_mode"),
+            ("Turbo Mode", "turbo_mode"),
             ("Show All", "toggle_all"),
             ("Reset Game", "reset_game"),
             ("New Seed", "new_seed"),
             ("Advance", "advance"),
             (f"Agent: {self.agent_type}", "switch_agent"),
+            ("Profiler", "toggle_profiler"),
         ]
         buttons = []
         for idx, (label, action) in enumerate(configs):
-            x = self.MARGIN + (idx % 4) * 160
-            y = base_y + (idx // 4) * (self.BUTTON_HEIGHT + 5)
+            x = self.MARGIN + (idx % 5) * 160
+            y = base_y + (idx // 5) * (self.BUTTON_HEIGHT + 5)
             rect = pygame.Rect(x, y, 150, self.BUTTON_HEIGHT)
             buttons.append({"rect": rect, "label": label, "action": action})
         return buttons
 
     def draw_grid(self):
-        """Draw the game grid with enhanced cell visualization and icons."""
-        for i in range(self.GRID_SIZE):
-            for j in range(self.GRID_SIZE):
-                x = self.MARGIN + j * self.CELL_SIZE
+        """Draw the game grid with enhanced cell visualization and icons (only cells inside the viewport)."""
+        self._follow()
+        for i in range(self.view_row0, self.view_row0 + self.view_rows):
+            for j in range(self.view_col0, self.view_col0 + self.view_cols):
+                x = self.MARGIN + (j - self.view_col0) * self.CELL_SIZE
                 y = self._flip_y(i)
                 cell_pos = (i, j)
                 cell_data = self.world.world[i][j]
@@ -195,10 +308,12 @@ class GUI:
 
     def draw_ui_panel(self):
         """Draw the right‐hand UI panel showing mode, status, inventory, and knowledge."""
-        px = self.GRID_SIZE * self.CELL_SIZE + 2 * self.MARGIN
+        px = self.view_cols * self.CELL_SIZE + 2 * self.MARGIN
         py = self.MARGIN
         panel_w = self.UI_WIDTH - 20
         panel_h = self.WINDOW_HEIGHT - 2 * self.MARGIN - 100
+        if self._minimap_visible():
+            panel_h -= self.MINIMAP_SIZE + 10
 
         # Panel background and border
         pygame.draw.rect(self.screen, self.BLACK, (px, py, panel_w, panel_h))
@@ -261,6 +376,10 @@ class GUI:
         self.screen.blit(action_text, (px + 90, y))
         y += 30
 
+        if self.show_profiler:
+            self.draw_profiler_overlay(px, y, py + panel_h - 10)
+            return
+
         # Knowledge Base (last few entries)
         kb_title = self.font.render("Knowledge Base:", True, self.WHITE)
         self.screen.blit(kb_title, (px + 10, y))
@@ -272,6 +391,68 @@ class GUI:
                 self.screen.blit(kb_text, (px + 10, y))
                 y += 16
 
+    def draw_profiler_overlay(self, x, y, bottom):
+        """Bảng thời gian trung bình / p95 (µs) của từng pha, pha tốn nhất ở trên."""
+        title = self.font.render("Profiler (us):", True, self.WHITE)
+        self.screen.blit(title, (x + 10, y))
+        y += 25
+        header = self.small_font.render("phase            mean      p95", True, self.LIGHT_GRAY)
+        self.screen.blit(header, (x + 10, y))
+        y += 18
+        for name, mean, p95 in PROFILER.summary_lines():
+            if y > bottom - 16:
+                break
+            label = name if len(name) <= 18 else name[:17] + "~"
+            self.screen.blit(self.small_font.render(label, True, self.WHITE), (x + 10, y))
+            self.screen.blit(self.small_font.render(f"{mean:.0f}", True, self.WHITE), (x + 160, y))
+            self.screen.blit(self.small_font.render(f"{p95:.0f}", True, self.YELLOW), (x + 220, y))
+            y += 16
+
+    def _minimap_visible(self):
+        return np is not None and self._view_is_partial()
+
+    def _minimap_rect(self):
+        px = self.view_cols * self.CELL_SIZE + 2 * self.MARGIN
+        top = self.WINDOW_HEIGHT - self.MARGIN - 100 - self.MINIMAP_SIZE
+        return pygame.Rect(px + (self.UI_WIDTH - 20 - self.MINIMAP_SIZE) // 2, top, self.MINIMAP_SIZE, self.MINIMAP_SIZE)
+
+    def draw_minimap(self):
+        """
+        Toàn bộ kiến thức của agent, mỗi ô một pixel: dựng mảng màu (N, N, 3) rồi blit một lần
+        qua pygame.surfarray thay vì vẽ từng ô. Chỉ dựng lại khi trạng thái đổi.
+        """
+        if not self._minimap_visible():
+            return
+        agent = self.agent
+        key = (self.world, agent, self.world.agent_pos, len(agent.visited_cells), len(agent.safe_cells),
+               len(agent.warning_cells), len(agent.unsafe_cells))
+        rect = self._minimap_rect()
+        if key != self._minimap_key:
+            n = self.GRID_SIZE
+            colors = np.empty((n, n, 3), dtype=np.uint8)
+            colors[:] = self.LIGHT_DARK_BG
+            for cells, color in ((agent.safe_cells, self.LIGHT_GREEN), (agent.visited_cells, self.GREEN),
+                                 (agent.warning_cells, self.YELLOW), (agent.unsafe_cells, self.RED)):
+                if cells:
+                    idx = np.fromiter(chain.from_iterable(cells), dtype=np.intp, count=2 * len(cells)).reshape(-1, 2)
+                    colors[idx[:, 0], idx[:, 1]] = color
+            ax, ay = self.world.agent_pos
+            colors[ax, ay] = self.BLUE
+            # Trục 0 của surfarray là chiều ngang (cột y), trục 1 là chiều dọc (hàng x, đảo ngược)
+            surface = pygame.surfarray.make_surface(colors.transpose(1, 0, 2)[:, ::-1])
+            self._minimap = pygame.transform.scale(surface, rect.size)
+            self._minimap_key = key
+        self.screen.blit(self._minimap, rect.topleft)
+        scale = rect.width / self.GRID_SIZE
+        view = pygame.Rect(
+            rect.x + int(self.view_col0 * scale),
+            rect.y + int((self.GRID_SIZE - self.view_row0 - self.view_rows) * scale),
+            max(2, int(self.view_cols * scale)),
+            max(2, int(self.view_rows * scale)),
+        )
+        pygame.draw.rect(self.screen, self.WHITE, view, 1)
+        pygame.draw.rect(self.screen, self.LIGHT_GRAY, rect, 1)
+
     def draw_buttons(self):
         """Render interactive buttons at the bottom."""
         for btn in self.buttons:
@@ -288,8 +469,12 @@ class GUI:
                 color = self.GREEN
             elif action == "step_mode" and self.mode == GameMode.STEP:
                 color = self.GREEN
+            elif action == "turbo_mode" and self.mode == GameMode.TURBO:
+                color = self.GREEN
             elif action == "advance" and self.ADVANCE_MODE:
                 color = self.GREEN
+            elif action == "toggle_profiler" and self.show_profiler:
+                color = self.GREEN
             pygame.draw.rect(self.screen, color, rect)
             pygame.draw.rect(self.screen, self.WHITE, rect, 2)
             label = self.small_font.render(btn["label"], True, self.WHITE)
@@ -303,14 +488,24 @@ class GUI:
         'auto_mode', 'toggle_all', 'reset_game', or 'new_seed'.
         Otherwise, return None.
         """
+        if self._minimap_visible() and self._minimap_rect().collidepoint(mouse_pos):
+            # Bấm vào minimap: đưa viewport tới vị trí đó
+            rect = self._minimap_rect()
+            col = (mouse_pos[0] - rect.x) * self.GRID_SIZE // rect.width
+            row = self.GRID_SIZE - 1 - (mouse_pos[1] - rect.y) * self.GRID_SIZE // rect.height
+            self.follow_agent = False
+            self._center_view(row, col)
+            return None
         for btn in self.buttons:
             if btn["rect"].collidepoint(mouse_pos):
                 action = btn["action"]
-                if action in ("auto_mode", "step_mode"):
+                if action in ("auto_mode", "step_mode", "turbo_mode"):
                     if action == "auto_mode":
                         self.mode = GameMode.AUTO
                     elif action == "step_mode":
                         self.mode = GameMode.STEP
+                    elif action == "turbo_mode":
+                        self.mode = GameMode.TURBO
                     return None
                 elif action == "toggle_all":
                     self.show_all = not self.show_all
@@ -318,6 +513,11 @@ class GUI:
                 elif action == "advance":
                     self.ADVANCE_MODE = not self.ADVANCE_MODE
                     return None
+                elif action == "toggle_profiler":
+                    self.show_profiler = PROFILER.toggle()
+                    if self.show_profiler:
+                        PROFILER.reset()
+                    return None
                 elif action == "switch_agent":
                     self.agent_type = "Random" if self.agent_type == "Hybrid" else "Hybrid"
                     self.buttons = self._create_buttons()  # Cập nhật lại tên nút
@@ -325,11 +525,17 @@ class GUI:
                 return action
         return None
 
+    def show(self, snapshot):
+        """Vẽ từ ảnh chụp bất biến của luồng mô phỏng thay vì world/agent đang chạy."""
+        self.world = snapshot.world
+        self.agent = snapshot.agent
+
     def render(self):
         """Clear the screen and redraw the entire UI (grid, panel, buttons)."""
         self.screen.fill(self.DARK_BG)
         self.draw_grid()
         self.draw_ui_panel()
+        self.draw_minimap()
         self.draw_buttons()
         pygame.display.flip()
 
@@ -0,0 +1,269 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+ClusterId = Tuple[int, int]
+
+
+class HierarchicalPathfinder:
+    """
+    HPA*: chia lưới thành các cluster vuông, lưu các entrance giữa các cluster
+    và đường đi nội bộ giữa các entrance trong vùng an toàn đã biết.
+    Khi có ô an toàn mới, chỉ các cluster bị ảnh hưởng được tính lại.
+    """
+
+    def __init__(self, logic_inference, cluster_size: int = 10):
+        self.logic_inference = logic_inference
+        self.world_size = logic_inference.world_size
+        self.cluster_size = max(2, cluster_size)
+        self.num_clusters = (self.world_size + self.cluster_size - 1) // self.cluster_size
+
+        # Trạng thái đã cache của vùng an toàn
+        self._passable: Set[Cell] = set()
+        # (cluster_a, cluster_b) -> danh sách cặp ô (a, b) nối hai cluster
+        self._borders: Dict[Tuple[ClusterId, ClusterId], List[Tuple[Cell, Cell]]] = {}
+        # node -> các node ở cluster kề bên (cạnh giá 1)
+        self._cross: Dict[Cell, Set[Cell]] = {}
+        # cluster -> node -> node -> đường đi nội bộ
+        self._intra: Dict[ClusterId, Dict[Cell, Dict[Cell, List[Cell]]]] = {}
+        self.refreshed_clusters = 0
+
+    # ------------------------------------------------------------------ #
+    # Cluster helpers
+    # ------------------------------------------------------------------ #
+
+    def _cluster_of(self, cell: Cell) -> ClusterId:
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def _cluster_bounds(self, cid: ClusterId) -> Tuple[int, int, int, int]:
+        x0 = cid[0] * self.cluster_size
+        y0 = cid[1] * self.cluster_size
+        return (x0, min(x0 + self.cluster_size, self.world_size),
+                y0, min(y0 + self.cluster_size, self.world_size))
+
+    def _cluster_neighbors(self, cid: ClusterId) -> List[ClusterId]:
+        cx, cy = cid
+        result = []
+        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nx, ny = cx + dx, cy + dy
+            if 0 <= nx < self.num_clusters and 0 <= ny < self.num_clusters:
+                result.append((nx, ny))
+        return result
+
+    def _cluster_nodes(self, cid: ClusterId) -> Set[Cell]:
+        nodes: Set[Cell] = set()
+        for other in self._cluster_neighbors(cid):
+            key = (cid, other) if cid < other else (other, cid)
+            for a, b in self._borders.get(key, []):
+                nodes.add(a if self._cluster_of(a) == cid else b)
+        return nodes
+
+    # ------------------------------------------------------------------ #
+    # Incremental refresh
+    # ------------------------------------------------------------------ #
+
+    def _current_passable(self) -> Set[Cell]:
+        return self.logic_inference.safe_cells - self.logic_inference.unsafe_cells
+
+    def refresh(self) -> None:
+        """Đồng bộ cache với LogicInference, chỉ tính lại các cluster có ô thay đổi."""
+        passable = self._current_passable()
+        changed = passable ^ self._passable
+        if not changed:
+            return
+        self._passable = passable
+
+        dirty = {self._cluster_of(cell) for cell in changed}
+        affected = set(dirty)
+        for cid in dirty:
+            affected.update(self._cluster_neighbors(cid))
+
+        for cid in dirty:
+            for other in self._cluster_neighbors(cid):
+                self._rebuild_border(cid, other)
+        for cid in affected:
+            self._rebuild_intra(cid)
+        self.refreshed_clusters += len(affected)
+
+    def _rebuild_border(self, a: ClusterId, b: ClusterId) -> None:
+        key = (a, b) if a < b else (b, a)
+        for u, v in self._borders.pop(key, []):
+            self._cross.get(u, set()).discard(v)
+            self._cross.get(v, set()).discard(u)
+
+        first, second = key
+        x0, x1, y0, y1 = self._cluster_bounds(first)
+        if second[0] != first[0]:
+            # Biên dọc theo trục x: hàng cuối của first và hàng đầu của second
+            pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        entrances: List[Tuple[Cell, Cell]] = []
+        run: List[Tuple[Cell, Cell]] = []
+        for pair in pairs + [None]:
+            if pair is not None and pair[0] in self._passable and pair[1] in self._passable:
+                run.append(pair)
+                continue
+            if run:
+                # Mỗi đoạn liên tục chỉ giữ một entrance ở giữa
+                entrances.append(run[len(run) // 2])
+                run = []
+
+        if entrances:
+            self._borders[key] = entrances
+        for u, v in entrances:
+            self._cross.setdefault(u, set()).add(v)
+            self._cross.setdefault(v, set()).add(u)
+
+    def _local_search(self, source: Cell, cid: ClusterId) -> Dict[Cell, Optional[Cell]]:
+        """BFS giới hạn trong một cluster, trả về cây parent."""
+        x0, x1, y0, y1 = self._cluster_bounds(cid)
+        parents: Dict[Cell, Optional[Cell]] = {source: None}
+        queue = deque([source])
+        while queue:
+            cx, cy = queue.popleft()
+            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                nbr = (cx + dx, cy + dy)
+                if nbr in parents or nbr not in self._passable:
+                    continue
+                if not (x0 <= nbr[0] < x1 and y0 <= nbr[1] < y1):
+                    continue
+                parents[nbr] = (cx, cy)
+                queue.append(nbr)
+        return parents
+
+    @staticmethod
+    def _trace(parents: Dict[Cell, Optional[Cell]], target: Cell) -> List[Cell]:
+        path = [target]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        return path[::-1]
+
+    def _rebuild_intra(self, cid: ClusterId) -> None:
+        nodes = self._cluster_nodes(cid)
+        edges: Dict[Cell, Dict[Cell, List[Cell]]] = {}
+        for node in nodes:
+            parents = self._local_search(node, cid)
+            edges[node] = {
+                other: self._trace(parents, other)
+                for other in nodes
+                if other != node and other in parents
+            }
+        if edges:
+            self._intra[cid] = edges
+        else:
+            self._intra.pop(cid, None)
+
+    # ------------------------------------------------------------------ #
+    # Query
+    # ------------------------------------------------------------------ #
+
+    def _endpoint_edges(self, cell: Cell, reverse: bool = False) -> Dict[Cell, List[Cell]]:
+        """Nối tạm start/goal vào đồ thị trừu tượng qua các entrance cùng cluster."""
+        cid = self._cluster_of(cell)
+        parents = self._local_search(cell, cid)
+        edges = {}
+        for node in self._cluster_nodes(cid):
+            if node in parents:
+                path = self._trace(parents, node)
+                edges[node] = path[::-1] if reverse else path
+        return edges
+
+    def find_path(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """
+        Trả về đường đi từ start đến goal chỉ qua các ô an toàn (giống strict_safe của A*),
+        hoặc None nếu không có.
+        """
+        if start == goal:
+            return [start]
+        self.refresh()
+        if goal not in self._passable:
+            return None
+
+        if start not in self._passable:
+            # start nằm ngoài vùng an toàn: đi tiếp qua các ô kề an toàn
+            best = None
+            x, y = start
+            for nbr in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+                if nbr in self._passable:
+                    path = self.find_path(nbr, goal)
+                    if path and (best is None or len(path) < len(best)):
+                        best = path
+            return [start] + best if best else None
+
+        start_edges = self._endpoint_edges(start)
+        goal_edges = self._endpoint_edges(goal, reverse=True)
+
+        # Nếu start và goal cùng cluster, thử đường nội bộ trực tiếp
+        direct = None
+        if self._cluster_of(start) == self._cluster_of(goal):
+            parents = self._local_search(start, self._cluster_of(start))
+            if goal in parents:
+                direct = self._trace(parents, goal)
+
+        return self._abstract_search(start, goal, start_edges, goal_edges, direct)
+
+    def _abstract_search(
+        self,
+        start: Cell,
+        goal: Cell,
+        start_edges: Dict[Cell, List[Cell]],
+        goal_edges: Dict[Cell, List[Cell]],
+        direct: Optional[List[Cell]],
+    ) -> Optional[List[Cell]]:
+        def heuristic(cell: Cell) -> int:
+            return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+        def neighbors(node: Cell):
+            if node == start:
+                for other, path in start_edges.items():
+                    yield other, path
+                if direct is not None:
+                    yield goal, direct
+                for other in self._cross.get(node, ()):
+                    yield other, [node, other]
+                return
+            for other, path in self._intra.get(self._cluster_of(node), {}).get(node, {}).items():
+                yield other, path
+            for other in self._cross.get(node, ()):
+                yield other, [node, other]
+            if node in goal_edges:
+                yield goal, goal_edges[node]
+
+        open_set = [(heuristic(start), 0, start)]
+        g_score = {start: 0}
+        came_from: Dict[Cell, Tuple[Cell, List[Cell]]] = {}
+        closed: Set[Cell] = set()
+
+        while open_set:
+            _, cost, current = heapq.heappop(open_set)
+            if current == goal:
+                return self._refine(came_from, goal)
+            if current in closed:
+                continue
+            closed.add(current)
+            for nbr, segment in neighbors(current):
+                if nbr in closed:
+                    continue
+                tentative_g = cost + len(segment) - 1
+                if tentative_g < g_score.get(nbr, float("inf")):
+                    g_score[nbr] = tentative_g
+                    came_from[nbr] = (current, segment)
+                    heapq.heappush(open_set, (tentative_g + heuristic(nbr), tentative_g, nbr))
+        return None
+
+    @staticmethod
+    def _refine(came_from: Dict[Cell, Tuple[Cell, List[Cell]]], goal: Cell) -> List[Cell]:
+        """Ghép các đoạn đường đã cache thành đường đi cụ thể trên lưới."""
+        segments = []
+        node = goal
+        while node in came_from:
+            prev, segment = came_from[node]
+            segments.append(segment)
+            node = prev
+        path = [node]
+        for segment in reversed(segments):
+            path.extend(segment[1:])
+        return path
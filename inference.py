@@ -1,4 +1,5 @@
-from typing import Set, Tuple, List
+from typing import Dict, Set, Tuple, List
+from environment import BREEZE, STENCH, SCREAM, percepts_to_bits
 
 class LogicInference:
     def __init__(self, world_size: int = 8):
@@ -13,6 +14,17 @@ class LogicInference:
         self.stench_cells: Set[Tuple[int, int]] = set()
         self.knowledge_base: List[str] = ["Initial state: (0, 0) is Safe and Visited"]
 
+        # Wumpus có thể di chuyển (ADVANCE_MODE): đánh dấu thời điểm của các niềm tin về Wumpus
+        self.current_pos: Tuple[int, int] = (0, 0)
+        self.wumpus_epoch = 0
+        # Tăng mỗi khi kiến thức có thể đã đổi, để Planning biết một quyết định dở dang còn hợp lệ
+        self.revision = 0
+        self._last_observation = None
+        self.wumpus_seen_at: Dict[Tuple[int, int], int] = {}
+        self.stench_seen_at: Dict[Tuple[int, int], int] = {}
+        # Ô đã biết không có pit nhưng không còn chắc chắn an toàn với Wumpus
+        self.pit_free_cells: Set[Tuple[int, int]] = set()
+
         self.inference_rules = [
             self.rule_infer_pit_from_breeze,
             self.rule_infer_wumpus_from_stench,
@@ -23,6 +35,7 @@ class LogicInference:
             self.knowledge_base.append(message)
 
     def update_knowledge(self, pos: Tuple[int, int], percepts: dict, world) -> None:
+        self.current_pos = pos
         self.visited_cells.add(pos)
         if pos not in self.safe_cells:
             self.safe_cells.add(pos)
@@ -31,12 +44,21 @@ class LogicInference:
 
         neighbors = world.get_neighbors(pos)
 
-        has_breeze = percepts.get("breeze", False)
-        has_stench = percepts.get("stench", False)
-        has_scream = percepts.get("scream", False)
+        # percepts có thể là bitmask hoặc dict (adapter cũ)
+        bits = percepts_to_bits(percepts)
+        has_breeze = bool(bits & BREEZE)
+        has_stench = bool(bits & STENCH)
+        has_scream = bool(bits & SCREAM)
+        # Lặp lại đúng quan sát trước (cùng vị trí, percept, epoch, không có scream) không đổi gì
+        observation = (pos, bits, self.wumpus_epoch)
+        if observation != self._last_observation or has_scream:
+            self.revision += 1
+            self._last_observation = observation
         if has_scream:
-            wumpus_pos = self.wumpus_cells.pop() if self.wumpus_cells else None
+            wumpus_pos = min(self.wumpus_cells) if self.wumpus_cells else None
             if wumpus_pos:
+                self.wumpus_cells.discard(wumpus_pos)
+                self.wumpus_seen_at.pop(wumpus_pos, None)
                 self.safe_cells.add(wumpus_pos)
                 self.unsafe_cells.discard(wumpus_pos)
                 self._add_knowledge(f"Wumpus killed at {wumpus_pos}")
@@ -46,6 +68,7 @@ class LogicInference:
                     # Loại bỏ stench nếu có
                     if nbr in self.stench_cells:
                         self.stench_cells.discard(nbr)
+                        self.stench_seen_at.pop(nbr, None)
                         self._add_knowledge(f"Stench at {nbr} removed")
 
         if has_breeze:
@@ -53,15 +76,17 @@ class LogicInference:
                 self.breeze_cells.add(pos)
                 self._add_knowledge(f"Breeze at {pos}")
         if has_stench:
+            if not has_scream:
+                self.stench_seen_at[pos] = self.wumpus_epoch
             if pos not in self.stench_cells and not has_scream:
                 self.stench_cells.add(pos)
-                print(f"Stench at {pos}")
                 self._add_knowledge(f"Stench at {pos}")
 
         if not has_breeze and pos in self.breeze_cells:
             self.breeze_cells.discard(pos)
         if not has_stench and pos in self.stench_cells:
             self.stench_cells.discard(pos)
+            self.stench_seen_at.pop(pos, None)
         if not has_breeze and not has_stench:
             for nbr in neighbors:
                 if nbr not in self.safe_cells:
@@ -87,7 +112,7 @@ class LogicInference:
             for rule in self.inference_rules:
                 result = rule(world)
 
-                for pit in result.get("pit", set()):
+                for pit in sorted(result.get("pit", ())):
                     if pit not in self.pit_cells:
                         self.pit_cells.add(pit)
                         self.unsafe_cells.add(pit)
@@ -95,15 +120,16 @@ class LogicInference:
                         self._add_knowledge(f"Pit at {pit}")
                         change = True
 
-                for wumpus in result.get("wumpus", set()):
+                for wumpus in sorted(result.get("wumpus", ())):
                     if wumpus not in self.wumpus_cells:
                         self.wumpus_cells.add(wumpus)
+                        self.wumpus_seen_at[wumpus] = self.wumpus_epoch
                         self.unsafe_cells.add(wumpus)
                         self.warning_cells.discard(wumpus)
                         self._add_knowledge(f"Wumpus at {wumpus}")
                         change = True
 
-                for safe in result.get("safe", set()):
+                for safe in sorted(result.get("safe", ())):
                     if safe not in self.safe_cells:
                         self.safe_cells.add(safe)
                         self.warning_cells.discard(safe)
@@ -113,6 +139,45 @@ class LogicInference:
             if not change:
                 break
 
+    def on_wumpus_moved(self, moves: int = 1) -> None:
+        """
+        Wumpus vừa di chuyển: chỉ vô hiệu hoá niềm tin trong bán kính mà mỗi Wumpus đã biết
+        có thể đi tới kể từ lần quan sát cuối. Kiến thức về pit (tĩnh) được giữ nguyên.
+        """
+        self.wumpus_epoch += moves
+        self.revision += 1
+        for wumpus in sorted(self.wumpus_cells):
+            radius = self.wumpus_epoch - self.wumpus_seen_at.pop(wumpus, 0)
+            if radius > 0:
+                self._invalidate_wumpus_region(wumpus, radius)
+
+        # Stench chỉ đúng tại thời điểm quan sát: bỏ các stench cũ hơn lần di chuyển này
+        for cell in list(self.stench_cells):
+            if self.stench_seen_at.get(cell, 0) < self.wumpus_epoch:
+                self.stench_cells.discard(cell)
+                self.stench_seen_at.pop(cell, None)
+
+    def _invalidate_wumpus_region(self, wumpus: Tuple[int, int], radius: int) -> None:
+        self.wumpus_cells.discard(wumpus)
+        if wumpus not in self.pit_cells:
+            self.unsafe_cells.discard(wumpus)
+        self.pit_free_cells.add(wumpus)
+        self.warning_cells.add(wumpus)
+
+        # Chỉ các ô an toàn mà Wumpus có thể tới (trong bán kính) mới còn lại "không có pit";
+        # ô ngoài bán kính vẫn an toàn. Ô đã đi qua không thành mục tiêu khám phá (warning) lại.
+        wx, wy = wumpus
+        for x in range(max(0, wx - radius), min(self.world_size, wx + radius + 1)):
+            span = radius - abs(x - wx)
+            for y in range(max(0, wy - span), min(self.world_size, wy + span + 1)):
+                cell = (x, y)
+                if cell in self.safe_cells and cell != self.current_pos:
+                    self.safe_cells.discard(cell)
+                    self.pit_free_cells.add(cell)
+                    if cell not in self.visited_cells:
+                        self.warning_cells.add(cell)
+        self._add_knowledge(f"Wumpus at {wumpus} may have moved")
+
     # RULE
 
     def rule_infer_pit_from_breeze(self, world):
@@ -120,7 +185,7 @@ class LogicInference:
         inferred = set()
         for breeze_pos in self.breeze_cells:
             neighbors = world.get_neighbors(breeze_pos)
-            possible = [n for n in neighbors if n not in self.safe_cells]
+            possible = [n for n in neighbors if n not in self.safe_cells and n not in self.pit_free_cells]
             # Nếu chỉ còn một ô khả nghi duy nhất, nó phải là hố
             if len(possible) == 1:
                 inferred.add(possible[0])
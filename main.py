@@ -1,14 +1,22 @@
 import pygame
 import time
 import os
-from environment import WumpusWorld
 from agent import HybridAgent, RandomAgent
 from gui import GUI, GameMode
 from enum import Enum
-from movingwumpus import MovingWumpusModule
+from simthread import SimulationThread
+from worldcache import WorldCache
 
 
 os.environ['SDL_VIDEO_CENTERED'] = '1'
+# Bố cục thế giới đã sinh, để Reset Game không phải sinh lại bản đồ
+WORLD_CACHE_SIZE = 32
+# Thời gian tối đa cho mỗi lần HybridAgent lập kế hoạch (giây), giữ độ trễ mỗi bước cố định trên bản đồ lớn.
+# Mặc định None (không giới hạn, quyết định không phụ thuộc thời gian thực); đặt ví dụ 0.05 để bật.
+PLANNING_TIME_BUDGET = None
+world_cache = WorldCache(WORLD_CACHE_SIZE)
+# Luồng mô phỏng gửi sự kiện này mỗi khi công bố ảnh chụp mới
+SIM_UPDATED = pygame.USEREVENT + 1
 def main():
     pygame.init()
     screen = pygame.display.set_mode((480, 360))
@@ -21,124 +29,113 @@ def main():
 
     world, agent, ui = _initialize_game(seed)
 
-    auto_move_timer = 0
-    auto_move_delay = 100  # milliseconds
-    agent_action_count = 0
-    moving_module = MovingWumpusModule(world)
+    sim = SimulationThread(
+        world, agent, auto_delay=0.1,  # 100 ms giữa hai bước ở chế độ Auto
+        on_publish=lambda: pygame.event.post(pygame.event.Event(SIM_UPDATED)),
+    )
+    sim.start()
+    # Di chuột không làm thay đổi gì trên màn hình, khỏi đánh thức vòng lặp
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
     print(f"Seed: {seed}")
-    print("Controls: Click buttons or use keyboard - SPACE (step)")
+    print("Controls: Click buttons or use keyboard - SPACE (step), +/- or wheel (zoom), arrows (scroll), F (follow agent)")
     
     running = True
     game_over = False
+    dirty = True
 
     while running:
-        dt = ui.clock.tick(60)
+        # Ngủ cho tới khi có input hoặc luồng mô phỏng vừa có ảnh chụp mới
+        events = [pygame.event.wait()] + pygame.event.get()
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type in (SIM_UPDATED, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty = True
+
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                dirty = True
                 action = ui.handle_button_click(event.pos)
                 if action == "reset_game":
                     world, agent, ui = _reset_game(world.seed, ui)
-                    agent_action_count = 0
-                    moving_module = MovingWumpusModule(world)
+                    sim.reset(world, agent)
                     game_over = False
                     print("Game reset!")
                 elif action == "new_seed":
                     new_seed = int(time.time()) % 1000
                     world_size = int(time.time()) % 10 + 4
                     world, agent, ui = _reset_game(new_seed, ui)
-                    agent_action_count = 0
-                    moving_module = MovingWumpusModule(world)
+                    sim.reset(world, agent)
                     game_over = False
                     print(f"New game with seed: {new_seed}")
                 elif action == "switch_agent":
                     if ui.agent_type == "Hybrid":
-                        agent = HybridAgent(world.grid_size)
+                        agent = HybridAgent(world.grid_size, time_budget=PLANNING_TIME_BUDGET)
                     else:
                         agent = RandomAgent()
                     ui._update(world, agent)
+                    sim.switch_agent(agent)
                     print(f"Switched to {ui.agent_type} agent.")
+                # Chế độ chạy và Advance được chuyển thành thông điệp cho luồng mô phỏng
+                sim.set_mode(ui.mode)
+                sim.set_advance(ui.ADVANCE_MODE)
 
+            elif event.type in (pygame.KEYDOWN, pygame.MOUSEWHEEL) and ui.handle_view_event(event):
+                # Zoom / cuộn viewport
+                dirty = True
 
             elif game_over:
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     choice = ui.handle_game_over_click(event.pos)
                     if choice == "reset_game":
                         world, agent, ui = _reset_game(world.seed, ui)
+                        sim.reset(world, agent)
                         game_over = False
-                        agent_action_count = 0
-                        moving_module = MovingWumpusModule(world)
                         print("Game reset!")
                     elif choice == "new_seed":
                         new_seed = int(time.time()) % 1000
                         world, agent, ui = _reset_game(new_seed, ui)
+                        sim.reset(world, agent)
                         game_over = False
-                        agent_action_count = 0
-                        moving_module = MovingWumpusModule(world)
                         print(f"New game with seed: {new_seed}")
             elif event.type == pygame.KEYDOWN:
                 if ui.mode == GameMode.STEP and event.key == pygame.K_SPACE:
-                    if world.is_game_over(agent) == "continue":
-                        agent.update_knowledge(world.agent_pos, world.percepts, world)
-                        action = agent.plan_next_action(world.agent_pos, world.agent_dir, world)
-                        _execute_action(world, action)
-                        agent_action_count += 1
-                        print(f"Executed action: {action}")
-                    if agent_action_count % 5 == 0 and ui.ADVANCE_MODE:
-                        moving_module.update(world, ui, agent)
-        if ui.mode == GameMode.AUTO and world.is_game_over(agent) == "continue":
-            auto_move_timer += dt
-            if auto_move_timer >= auto_move_delay:
-                agent.update_knowledge(world.agent_pos, world.percepts, world)
-                action = agent.plan_next_action(world.agent_pos, world.agent_dir, world)
-                _execute_action(world, action)
-                agent_action_count += 1
-                auto_move_timer = 0
-            if agent_action_count % 5 == 0 and ui.ADVANCE_MODE:
-                moving_module.update(world, ui, agent)
-        state = world.is_game_over(agent)
-        if state != "continue" and not game_over:
+                    sim.request_step()
+
+        if not dirty or not running:
+            continue
+        # Chỉ vẽ ảnh chụp mới nhất; agent chậm không làm đứng vòng lặp sự kiện
+        snapshot = sim.latest()
+        if snapshot.world.status != "continue" and not game_over:
             game_over = True
 
+        ui.show(snapshot)
         ui.render()
+        dirty = False
+        # Giới hạn 60 khung hình/giây khi Auto/Turbo liên tục công bố ảnh chụp
+        ui.clock.tick(60)
 
+    sim.stop()
     pygame.quit()
 
 
 def _initialize_game(seed):
-    world = WumpusWorld(world_size, k, pit_prob, seed=seed)
-    agent = HybridAgent(world.grid_size)
+    world = world_cache.world(world_size, k, pit_prob, seed)
+    agent = HybridAgent(world.grid_size, time_budget=PLANNING_TIME_BUDGET)
     ui = GUI(world, agent)
     return world, agent, ui
 
 
 def _reset_game(seed, ui):
-    world = WumpusWorld(world_size, k, pit_prob, seed=seed)
+    world = world_cache.world(world_size, k, pit_prob, seed)
     if ui.agent_type == "Hybrid":
-        agent = HybridAgent(world.grid_size)
+        agent = HybridAgent(world.grid_size, time_budget=PLANNING_TIME_BUDGET)
     else:
         agent = RandomAgent()
     ui._update(world, agent)
     return world, agent, ui
 
-def _execute_action(world, action):
-    if action == "move_forward":
-        world.move_forward()
-    elif action == "turn_left":
-        world.turn_left()
-    elif action == "turn_right":
-        world.turn_right()
-    elif action == "grab":
-        world.grab_gold()
-    elif action == "shoot":
-        world.shoot_arrow()
-    elif action == "climb":
-        world.climb_out()
-    # else: wait or unknown actions => do nothing
-
 
 def get_user_config(screen):
     font = pygame.font.SysFont(None, 28)
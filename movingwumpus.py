@@ -1,6 +1,15 @@
 from typing import Tuple, List, Dict
 from random import randint, choice, random
-from environment import WumpusWorld
+from environment import WumpusWorld, STENCH
+
+try:
+    import numpy as np
+except ImportError:  # numpy chỉ cần cho chế độ batch
+    np = None
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
 class MovingWumpusModule:
     def __init__(self, world: WumpusWorld):
         self.world = world
@@ -9,37 +18,176 @@ class MovingWumpusModule:
         """
         Move all Wumpus in the world to a random adjacent cell.
         Each Wumpus can move to any valid adjacent cell that is not occupied by another Wumpus or a pit.
+        Uses the world's wumpus index, so the cost is O(K) instead of a full grid scan.
         """
         moved_wumpus = []
 
-        wumpus_positions = [(i, j) for i in range(self.world.grid_size)
-                        for j in range(self.world.grid_size)
-                        if self.world.world[i][j]["wumpus"]]
+        # sorted() giữ đúng thứ tự quét hàng-cột như trước
+        wumpus_positions = sorted(self.world.wumpus_positions)
 
         for wx, wy in wumpus_positions:
-            new_positions = [(wx + dx, wy + dy) for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]]
+            new_positions = [(wx + dx, wy + dy) for dx, dy in DIRECTIONS]
             new_positions = [(nx, ny) for nx, ny in new_positions
                          if 0 <= nx < self.world.grid_size and 0 <= ny < self.world.grid_size
                          and not self.world.world[nx][ny]["pit"]
-                         and not self.world.world[nx][ny]["wumpus"]]
+                         and (nx, ny) not in self.world.wumpus_positions]
 
             if new_positions:
                 new_x, new_y = choice(new_positions)
-                self.world.world[wx][wy]["wumpus"] = False
-                self.world.world[new_x][new_y]["wumpus"] = True
+                self.world.move_wumpus((wx, wy), (new_x, new_y))
                 moved_wumpus.append(((wx, wy), (new_x, new_y)))
             else:
                 moved_wumpus.append(((wx, wy), (wx, wy)))  
 
         return moved_wumpus
 
+    @staticmethod
+    def _refresh_stench(world, moved) -> None:
+        """Chỉ cập nhật stench của agent nếu nó nằm cạnh vị trí cũ hoặc mới của một Wumpus."""
+        ax, ay = world.agent_pos
+        for old, new in moved:
+            if old == new:
+                continue
+            if abs(ax - old[0]) + abs(ay - old[1]) <= 1 or abs(ax - new[0]) + abs(ay - new[1]) <= 1:
+                if world.stench_counts.get(world.agent_pos, 0) > 0:
+                    world.percept_bits |= STENCH
+                else:
+                    world.percept_bits &= ~STENCH
+                return
 
-    def update(self, world, ui, agent):
+    def advance(self) -> bool:
+        """
+        Một lượt di chuyển của Wumpus: di chuyển tất cả, cập nhật stench của agent và trả về
+        True nếu một Wumpus vừa đi vào ô của agent (ván thua).
+        """
         moved = self.move_all_wumpus()
-        world.percepts = world._update_percepts()
+        self._refresh_stench(self.world, moved)
+        return self.world._check_hazard()
+
+    def update(self, world, ui, agent):
+        self.advance()
+
+        if hasattr(agent, "notify_wumpus_moved"):
+            agent.notify_wumpus_moved()
+            agent.update_knowledge(world.agent_pos, world.percept_bits, world)
+
+
+class BatchMovingWumpus:
+    """
+    Di chuyển Wumpus trong N thế giới cùng lúc bằng numpy.
+    Vị trí và bản đồ pit được giữ trong mảng; mỗi Wumpus chọn ngẫu nhiên đều
+    trong các ô kề hợp lệ, giống MovingWumpusModule.
+    Mảng vị trí tự đồng bộ lại với world.wumpus_positions trước mỗi lượt, nên
+    Wumpus bị bắn chết không "sống lại".
+    """
+
+    def __init__(self, worlds: List[WumpusWorld], seed=None):
+        if np is None:
+            raise ImportError("BatchMovingWumpus requires numpy")
+        self.worlds = list(worlds)
+        self.rng = np.random.default_rng(seed)
+        n = len(self.worlds)
+        size = max(w.grid_size for w in self.worlds)
+        max_k = max(max(w.K, len(w.wumpus_positions)) for w in self.worlds)
 
-        ui._update(world, agent)   
-        ui.render()               
+        self.sizes = np.zeros(n, dtype=np.int64)
+        self.pits = np.zeros((n, size, size), dtype=bool)
+        self.occupied = np.zeros((n, size, size), dtype=bool)
+        self.positions = np.full((n, max_k, 2), -1, dtype=np.int64)
+        for b, w in enumerate(self.worlds):
+            self.replace(b, w)
+        self._dirs = np.array(DIRECTIONS)
 
-        if hasattr(agent, "_update_knowledge"):
-            agent.update_knowledge(world.agent_pos, world.percepts, world)
\ No newline at end of file
+    def replace(self, b: int, world: WumpusWorld) -> None:
+        """Gắn thế giới mới vào vị trí b (ví dụ sau khi reset một episode)."""
+        if world.grid_size > self.pits.shape[1] or len(world.wumpus_positions) > self.positions.shape[1]:
+            raise ValueError("world does not fit the batch arrays")
+        self.worlds[b] = world
+        self.sizes[b] = world.grid_size
+        # Pit là tĩnh nên chỉ dựng một lần cho mỗi thế giới
+        self.pits[b] = False
+        for i in range(world.grid_size):
+            for j in range(world.grid_size):
+                self.pits[b, i, j] = world.world[i][j]["pit"]
+        self._sync_row(b)
+
+    def _sync_row(self, b: int) -> None:
+        world = self.worlds[b]
+        self.positions[b] = -1
+        self.occupied[b] = False
+        for k, (wx, wy) in enumerate(sorted(world.wumpus_positions)):
+            self.positions[b, k] = (wx, wy)
+            self.occupied[b, wx, wy] = True
+
+    def sync(self) -> None:
+        """Đọc lại vị trí Wumpus từ mọi thế giới."""
+        for b in range(len(self.worlds)):
+            self._sync_row(b)
+
+    def _resync_stale(self, rows) -> None:
+        # Wumpus có thể đã bị bắn (hoặc bị di chuyển ngoài lô) kể từ lượt trước
+        for b in rows:
+            world = self.worlds[b]
+            alive = self.positions[b, :, 0] >= 0
+            if int(alive.sum()) != len(world.wumpus_positions) or any(
+                    (int(x), int(y)) not in world.wumpus_positions for x, y in self.positions[b, alive]):
+                self._sync_row(b)
+
+    def move_all_wumpus(self, apply: bool = True, mask=None):
+        """
+        Di chuyển mọi Wumpus trong các thế giới được chọn (mask=None là tất cả).
+        Trả về mảng (N, K, 2) vị trí mới. Nếu apply=True, vị trí mới được ghi lại vào
+        từng WumpusWorld và stench của agent được cập nhật.
+        """
+        n, max_k, _ = self.positions.shape
+        rows = np.arange(n)
+        active = np.ones(n, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self._resync_stale(rows[active])
+        old_positions = self.positions.copy()
+
+        # Các Wumpus trong cùng một thế giới đi lần lượt để tránh trùng ô,
+        # nhưng mỗi bước được vector hoá trên N thế giới
+        for k in range(max_k):
+            pos = self.positions[:, k]
+            alive = (pos[:, 0] >= 0) & active
+            cand = pos[:, None, :] + self._dirs[None, :, :]
+            inside = ((cand >= 0) & (cand < self.sizes[:, None, None])).all(axis=2)
+            cx = np.clip(cand[..., 0], 0, self.pits.shape[1] - 1)
+            cy = np.clip(cand[..., 1], 0, self.pits.shape[2] - 1)
+            valid = (inside & alive[:, None]
+                     & ~self.pits[rows[:, None], cx, cy]
+                     & ~self.occupied[rows[:, None], cx, cy])
+
+            priority = np.where(valid, self.rng.random((n, 4)), -1.0)
+            pick = priority.argmax(axis=1)
+            moves = valid.any(axis=1)
+            target = cand[rows, pick]
+
+            moving_rows = rows[moves]
+            self.occupied[moving_rows, pos[moves, 0], pos[moves, 1]] = False
+            self.occupied[moving_rows, target[moves, 0], target[moves, 1]] = True
+            self.positions[moves, k] = target[moves]
+
+        if apply:
+            moved: Dict[int, list] = {}
+            # argwhere đi theo (b, k) nên thứ tự áp dụng khớp thứ tự di chuyển ở trên
+            for b, k in np.argwhere((old_positions != self.positions).any(axis=2)):
+                old, new = tuple(map(int, old_positions[b, k])), tuple(map(int, self.positions[b, k]))
+                self.worlds[b].move_wumpus(old, new)
+                moved.setdefault(int(b), []).append((old, new))
+            for b, pairs in moved.items():
+                MovingWumpusModule._refresh_stench(self.worlds[b], pairs)
+        return self.positions
+
+    def advance(self, mask=None):
+        """
+        Một lượt di chuyển cho các thế giới được chọn, giống MovingWumpusModule.advance.
+        Trả về mảng bool (N,): True nếu một Wumpus vừa đi vào ô của agent.
+        """
+        n = len(self.worlds)
+        active = np.ones(n, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self.move_all_wumpus(apply=True, mask=active)
+        hazard = np.zeros(n, dtype=bool)
+        for b in np.flatnonzero(active):
+            hazard[b] = self.worlds[b]._check_hazard()
+        return hazard
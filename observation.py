@@ -0,0 +1,155 @@
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy chỉ cần cho API observation
+    np = None
+
+# Thứ tự kênh của mảng observation (C, N, N)
+CHANNELS = ("visited", "safe", "warning", "pit", "wumpus", "breeze", "stench", "agent", "heading")
+CHANNEL_INDEX = {name: idx for idx, name in enumerate(CHANNELS)}
+# Các tập của LogicInference được phản chiếu sang kênh cùng tên
+TRACKED_SETS = {
+    "visited_cells": "visited",
+    "safe_cells": "safe",
+    "warning_cells": "warning",
+    "pit_cells": "pit",
+    "wumpus_cells": "wumpus",
+    "breeze_cells": "breeze",
+    "stench_cells": "stench",
+}
+# Giá trị kênh heading tại ô của agent (0 = không có agent)
+HEADING_CODES = {"up": 1, "right": 2, "down": 3, "left": 4}
+
+
+class _TrackedSet(set):
+    """set ghi lại mọi thay đổi vào một kênh của mảng observation."""
+
+    def __init__(self, items, plane):
+        super().__init__()
+        self._plane = plane
+        self.update(items)
+
+    def add(self, cell):
+        super().add(cell)
+        self._plane[cell] = 1
+
+    def discard(self, cell):
+        super().discard(cell)
+        self._plane[cell] = 0
+
+    def remove(self, cell):
+        super().remove(cell)
+        self._plane[cell] = 0
+
+    def pop(self):
+        cell = super().pop()
+        self._plane[cell] = 0
+        return cell
+
+    def clear(self):
+        super().clear()
+        self._plane.fill(0)
+
+    def update(self, *others):
+        for other in others:
+            for cell in other:
+                self.add(cell)
+
+    def difference_update(self, *others):
+        for other in others:
+            for cell in list(other):
+                self.discard(cell)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+
+class ObservationBuffer:
+    """
+    Observation nhiều kênh kiểu uint8 (C, N, N) cho learner bên ngoài.
+    Mảng được cập nhật tại chỗ bởi update_knowledge và các hành động của thế giới,
+    không dựng lại mỗi bước; get() trả về một view chỉ đọc, không sao chép.
+    """
+
+    def __init__(self, world_size: int, out=None):
+        if np is None:
+            raise ImportError("ObservationBuffer requires numpy")
+        shape = (len(CHANNELS), world_size, world_size)
+        if out is None:
+            out = np.zeros(shape, dtype=np.uint8)
+        elif out.shape != shape or out.dtype != np.uint8:
+            raise ValueError(f"out must be a uint8 array of shape {shape}")
+        self.world_size = world_size
+        self.array = out
+        self._view = out.view()
+        self._view.flags.writeable = False
+        self._agent_pos: Optional[Tuple[int, int]] = None
+
+    def plane(self, name: str):
+        return self.array[CHANNEL_INDEX[name]]
+
+    def get(self):
+        return self._view
+
+    def reset(self) -> None:
+        self.array.fill(0)
+        self._agent_pos = None
+
+    def bind(self, logic_inference, world=None) -> "ObservationBuffer":
+        """
+        Gắn buffer vào LogicInference (và WumpusWorld nếu có). Các tập kiến thức được
+        thay bằng bản có theo dõi, nên mọi thay đổi sau đó ghi thẳng vào mảng.
+        """
+        self.reset()
+        for attr, channel in TRACKED_SETS.items():
+            current = getattr(logic_inference, attr)
+            setattr(logic_inference, attr, _TrackedSet(current, self.plane(channel)))
+        if world is not None:
+            world.observation = self
+            self.set_agent(world.agent_pos, world.agent_dir)
+        return self
+
+    def set_agent(self, pos: Tuple[int, int], direction: str) -> None:
+        agent = self.plane("agent")
+        heading = self.plane("heading")
+        if self._agent_pos is not None:
+            agent[self._agent_pos] = 0
+            heading[self._agent_pos] = 0
+        agent[pos] = 1
+        heading[pos] = HEADING_CODES[direction]
+        self._agent_pos = pos
+
+
+class BatchObservation:
+    """
+    Observation cho nhiều thế giới cùng kích thước trong một mảng (B, C, N, N).
+    Mỗi ObservationBuffer con là một view vào mảng chung.
+    """
+
+    def __init__(self, batch_size: int, world_size: int):
+        if np is None:
+            raise ImportError("BatchObservation requires numpy")
+        self.array = np.zeros((batch_size, len(CHANNELS), world_size, world_size), dtype=np.uint8)
+        self.buffers: List[ObservationBuffer] = [
+            ObservationBuffer(world_size, out=self.array[i]) for i in range(batch_size)
+        ]
+        self._view = self.array.view()
+        self._view.flags.writeable = False
+
+    def __getitem__(self, index: int) -> ObservationBuffer:
+        return self.buffers[index]
+
+    def __len__(self) -> int:
+        return len(self.buffers)
+
+    def bind(self, index: int, logic_inference, world=None) -> ObservationBuffer:
+        return self.buffers[index].bind(logic_inference, world)
+
+    def get(self):
+        return self._view
@@ -0,0 +1,226 @@
+"""
+Oracle biết toàn bộ bản đồ: điểm tốt nhất có thể đạt được cho một seed.
+
+Dijkstra trên trạng thái (x, y, hướng, đã có vàng, Wumpus đã bị bắn) với chi phí theo đúng
+luật tính điểm của WumpusWorld: đi/quay -1, bắn -10; lấy vàng +10 và leo ra có vàng +1000.
+Kết quả được lưu trong SQLite theo (grid, K, p, seed, RULES_VERSION) nên không bao giờ tính lại.
+
+    python oracle.py --size 8 --k 2 --p 0.2 --seeds 0-199 --agent hybrid
+"""
+import argparse
+import heapq
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from environment import WumpusWorld, Action, ACTION_CODES, ACTION_NAMES, RULES_VERSION
+
+# Thứ tự theo chiều kim đồng hồ: quay phải = +1, quay trái = -1
+HEADINGS = ("up", "right", "down", "left")
+STEPS = {"up": (1, 0), "right": (0, 1), "down": (-1, 0), "left": (0, -1)}
+MOVE_COST = 1
+TURN_COST = 1
+SHOOT_COST = 10
+GOLD_REWARD = 10
+WIN_REWARD = 1000
+# Arrow chưa dùng
+ARROW_READY = -1
+
+State = Tuple[int, int, int, int, int]  # x, y, hướng, có vàng, chỉ số Wumpus đã bắn (-1 nếu chưa)
+
+
+def solve(world: WumpusWorld) -> Dict:
+    """
+    Kế hoạch tối ưu từ trạng thái hiện tại của world (Wumpus đứng yên).
+    Trả về {"score", "reachable", "steps", "plan"}; score là điểm cuối cùng nếu làm theo plan.
+    Khi không thể lấy vàng và quay về an toàn, reachable=False và oracle đứng yên (giữ điểm hiện tại).
+    """
+    n = world.grid_size
+    grid = world.world
+    wumpus = sorted(world.wumpus_positions)
+    wumpus_index = {pos: i for i, pos in enumerate(wumpus)}
+
+    def passable(x, y, killed):
+        if not (0 <= x < n and 0 <= y < n) or grid[x][y]["pit"]:
+            return False
+        idx = wumpus_index.get((x, y))
+        return idx is None or idx == killed
+
+    def first_hit(x, y, heading):
+        target = world._first_wumpus_in_line((x, y), HEADINGS[heading])
+        return wumpus_index[target] if target is not None else None
+
+    start: State = (
+        world.agent_pos[0],
+        world.agent_pos[1],
+        HEADINGS.index(world.agent_dir),
+        int(world.has_gold),
+        ARROW_READY if world.has_arrow else len(wumpus),
+    )
+    best = {start: 0}
+    parent: Dict[State, Tuple[State, Action]] = {}
+    counter = 0
+    heap = [(0, counter, start)]
+    goal: Optional[State] = None
+
+    while heap:
+        cost, _, state = heapq.heappop(heap)
+        if cost > best.get(state, cost):
+            continue
+        x, y, heading, gold, killed = state
+        if gold and (x, y) == (0, 0):
+            goal = state
+            break
+
+        successors = [
+            ((x, y, (heading - 1) % 4, gold, killed), TURN_COST, Action.TURN_LEFT),
+            ((x, y, (heading + 1) % 4, gold, killed), TURN_COST, Action.TURN_RIGHT),
+        ]
+        dx, dy = STEPS[HEADINGS[heading]]
+        if passable(x + dx, y + dy, killed):
+            successors.append(((x + dx, y + dy, heading, gold, killed), MOVE_COST, Action.MOVE_FORWARD))
+        if not gold and grid[x][y]["gold"]:
+            successors.append(((x, y, heading, 1, killed), 0, Action.GRAB))
+        if killed == ARROW_READY:
+            # Chỉ bắn khi trúng: bắn trượt chỉ tốn điểm
+            hit = first_hit(x, y, heading)
+            if hit is not None:
+                successors.append(((x, y, heading, gold, hit), SHOOT_COST, Action.SHOOT))
+
+        for nxt, step_cost, action in successors:
+            new_cost = cost + step_cost
+            if new_cost < best.get(nxt, new_cost + 1):
+                best[nxt] = new_cost
+                parent[nxt] = (state, action)
+                counter += 1
+                heapq.heappush(heap, (new_cost, counter, nxt))
+
+    if goal is None:
+        return {"score": world.score, "reachable": False, "steps": 0, "plan": []}
+
+    plan: List[Action] = [Action.CLIMB]
+    state = goal
+    while state != start:
+        state, action = parent[state]
+        plan.append(action)
+    plan.reverse()
+    gained = WIN_REWARD + (0 if world.has_gold else GOLD_REWARD) - best[goal]
+    return {"score": world.score + gained, "reachable": True, "steps": len(plan), "plan": plan}
+
+
+def efficiency(agent_score: float, oracle_score: float) -> Optional[float]:
+    """Điểm agent / điểm oracle; None khi oracle không thắng được (điểm tốt nhất <= 0)."""
+    if oracle_score <= 0:
+        return None
+    return agent_score / oracle_score
+
+
+class OracleCache:
+    """Kết quả oracle lưu trong SQLite, khoá (grid, K, p, seed, RULES_VERSION)."""
+
+    def __init__(self, path: str = "oracle_cache.sqlite"):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS oracle ("
+            " grid INTEGER, k INTEGER, p REAL, seed INTEGER, rules_version INTEGER,"
+            " score INTEGER, reachable INTEGER, steps INTEGER, plan TEXT,"
+            " PRIMARY KEY (grid, k, p, seed, rules_version))"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, grid: int, k: int, p: float, seed: int) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT score, reachable, steps, plan FROM oracle"
+            " WHERE grid=? AND k=? AND p=? AND seed=? AND rules_version=?",
+            (grid, k, p, seed, RULES_VERSION),
+        ).fetchone()
+        if row is None:
+            return None
+        score, reachable, steps, plan = row
+        # Plan được lưu dạng tên; trả về mã Action như khi vừa tính
+        actions = [ACTION_CODES[name] for name in plan.split()] if plan else []
+        return {"score": score, "reachable": bool(reachable), "steps": steps, "plan": actions}
+
+    def put(self, grid: int, k: int, p: float, seed: int, result: Dict) -> None:
+        with self.conn:
+            self._insert(grid, k, p, seed, result)
+
+    def _insert(self, grid, k, p, seed, result) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO oracle VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                grid, k, p, seed, RULES_VERSION,
+                result["score"], int(result["reachable"]), result["steps"],
+                " ".join(ACTION_NAMES[a] if isinstance(a, int) else a for a in result["plan"]),
+            ),
+        )
+
+    def solve(self, grid: int, k: int, p: float, seed: int) -> Dict:
+        """Kết quả oracle cho một seed; chỉ chạy Dijkstra khi chưa có trong cache."""
+        cached = self.get(grid, k, p, seed)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        result = solve(WumpusWorld(grid, k, p, seed=seed))
+        self.put(grid, k, p, seed, result)
+        return result
+
+    def solve_many(self, grid: int, k: int, p: float, seeds: Iterable[int]) -> Dict[int, Dict]:
+        """Như solve() cho nhiều seed, ghi các kết quả mới trong một transaction."""
+        results = {}
+        fresh = []
+        for seed in seeds:
+            cached = self.get(grid, k, p, seed)
+            if cached is not None:
+                self.hits += 1
+                results[seed] = cached
+            else:
+                self.misses += 1
+                results[seed] = solve(WumpusWorld(grid, k, p, seed=seed))
+                fresh.append(seed)
+        with self.conn:
+            for seed in fresh:
+                self._insert(grid, k, p, seed, results[seed])
+        return results
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main(argv=None) -> int:
+    from runner import parse_seeds, run_episode
+
+    parser = argparse.ArgumentParser(description="Compare an agent against the full-knowledge oracle")
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--p", type=float, default=0.2)
+    parser.add_argument("--seeds", default="0-99", help="range 'a-b' or list 'a,b,c'")
+    parser.add_argument("--agent", default="hybrid")
+    parser.add_argument("--cache", default="oracle_cache.sqlite")
+    args = parser.parse_args(argv)
+
+    seeds = parse_seeds(args.seeds)
+    cache = OracleCache(args.cache)
+    oracle = cache.solve_many(args.size, args.k, args.p, seeds)
+
+    ratios = []
+    for seed in seeds:
+        record = run_episode(args.size, args.k, args.p, seed, agent=args.agent)
+        ratio = efficiency(record["score"], oracle[seed]["score"])
+        if ratio is not None:
+            ratios.append(ratio)
+
+    solvable = sum(1 for seed in seeds if oracle[seed]["reachable"])
+    print(f"seeds: {len(seeds)}  solvable: {solvable}  cache hits: {cache.hits}  misses: {cache.misses}")
+    if ratios:
+        print(f"mean efficiency ({args.agent} / oracle): {sum(ratios) / len(ratios):.3f}")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,122 @@
 import random
 import heapq
-from typing import Set, Tuple, List
+import time
+from collections import deque
+from typing import Dict, Optional, Set, Tuple, List
+from hierarchical import HierarchicalPathfinder
+from dstarlite import IncrementalPlanner
+from environment import Action, ACTION_NAMES, GLITTER
+
+# Các tìm kiếm dạng generator nhường (yield) sau mỗi chừng này node, để kiểm tra hạn thời gian
+YIELD_EVERY = 64
+# find_path trả về giá trị này khi hết hạn thời gian giữa chừng; gọi lại cùng tham số để tính tiếp
+SUSPENDED = object()
+
+
+def _run_to_end(steps):
+    """Chạy một generator tìm kiếm tới cùng và trả về giá trị return của nó."""
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
 
 class Planning:
-    def __init__(self, logic_inference):
+    PATHFINDERS = ("astar", "hierarchical", "dstar")
+
+    def __init__(self, logic_inference, pathfinder: str = "astar", time_budget: Optional[float] = None):
         self.logic_inference = logic_inference
         self.world_size = logic_inference.world_size
-        self.current_plan: List[str] = []
+        self.current_plan: List[Action] = []
+        # Số node A* đã mở rộng, để so sánh với D* Lite
+        self.expansions = 0
+        self.last_expansions = 0
+        # Hạn thời gian (giây) cho mỗi lần next_action; None = luôn tính tới khi có quyết định.
+        # Khi hết hạn, quyết định đang dở được giữ lại và chạy tiếp ở lần gọi sau.
+        self.time_budget = time_budget
+        self.suspensions = 0
+        self._deadline: Optional[float] = None
+        self._pending = None
+        self._pending_key = None
+        self._suspended_search = None
+        self.set_pathfinder(pathfinder)
+
+    def set_pathfinder(self, pathfinder: str) -> None:
+        """
+        Chọn thuật toán tìm đường: "astar" (A* phẳng), "hierarchical" (HPA* cho lưới lớn)
+        hoặc "dstar" (D* Lite, giữ trạng thái tìm kiếm giữa các bước).
+        """
+        if pathfinder not in self.PATHFINDERS:
+            raise ValueError(f"Unknown pathfinder: {pathfinder}")
+        self.pathfinder = pathfinder
+        self.hierarchical = HierarchicalPathfinder(self.logic_inference) if pathfinder == "hierarchical" else None
+        self.incremental = IncrementalPlanner(self.logic_inference) if pathfinder == "dstar" else None
 
     def plan_next_action(self, current_pos: Tuple[int, int], current_dir: str, world) -> str:
+        """Adapter cũ: trả về tên hành động thay vì mã Action."""
+        return ACTION_NAMES[self.next_action(current_pos, current_dir, world)]
+
+    def next_action(self, current_pos: Tuple[int, int], current_dir: str, world) -> Action:
+        if self.time_budget is None:
+            self._deadline = None
+            return _run_to_end(self._decide(current_pos, current_dir, world))
+
+        # Tiếp tục quyết định đang dở nếu agent và kiến thức không đổi kể từ lần trước
+        self._deadline = deadline = time.perf_counter() + self.time_budget
+        key = self._decision_key(current_pos, current_dir, world)
+        if self._pending is None or self._pending_key != key:
+            self._pending = self._decide(current_pos, current_dir, world)
+            self._pending_key = key
+            self._suspended_search = None
+        try:
+            next(self._pending)
+            while time.perf_counter() < deadline:
+                next(self._pending)
+        except StopIteration as stop:
+            self._pending = None
+            return stop.value
+        # Hết giờ: đứng yên (không đi vào ô nào chưa chắc an toàn) và tính tiếp ở tick sau
+        self.suspensions += 1
+        return Action.WAIT
+
+    def _decision_key(self, current_pos: Tuple[int, int], current_dir: str, world) -> tuple:
+        # revision tăng mỗi khi kiến thức có thể đã đổi (quan sát mới, Wumpus di chuyển)
+        return (
+            current_pos, current_dir, world.has_gold, world.has_arrow, world.percept_bits,
+            self.logic_inference.revision,
+        )
+
+    def _decide(self, current_pos: Tuple[int, int], current_dir: str, world):
+        """
+        Quy trình chọn hành động dạng generator: nhường định kỳ trong các lần tìm kiếm,
+        trả về (return) mã Action khi đã quyết định.
+        """
         self.current_plan.clear()
         # 1. Lấy vàng nếu glitter
-        if world.percepts.get("glitter", False):
-            return "grab"
+        if world.percept_bits & GLITTER:
+            return Action.GRAB
 
         # 2. Kế hoạch về nhà nếu có vàng
         if world.has_gold:
             if current_pos == (0, 0):
-                return "climb"
+                return Action.CLIMB
             if not self.current_plan:
-                path_home = self.find_path(current_pos, (0, 0), world, strict_safe=True)
+                path_home = yield from self._search(current_pos, (0, 0), world, strict_safe=True)
                 if path_home:
                     self.current_plan = self._path_to_actions(path_home, current_dir)
             if self.current_plan:
                 return self.current_plan.pop(0)
             else:
-                return "wait"
+                return Action.WAIT
 
         # 3. Khám phá các ô an toàn chưa được ghé thăm
-        safe_unvisited = [cell for cell in self.logic_inference.safe_cells if cell not in self.logic_inference.visited_cells]
+        # Các tập ô luôn được duyệt theo thứ tự sắp xếp: quyết định chỉ phụ thuộc nội dung kiến thức,
+        # không phụ thuộc thứ tự bảng băm (set khôi phục từ checkpoint cho đúng cùng quỹ đạo)
+        safe_unvisited = sorted(cell for cell in self.logic_inference.safe_cells if cell not in self.logic_inference.visited_cells)
         if safe_unvisited:
             for target in safe_unvisited:
-                path = self.find_path(current_pos, target, world, strict_safe=True)
+                path = yield from self._search(current_pos, target, world, strict_safe=True)
                 if path:
                     self.current_plan = self._path_to_actions(path, current_dir)
                     if self.current_plan:
@@ -39,47 +124,83 @@ class Planning:
 
         # 4. Cố gắng bắn những con Wumpus đã biết
         if world.has_arrow and self.logic_inference.wumpus_cells:
-            wumpus_pos = next(iter(self.logic_inference.wumpus_cells))
+            wumpus_pos = min(self.logic_inference.wumpus_cells)
             if self._can_shoot_wumpus(current_pos, current_dir, wumpus_pos):
-                return "shoot"
-            # Nếu cùng hàng hoặc cùng cột nhưng chưa đúng hướng -> xoay
-            cx, cy = current_pos
-            wx, wy = wumpus_pos
-
-            if cx == wx:
-                if cy < wy and current_dir != "right":
-                    return "turn_right" if current_dir == "up" else "turn_left"
-                elif cy > wy and current_dir != "left":
-                    return "turn_left" if current_dir == "up" else "turn_right"
-            elif cy == wy:
-                if cx > wx and current_dir != "down":
-                    return "turn_left" if current_dir == "left" else "turn_right"
-                elif cx < wx and current_dir != "up":
-                    return "turn_right" if current_dir == "left" else "turn_left"
-            for shoot_pos in self._get_shooting_positions(wumpus_pos):
-                if shoot_pos in self.logic_inference.safe_cells:
-                    path = self.find_path(current_pos, shoot_pos, world, strict_safe=True)
-                    if path:
-                        self.current_plan = self._path_to_actions(path, current_dir)
-                        if self.current_plan:
-                            return self.current_plan.pop(0)
-        
+                return Action.SHOOT
+            # Một lần BFS tìm ô bắn an toàn gần nhất cùng hướng cần quay
+            firing = yield from self._firing_steps(current_pos, wumpus_pos, world)
+            if firing:
+                path, heading = firing
+                if len(path) == 1:
+                    return self._turn_towards(current_dir, heading)
+                self.current_plan = self._path_to_actions(path, current_dir)
+                if self.current_plan:
+                    return self.current_plan.pop(0)
+
         # 5. Động thái mạo hiểm để cảnh báo tế bào
         if self.logic_inference.warning_cells and not safe_unvisited:
-            for target in self.logic_inference.warning_cells:
-                path = self.find_path(current_pos, target, world, strict_safe=False)
+            for target in sorted(self.logic_inference.warning_cells):
+                path = yield from self._search(current_pos, target, world, strict_safe=False)
                 if path:
                     self.current_plan = self._path_to_actions(path, current_dir)
                     if self.current_plan:
                         return self.current_plan.pop(0)
 
         # 6. Không xác định được hành động, đợi
-        return "wait"
+        return Action.WAIT
 
-    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int], world,strict_safe: bool = False):
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int], world,strict_safe: bool = False,
+                  deadline: Optional[float] = None):
+        """
+        Tìm đường từ start đến goal bằng pathfinder đã chọn.
+        HPA* chỉ phục vụ truy vấn strict_safe; các truy vấn khác dùng A* phẳng.
+        Với deadline (time.perf_counter()), A* phẳng dừng khi hết hạn và trả về SUSPENDED;
+        lần gọi sau với cùng tham số tính tiếp từ chỗ dừng. HPA* và D* Lite (đã rẻ nhờ
+        trừu tượng hoá/tính tăng dần) luôn chạy trọn.
+        """
+        if self.incremental is not None:
+            path = self.incremental.find_path(start, goal, strict_safe)
+            self.last_expansions = self.incremental.last_expansions
+            self.expansions += self.last_expansions
+            return path
+        if strict_safe and self.hierarchical is not None:
+            return self.hierarchical.find_path(start, goal)
+        if deadline is None:
+            return self._astar(start, goal, world, strict_safe)
+
+        key = (start, goal, strict_safe)
+        if self._suspended_search is not None and self._suspended_search[0] == key:
+            steps = self._suspended_search[1]
+        else:
+            steps = self._astar_steps(start, goal, world, strict_safe)
+        self._suspended_search = None
+        try:
+            # Luôn tính ít nhất một lát để quyết định tiến triển dù hạn đã qua
+            next(steps)
+            while time.perf_counter() < deadline:
+                next(steps)
+        except StopIteration as stop:
+            return stop.value
+        self._suspended_search = (key, steps)
+        return SUSPENDED
+
+    def _search(self, start: Tuple[int, int], goal: Tuple[int, int], world, strict_safe: bool = False):
+        """find_path trong _decide: nhường mỗi khi tìm kiếm bị dừng vì hết hạn, rồi gọi tiếp."""
+        while True:
+            path = self.find_path(start, goal, world, strict_safe, self._deadline)
+            if path is not SUSPENDED:
+                return path
+            yield
+
+    def _astar(self, start: Tuple[int, int], goal: Tuple[int, int], world, strict_safe: bool = False):
         """
         A* thuật toán tìm đường  ngắn nhất từ start đến goal.
         """
+        return _run_to_end(self._astar_steps(start, goal, world, strict_safe))
+
+    def _astar_steps(self, start: Tuple[int, int], goal: Tuple[int, int], world, strict_safe: bool = False):
+        """A* dạng generator: nhường sau mỗi YIELD_EVERY node mở rộng, trả về đường đi hoặc None."""
+        self.last_expansions = 0
         if start == goal:
             return [start]
 
@@ -105,6 +226,10 @@ class Planning:
             if current in closed_set:
                 continue
             closed_set.add(current)
+            self.last_expansions += 1
+            self.expansions += 1
+            if self.last_expansions % YIELD_EVERY == 0:
+                yield
 
             for nbr in world.get_neighbors(current):
                 if nbr in closed_set or nbr in self.logic_inference.unsafe_cells:
@@ -121,7 +246,7 @@ class Planning:
 
         return None
 
-    def _path_to_actions(self, path: List[Tuple[int, int]], current_dir: str) -> List[str]:
+    def _path_to_actions(self, path: List[Tuple[int, int]], current_dir: str) -> List[Action]:
         actions = []
         dir_order = ["up", "right", "down", "left"]
         direction = current_dir
@@ -149,13 +274,13 @@ class Planning:
                 cw = (req_idx - cur_idx) % 4
 
                 if cw == 1:  # quay phải 1 lần
-                    actions.append("turn_right")
+                    actions.append(Action.TURN_RIGHT)
                 elif cw == 3:  # quay trái 1 lần
-                    actions.append("turn_left")
+                    actions.append(Action.TURN_LEFT)
                 elif cw == 2:
-                    actions.append("turn_right")
+                    actions.append(Action.TURN_RIGHT)
 
-            actions.append("move_forward")
+            actions.append(Action.MOVE_FORWARD)
 
         return actions
 
@@ -182,18 +307,57 @@ class Planning:
 
         return False
 
-    def _get_shooting_positions(self, wumpus_pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+    def _find_firing_position(
+        self,
+        start: Tuple[int, int],
+        wumpus_pos: Tuple[int, int],
+        world,
+    ) -> Optional[Tuple[List[Tuple[int, int]], str]]:
         """
-        Return all cells in the same row or column as the Wumpus (excluding Wumpus's own cell).
+        BFS qua các ô an toàn, trả về (đường đi, hướng cần quay) tới ô bắn gần nhất
+        cùng hàng hoặc cùng cột với Wumpus, hoặc None nếu không có.
         """
-        wx, wy = wumpus_pos
-        positions: List[Tuple[int, int]] = []
+        return _run_to_end(self._firing_steps(start, wumpus_pos, world))
+
+    def _firing_steps(self, start: Tuple[int, int], wumpus_pos: Tuple[int, int], world):
+        """_find_firing_position dạng generator, nhường sau mỗi YIELD_EVERY ô."""
+        parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+        queue = deque([start])
+        visited = 0
+        while queue:
+            current = queue.popleft()
+            visited += 1
+            if visited % YIELD_EVERY == 0:
+                yield
+            heading = self._heading_to(current, wumpus_pos)
+            if heading is not None:
+                path = [current]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1], heading
+
+            for nbr in world.get_neighbors(current):
+                if nbr in parents or nbr in self.logic_inference.unsafe_cells:
+                    continue
+                if nbr not in self.logic_inference.safe_cells:
+                    continue
+                parents[nbr] = current
+                queue.append(nbr)
+        return None
 
-        for x in range(self.world_size):
-            if x != wx:
-                positions.append((x, wy))
-        for y in range(self.world_size):
-            if y != wy:
-                positions.append((wx, y))
+    @staticmethod
+    def _heading_to(pos: Tuple[int, int], target: Tuple[int, int]) -> Optional[str]:
+        """Hướng bắn từ pos tới target nếu chúng thẳng hàng."""
+        if pos == target:
+            return None
+        if pos[1] == target[1]:
+            return "up" if target[0] > pos[0] else "down"
+        if pos[0] == target[0]:
+            return "right" if target[1] > pos[1] else "left"
+        return None
 
-        return positions
+    @staticmethod
+    def _turn_towards(current_dir: str, required: str) -> Action:
+        dir_order = ["up", "right", "down", "left"]
+        cw = (dir_order.index(required) - dir_order.index(current_dir)) % 4
+        return Action.TURN_LEFT if cw == 3 else Action.TURN_RIGHT
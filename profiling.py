@@ -0,0 +1,333 @@
+"""
+Đo thời gian theo từng pha của một bước: suy luận, lập kế hoạch, thực thi, Wumpus di chuyển, vẽ GUI.
+
+Profiler thay các phương thức cần đo bằng bản bọc khi enable() và trả lại phương thức
+gốc khi disable(), nên lúc tắt không còn chi phí nào trên đường chạy.
+
+    python profiling.py --size 16 --episodes 20 --output profile.json
+    python profiling.py --size 32 --cprofile step.prof --collapsed step.folded
+
+File .folded (mỗi dòng "a;b;c <µs>") dùng trực tiếp được với flamegraph.pl hoặc speedscope.
+"""
+import argparse
+import cProfile
+import functools
+import importlib
+import json
+import os
+import pstats
+import sys
+import time
+import types
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# (module, class, phương thức, tên pha)
+PHASES: List[Tuple[str, str, str, str]] = [
+    ("inference", "LogicInference", "update_knowledge", "update_knowledge"),
+    ("inference", "LogicInference", "forward_chaining", "forward_chaining"),
+    ("planning", "Planning", "next_action", "plan_next_action"),
+    ("planning", "Planning", "find_path", "find_path"),
+    ("environment", "WumpusWorld", "step", "execute_action"),
+    ("movingwumpus", "MovingWumpusModule", "move_all_wumpus", "move_all_wumpus"),
+]
+# Các pha vẽ chỉ được đo khi module gui đã được nạp (không kéo pygame vào lần chạy headless)
+GUI_PHASES: List[Tuple[str, str, str, str]] = [
+    ("gui", "GUI", "draw_grid", "gui.draw_grid"),
+    ("gui", "GUI", "draw_ui_panel", "gui.draw_ui_panel"),
+    ("gui", "GUI", "draw_minimap", "gui.draw_minimap"),
+    ("gui", "GUI", "draw_buttons", "gui.draw_buttons"),
+    ("gui", "GUI", "render", "gui.render"),
+]
+
+
+class PhaseStats:
+    """Số lần gọi, tổng thời gian và cửa sổ các mẫu gần nhất để tính phân vị."""
+
+    def __init__(self, name: str, window: int = 1024):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.expansions = 0
+        self.samples = deque(maxlen=window)
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.samples.append(elapsed)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict:
+        ordered = sorted(self.samples)
+
+        def pct(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6 if ordered else 0.0
+
+        result = {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "p50_us": pct(0.5),
+            "p95_us": pct(0.95),
+            "p99_us": pct(0.99),
+            "max_us": self.max * 1e6,
+        }
+        if self.name == "find_path":
+            result["expansions"] = self.expansions
+        return result
+
+
+class Profiler:
+    """
+    Bộ đo theo pha. enable() vá các phương thức trong PHASES (và GUI_PHASES nếu gui đã nạp),
+    disable() khôi phục chúng. Các luật suy luận nằm trong danh sách inference_rules của
+    từng LogicInference, nên chúng được bọc theo từng đối tượng ở lần forward_chaining đầu tiên.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.enabled = False
+        self.stats: Dict[str, PhaseStats] = {}
+        self._patched: List[Tuple[type, str, object]] = []
+        self._rule_owners = weakref.WeakKeyDictionary()
+
+    def stat(self, name: str) -> PhaseStats:
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = PhaseStats(name, self.window)
+        return stat
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    # ---- Bật / tắt ----
+    def enable(self) -> "Profiler":
+        if self.enabled:
+            return self
+        phases = list(PHASES)
+        if "gui" in sys.modules:
+            phases += GUI_PHASES
+        for module_name, class_name, method, phase in phases:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            original = cls.__dict__[method]
+            if phase == "find_path":
+                wrapper = self._wrap_find_path(original, self.stat(phase))
+            elif phase == "forward_chaining":
+                wrapper = self._wrap_forward_chaining(original, self.stat(phase))
+            else:
+                wrapper = self._wrap(original, self.stat(phase))
+            setattr(cls, method, wrapper)
+            self._patched.append((cls, method, original))
+        self.enabled = True
+        return self
+
+    def disable(self) -> None:
+        for cls, method, original in reversed(self._patched):
+            setattr(cls, method, original)
+        self._patched.clear()
+        for owner, rules in list(self._rule_owners.items()):
+            owner.inference_rules = [types.MethodType(fn, owner) if bound else fn for fn, bound in rules]
+        self._rule_owners.clear()
+        self.enabled = False
+
+    def toggle(self) -> bool:
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    # ---- Bản bọc ----
+    @staticmethod
+    def _wrap(fn, stat: PhaseStats):
+        clock = time.perf_counter
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stat.add(clock() - start)
+
+        return wrapper
+
+    @staticmethod
+    def _wrap_find_path(fn, stat: PhaseStats):
+        clock = time.perf_counter
+
+        @functools.wraps(fn)
+        def wrapper(planning, *args, **kwargs):
+            before = planning.expansions
+            start = clock()
+            try:
+                return fn(planning, *args, **kwargs)
+            finally:
+                stat.add(clock() - start)
+                stat.expansions += planning.expansions - before
+
+        return wrapper
+
+    def _wrap_forward_chaining(self, fn, stat: PhaseStats):
+        clock = time.perf_counter
+        owners = self._rule_owners
+
+        @functools.wraps(fn)
+        def wrapper(logic, *args, **kwargs):
+            if logic not in owners:
+                # Giữ hàm chưa bind: bound method giữ tham chiếu mạnh tới logic, làm khoá
+                # của WeakKeyDictionary không bao giờ được giải phóng
+                owners[logic] = [
+                    (rule.__func__, True) if getattr(rule, "__self__", None) is logic else (rule, False)
+                    for rule in logic.inference_rules
+                ]
+                logic.inference_rules = [
+                    self._wrap(rule, self.stat(f"rule.{rule.__name__}")) for rule in logic.inference_rules
+                ]
+            start = clock()
+            try:
+                return fn(logic, *args, **kwargs)
+            finally:
+                stat.add(clock() - start)
+
+        return wrapper
+
+    # ---- Xuất kết quả ----
+    def report(self) -> Dict[str, Dict]:
+        """Các pha sắp theo tổng thời gian giảm dần."""
+        ordered = sorted(self.stats.values(), key=lambda s: s.total, reverse=True)
+        return {stat.name: stat.to_dict() for stat in ordered if stat.count}
+
+    def dump_json(self, path: str, meta: Optional[Dict] = None) -> None:
+        with open(path, "w") as f:
+            json.dump({"meta": meta or {}, "phases": self.report()}, f, indent=2)
+
+    def summary_lines(self, limit: int = 12) -> List[Tuple[str, float, float]]:
+        """(tên pha, trung bình µs, p95 µs) cho overlay của GUI."""
+        ordered = sorted(self.stats.values(), key=lambda s: s.total, reverse=True)
+        return [
+            (stat.name, stat.total / stat.count * 1e6, stat.percentile(0.95) * 1e6)
+            for stat in ordered[:limit]
+            if stat.count
+        ]
+
+
+# Profiler dùng chung cho GUI và dòng lệnh
+PROFILER = Profiler()
+
+
+@contextmanager
+def cprofile(prof_path: Optional[str] = None, collapsed_path: Optional[str] = None):
+    """Chạy khối lệnh dưới cProfile; ghi file .prof và/hoặc collapsed stack cho flame graph."""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        if prof_path:
+            profile.dump_stats(prof_path)
+        if collapsed_path:
+            write_collapsed(pstats.Stats(profile), collapsed_path)
+
+
+def _frame_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def write_collapsed(stats: pstats.Stats, path: str, max_depth: int = 64) -> None:
+    """
+    Dựng collapsed stack từ cProfile. cProfile chỉ lưu cặp caller -> callee, nên thời gian
+    của một hàm được chia cho các đường gọi theo tỉ lệ thời gian tích luỹ của từng cạnh
+    (xấp xỉ, nhưng đủ để thấy điểm nóng trên flame graph).
+    """
+    raw = stats.stats
+    children: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, edge_tt, edge_ct) in callers.items():
+            children.setdefault(caller, []).append((func, edge_tt, edge_ct))
+
+    lines: Dict[str, float] = {}
+
+    def visit(func, stack, tt, ct, depth):
+        frames = stack + [_frame_name(func)]
+        key = ";".join(frames)
+        lines[key] = lines.get(key, 0.0) + tt
+        total_ct = raw[func][3]
+        if depth >= max_depth or not total_ct:
+            return
+        share = ct / total_ct
+        for child, edge_tt, edge_ct in children.get(func, ()):
+            child_ct = edge_ct * share
+            # Bỏ qua đệ quy và các nhánh dưới 1µs
+            if child_ct < 1e-6 or _frame_name(child) in frames:
+                continue
+            visit(child, frames, edge_tt * share, child_ct, depth + 1)
+
+    for func, (_, _, tt, ct, callers) in raw.items():
+        if not callers:
+            visit(func, [], tt, ct, 0)
+
+    with open(path, "w") as f:
+        for key, seconds in lines.items():
+            weight = int(seconds * 1e6)
+            if weight > 0:
+                f.write(f"{key} {weight}\n")
+
+
+def main(argv=None) -> int:
+    from runner import run_episode
+
+    parser = argparse.ArgumentParser(description="Per-phase timing of headless Wumpus World episodes")
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--p", type=float, default=0.2)
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--agent", default="hybrid")
+    parser.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+    parser.add_argument("--output", help="write the per-phase report to this JSON file")
+    parser.add_argument("--cprofile", help="also dump cProfile stats (.prof) to this file")
+    parser.add_argument("--collapsed", help="also dump collapsed stacks for flame graphs to this file")
+    args = parser.parse_args(argv)
+
+    def run_all():
+        for seed in range(args.episodes):
+            run_episode(args.size, args.k, args.p, seed, agent=args.agent, advance_mode=args.advance)
+
+    PROFILER.enable()
+    try:
+        if args.cprofile or args.collapsed:
+            with cprofile(args.cprofile, args.collapsed):
+                run_all()
+        else:
+            run_all()
+    finally:
+        PROFILER.disable()
+
+    report = PROFILER.report()
+    print(f"{'phase':36s} {'count':>8s} {'total ms':>10s} {'mean us':>10s} {'p95 us':>10s}")
+    for name, row in report.items():
+        print(f"{name:36s} {row['count']:8d} {row['total_ms']:10.1f} {row['mean_us']:10.1f} {row['p95_us']:10.1f}")
+    if "find_path" in report:
+        print(f"A* expansions: {report['find_path']['expansions']}")
+    if args.output:
+        meta = {key: getattr(args, key) for key in ("size", "k", "p", "episodes", "agent", "advance")}
+        PROFILER.dump_json(args.output, meta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import importlib
+import inspect
+import time
+from typing import Dict, List, Optional
+
+from environment import WumpusWorld, to_action
+from agent import HybridAgent, RandomAgent
+from movingwumpus import MovingWumpusModule
+
+# Các trường của một bản ghi episode, theo thứ tự cột CSV
+RECORD_FIELDS = (
+    "seed", "agent", "world_size", "k", "p", "advance_mode", "max_steps", "outcome", "score", "steps", "wall_time",
+)
+
+# Các agent có sẵn; agent thử nghiệm có thể chỉ định dạng "module:Class"
+AGENTS = {
+    "hybrid": lambda world_size: HybridAgent(world_size),
+    "random": lambda world_size: RandomAgent(),
+}
+
+
+def make_agent(name: str, world_size: int):
+    if name in AGENTS:
+        return AGENTS[name](world_size)
+    if ":" in name:
+        module_name, class_name = name.split(":", 1)
+        cls = getattr(importlib.import_module(module_name), class_name)
+        return cls(world_size) if _accepts_world_size(cls) else cls()
+    raise ValueError(f"Unknown agent: {name}")
+
+
+def _accepts_world_size(cls) -> bool:
+    """Hàm khởi tạo có nhận được một tham số vị trí (world_size) không."""
+    try:
+        params = inspect.signature(cls).parameters.values()
+    except (TypeError, ValueError):
+        return True
+    return any(
+        p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD, p.VAR_POSITIONAL) for p in params
+    )
+
+
+def default_max_steps(world_size: int) -> int:
+    return 4 * world_size * world_size
+
+
+def parse_seeds(text: str) -> List[int]:
+    """Dải seed dạng "a-b" (gồm cả b) hoặc danh sách "a,b,c"."""
+    if "-" in text:
+        lo, hi = text.split("-", 1)
+        return list(range(int(lo), int(hi) + 1))
+    return [int(s) for s in text.split(",")]
+
+
+def run_episode(
+    world_size: int,
+    k: int,
+    p: float,
+    seed: int,
+    agent: str = "hybrid",
+    max_steps: Optional[int] = None,
+    advance_mode: bool = False,
+    world: Optional[WumpusWorld] = None,
+    on_step=None,
+    time_budget: Optional[float] = None,
+) -> Dict:
+    """
+    Chạy một episode không cần GUI, giống vòng lặp của main.main.
+    Trả về bản ghi: seed, agent, outcome ("win" / "lose" / "stall"), score, steps, wall_time.
+    on_step(world, agent, action), nếu có, được gọi sau mỗi hành động.
+    time_budget, nếu có, giới hạn thời gian lập kế hoạch mỗi bước của agent có Planning.
+    """
+    start = time.perf_counter()
+    if world is None:
+        world = WumpusWorld(world_size, k, p, seed=seed)
+    player = make_agent(agent, world.grid_size)
+    if time_budget is not None and hasattr(player, "planning"):
+        player.planning.time_budget = time_budget
+    mover = MovingWumpusModule(world) if advance_mode else None
+    if max_steps is None:
+        max_steps = default_max_steps(world.grid_size)
+
+    # Agent cũ chỉ có plan_next_action (trả về tên hành động)
+    act = getattr(player, "act", None)
+    if act is None:
+        act = lambda pos, direction, w: to_action(player.plan_next_action(pos, direction, w))
+
+    steps = 0
+    state = world.is_game_over(player)
+    while state == "continue" and steps < max_steps:
+        player.update_knowledge(world.agent_pos, world.percept_bits, world)
+        action = act(world.agent_pos, world.agent_dir, world)
+        world.step(action)
+        steps += 1
+        if mover is not None and steps % 5 == 0:
+            mover.update(world, None, player)
+        if on_step is not None:
+            on_step(world, player, action)
+        state = world.is_game_over(player)
+
+    return {
+        "seed": seed,
+        "agent": agent,
+        "world_size": world.grid_size,
+        "k": k,
+        "p": p,
+        "advance_mode": advance_mode,
+        "max_steps": max_steps,
+        "outcome": state if state != "continue" else "stall",
+        "score": world.score,
+        "steps": steps,
+        "wall_time": time.perf_counter() - start,
+    }
@@ -0,0 +1,377 @@
+"""
+Server asyncio cho agent bên ngoài (tiến trình/ngôn ngữ khác): JSON-lines qua TCP hoặc Unix socket.
+
+    python server.py serve --port 7777                 # hoặc --unix /tmp/wumpus.sock
+    python server.py bench --port 7777 --sessions 2000 --batch 200 --seconds 10
+
+Mỗi dòng là một request JSON, mỗi request nhận đúng một dòng trả lời (theo thứ tự; "id" nếu có
+được gửi lại):
+
+    {"op": "new", "size": 8, "k": 2, "p": 0.2, "seed": 7, "advance": true, "max_steps": 256}
+    {"op": "step", "session": 1, "action": "move_forward"}        # hoặc mã Action (0..6)
+    {"op": "batch", "steps": [[1, 1], [2, "turn_left"], ...]}     # nhiều phiên trong một dòng
+    {"op": "reset", "session": 1, "seed": 8}
+    {"op": "close", "session": 1}
+    {"op": "stats"}
+
+Một tiến trình, một event loop phục vụ mọi phiên (không có luồng cho từng ván). Phiên thuộc về
+kết nối đã tạo nó và bị huỷ khi kết nối đóng. Backpressure: mỗi kết nối xử lý request tuần tự và
+chờ drain() khi buffer ghi vượt ngưỡng, nên client không đọc trả lời sẽ bị chặn ở TCP thay vì
+làm phình bộ nhớ server; dòng và lô quá lớn bị từ chối.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+from environment import Action, ACTION_CODES
+from movingwumpus import MovingWumpusModule
+from runner import default_max_steps
+from worldcache import WorldCache
+
+MAX_LINE = 1 << 20  # byte mỗi request
+WRITE_HIGH_WATER = 256 * 1024
+MAX_BATCH = 4096
+MAX_SESSIONS = 100000
+MAX_WORLD_SIZE = 256
+# Nhường event loop sau chừng này request liên tiếp của cùng một kết nối
+YIELD_EVERY = 64
+
+
+class RequestError(Exception):
+    """Request sai; được trả về cho client dưới dạng {"error": ...} thay vì đóng kết nối."""
+
+
+def parse_action(action) -> Action:
+    """Tên hành động hoặc mã số hợp lệ -> Action; giá trị khác là RequestError (không coi là wait)."""
+    if isinstance(action, str) and action in ACTION_CODES:
+        return ACTION_CODES[action]
+    if isinstance(action, int) and not isinstance(action, bool) and 0 <= action < len(Action):
+        return Action(action)
+    raise RequestError(f"invalid action {action!r}")
+
+
+class Session:
+    """
+    Một ván WumpusWorld. Wumpus di chuyển dùng trạng thái random riêng của phiên (lưu/khôi phục
+    quanh mỗi lần di chuyển), nên kết quả không phụ thuộc vào thứ tự xen kẽ giữa các phiên.
+    """
+
+    __slots__ = ("world", "mover", "steps", "max_steps", "move_every", "rng_state", "seed")
+
+    def __init__(self, world, seed: int, advance: bool, max_steps: int, move_every: int = 5):
+        self.world = world
+        self.seed = seed
+        self.mover = MovingWumpusModule(world) if advance else None
+        self.rng_state = random.getstate() if advance else None
+        self.steps = 0
+        self.max_steps = max_steps
+        self.move_every = move_every
+
+    def observe(self) -> Dict:
+        world = self.world
+        return {
+            "percepts": world.percept_bits,
+            "pos": world.agent_pos,
+            "dir": world.agent_dir,
+            "score": world.score,
+            "steps": self.steps,
+        }
+
+    def step(self, action) -> Dict:
+        world = self.world
+        if world.game_over_state is not None or self.steps >= self.max_steps:
+            raise RequestError("episode is over; reset or close the session")
+        bits, reward, done = world.step(parse_action(action))
+        self.steps += 1
+
+        if not done and self.mover is not None and self.steps % self.move_every == 0:
+            random.setstate(self.rng_state)
+            done = self.mover.advance()
+            self.rng_state = random.getstate()
+            bits = world.percept_bits
+
+        truncated = not done and self.steps >= self.max_steps
+        return {
+            "percepts": bits,
+            "reward": reward,
+            "done": done,
+            "truncated": truncated,
+            "outcome": world.game_over_state or ("truncated" if truncated else "continue"),
+            "pos": world.agent_pos,
+            "dir": world.agent_dir,
+            "score": world.score,
+            "steps": self.steps,
+        }
+
+
+class GameServer:
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_batch: int = MAX_BATCH, seed: Optional[int] = None):
+        self.max_sessions = max_sessions
+        self.max_batch = max_batch
+        self.sessions: Dict[int, Session] = {}
+        self.worlds = WorldCache(maxsize=256)
+        self._next_id = 1
+        self._seed_rng = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self.steps = 0
+        self.started = time.monotonic()
+
+    # ---- Xử lý request (đồng bộ, không await: một request không bao giờ bị chen ngang) ----
+    def handle(self, request: Dict, owned: Set[int]) -> Dict:
+        self.requests += 1
+        op = request.get("op")
+        if op == "step":
+            self.steps += 1
+            return self._session(request, owned).step(request.get("action"))
+        if op == "batch":
+            return {"results": self._batch(request.get("steps"), owned)}
+        if op == "new":
+            return self._new(request, owned)
+        if op == "reset":
+            sid = self._session_id(request, owned)
+            old = self.sessions[sid]
+            params = {"size": old.world.grid_size, "k": old.world.K, "p": old.world.pit_prob,
+                      "advance": old.mover is not None, "max_steps": old.max_steps, **request}
+            # Phiên cũ chỉ bị thay khi tham số mới hợp lệ
+            return self._new(params, owned, sid)
+        if op == "close":
+            sid = self._session_id(request, owned)
+            del self.sessions[sid]
+            owned.discard(sid)
+            return {"closed": sid}
+        if op == "stats":
+            return self.stats()
+        raise RequestError(f"unknown op {op!r}")
+
+    def _batch(self, steps, owned: Set[int]) -> List[Dict]:
+        if not isinstance(steps, list):
+            raise RequestError("'steps' must be a list of [session, action]")
+        if len(steps) > self.max_batch:
+            raise RequestError(f"batch too large ({len(steps)} > {self.max_batch})")
+        results = []
+        for item in steps:
+            try:
+                sid, action = item
+                if sid not in owned:
+                    raise RequestError(f"unknown session {sid!r}")
+                results.append(self.sessions[sid].step(action))
+            except (RequestError, TypeError, ValueError) as exc:
+                results.append({"error": str(exc)})
+        self.steps += len(steps)
+        return results
+
+    def _session_id(self, request: Dict, owned: Set[int]) -> int:
+        sid = request.get("session")
+        if sid not in owned:
+            raise RequestError(f"unknown session {sid!r}")
+        return sid
+
+    def _session(self, request: Dict, owned: Set[int]) -> Session:
+        return self.sessions[self._session_id(request, owned)]
+
+    def _new(self, request: Dict, owned: Set[int], sid: Optional[int] = None) -> Dict:
+        """Tạo phiên mới, hoặc thay phiên sid (reset) sau khi đã kiểm tra và dựng xong phiên mới."""
+        if sid is None and len(self.sessions) >= self.max_sessions:
+            raise RequestError(f"too many sessions ({self.max_sessions})")
+        session = self._build(request)
+        if sid is None:
+            sid = self._next_id
+            self._next_id += 1
+        self.sessions[sid] = session
+        owned.add(sid)
+        return {"session": sid, "seed": session.seed, "size": session.world.grid_size, **session.observe()}
+
+    def _build(self, request: Dict) -> Session:
+        try:
+            size = int(request.get("size", 8))
+            k = int(request.get("k", 2))
+            p = float(request.get("p", 0.2))
+            seed = request.get("seed")
+            seed = self._seed_rng.randrange(2 ** 31) if seed is None else int(seed)
+            max_steps = request.get("max_steps")
+            max_steps = default_max_steps(size) if max_steps is None else int(max_steps)
+        except (TypeError, ValueError) as exc:
+            raise RequestError(f"bad parameters: {exc}")
+        if not 2 <= size <= MAX_WORLD_SIZE or not 0 <= k < size * size - 1 or not 0.0 <= p < 1.0:
+            raise RequestError("size must be 2..256, k < size*size-1 and 0 <= p < 1")
+
+        # Bố cục được cache theo seed; trạng thái random được đưa về như vừa sinh từ seed
+        world = self.worlds.world(size, k, p, seed)
+        return Session(world, seed, bool(request.get("advance", False)), max_steps)
+
+    def stats(self) -> Dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "sessions": len(self.sessions),
+            "connections": self.connections,
+            "requests": self.requests,
+            "steps": self.steps,
+            "uptime": elapsed,
+            "requests_per_second": self.requests / elapsed if elapsed > 0 else 0.0,
+            "steps_per_second": self.steps / elapsed if elapsed > 0 else 0.0,
+        }
+
+    # ---- Mạng ----
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        writer.transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        owned: Set[int] = set()
+        handled = 0
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Dòng dài hơn MAX_LINE: không thể đồng bộ lại luồng, đóng kết nối
+                    writer.write(b'{"error": "request line too long"}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("request must be a JSON object")
+                    reply = self.handle(request, owned)
+                except (RequestError, TypeError, ValueError) as exc:
+                    request = request if isinstance(request, dict) else {}
+                    reply = {"error": str(exc)}
+                if "id" in request:
+                    reply["id"] = request["id"]
+                writer.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+                # Chỉ thực sự chờ khi buffer ghi vượt WRITE_HIGH_WATER (client đọc chậm)
+                await writer.drain()
+                handled += 1
+                if handled % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for sid in owned:
+                self.sessions.pop(sid, None)
+            self.connections -= 1
+            writer.close()
+
+    async def report(self, interval: float) -> None:
+        """In số request/bước mỗi giây trong từng khoảng interval."""
+        last_requests, last_steps, last = self.requests, self.steps, time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            elapsed = now - last
+            print(
+                f"{(self.requests - last_requests) / elapsed:10.0f} req/s {(self.steps - last_steps) / elapsed:10.0f} steps/s"
+                f"  {len(self.sessions)} sessions, {self.connections} connections",
+                flush=True,
+            )
+            last_requests, last_steps, last = self.requests, self.steps, now
+
+
+async def serve(server: GameServer, host: str = "127.0.0.1", port: int = 7777,
+                unix: Optional[str] = None, report_every: float = 5.0) -> None:
+    if unix:
+        listener = await asyncio.start_unix_server(server.serve_client, path=unix, limit=MAX_LINE)
+        where = unix
+    else:
+        listener = await asyncio.start_server(server.serve_client, host, port, limit=MAX_LINE)
+        where = f"{host}:{port}"
+    print(f"Serving Wumpus World sessions on {where}", flush=True)
+    reporter = asyncio.ensure_future(server.report(report_every)) if report_every > 0 else None
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+
+async def _bench_client(host: str, port: int, unix: Optional[str], sessions: int, batch: int,
+                        deadline: float, params: Dict) -> int:
+    """Một kết nối: mở `sessions` phiên rồi gửi lô bước ngẫu nhiên cho tới deadline."""
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix, limit=MAX_LINE)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    rng = random.Random(sessions)
+    ids = []
+    for i in range(sessions):
+        writer.write(json.dumps({"op": "new", "seed": i, **params}).encode() + b"\n")
+    await writer.drain()
+    for _ in range(sessions):
+        ids.append(json.loads(await reader.readline())["session"])
+
+    steps = 0
+    actions = [int(Action.MOVE_FORWARD), int(Action.TURN_LEFT), int(Action.TURN_RIGHT)]
+    while time.monotonic() < deadline:
+        chosen = [[rng.choice(ids), rng.choice(actions)] for _ in range(batch)]
+        writer.write(json.dumps({"op": "batch", "steps": chosen}).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        for (sid, _), result in zip(chosen, reply["results"]):
+            if "error" in result or result["done"] or result["truncated"]:
+                writer.write(json.dumps({"op": "reset", "session": sid}).encode() + b"\n")
+                await writer.drain()
+                await reader.readline()
+        steps += batch
+    writer.close()
+    return steps
+
+
+async def bench(host: str, port: int, unix: Optional[str], connections: int, sessions: int,
+                batch: int, seconds: float, params: Dict) -> Dict:
+    per_connection = max(1, sessions // connections)
+    start = time.monotonic()
+    counts = await asyncio.gather(*[
+        _bench_client(host, port, unix, per_connection, batch, start + seconds, params)
+        for _ in range(connections)
+    ])
+    elapsed = time.monotonic() - start
+    return {"steps": sum(counts), "seconds": elapsed, "steps_per_second": sum(counts) / elapsed}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="JSON-lines game server for external agents")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="host sessions until interrupted")
+    p_bench = sub.add_parser("bench", help="load-test a running server with random batched steps")
+    for p in (p_serve, p_bench):
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=7777)
+        p.add_argument("--unix", default=None, help="listen on / connect to a Unix socket instead of TCP")
+    p_serve.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    p_serve.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    p_serve.add_argument("--seed", type=int, default=None, help="seed for sessions created without one")
+    p_serve.add_argument("--report", type=float, default=5.0, help="seconds between req/s reports (0 = off)")
+    p_bench.add_argument("--connections", type=int, default=4)
+    p_bench.add_argument("--sessions", type=int, default=1000, help="total sessions across connections")
+    p_bench.add_argument("--batch", type=int, default=100)
+    p_bench.add_argument("--seconds", type=float, default=5.0)
+    p_bench.add_argument("--size", type=int, default=8)
+    p_bench.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = GameServer(args.max_sessions, args.max_batch, args.seed)
+        try:
+            asyncio.run(serve(server, args.host, args.port, args.unix, args.report))
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps(server.stats()))
+    else:
+        result = asyncio.run(bench(
+            args.host, args.port, args.unix, args.connections, args.sessions, args.batch, args.seconds,
+            {"size": args.size, "advance": args.advance},
+        ))
+        print(f"{result['steps']} steps in {result['seconds']:.1f}s: {result['steps_per_second']:.0f} steps/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
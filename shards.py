@@ -0,0 +1,269 @@
+"""
+Đánh giá phân mảnh trên nhiều máy qua một thư mục chung (local hoặc NFS), không cần broker.
+
+    python shards.py init /shared/eval --sizes 8,16 --k 2 --p 0.2 --agents hybrid,random --seeds 0-99999
+    python shards.py work /shared/eval --processes 8        # chạy trên bao nhiêu máy cũng được
+    python shards.py status /shared/eval
+    python shards.py merge /shared/eval --output report.json
+
+Cấu trúc thư mục:
+    todo/<shard>.json       shard chờ chạy
+    claimed/<shard>.json    shard đang chạy; mtime là nhịp tim của worker giữ nó
+    done/<shard>.json       shard đã xong
+    results/<shard>.<worker>.jsonl   bản ghi episode, ghi nối ngay khi xong (checkpoint)
+
+Worker nhận shard bằng os.rename (nguyên tử trong cùng một thư mục/filesystem). Shard có
+nhịp tim cũ hơn lease được đưa về todo; worker tiếp theo bỏ qua các seed đã có kết quả.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from runner import parse_seeds, run_episode
+from stats import GroupedStats, format_table
+from tournament import RecordWriter, read_records
+from worldcache import WorldCache
+
+SUBDIRS = ("todo", "claimed", "done", "results")
+DEFAULT_LEASE = 900  # giây không có nhịp tim trước khi shard bị coi là bỏ dở
+HEARTBEAT_EVERY = 10.0
+
+
+def _path(root: str, subdir: str, name: str = "") -> str:
+    return os.path.join(root, subdir, name)
+
+
+def init_shards(
+    root: str,
+    sizes: List[int],
+    wumpus_counts: List[int],
+    pit_probs: List[float],
+    agents: List[str],
+    seeds: List[int],
+    shard_size: int = 1000,
+    advance_mode: bool = False,
+    max_steps: Optional[int] = None,
+) -> int:
+    """Tạo manifest cho từng shard (một cấu hình x một khối seed); trả về số shard."""
+    for subdir in SUBDIRS:
+        os.makedirs(_path(root, subdir), exist_ok=True)
+    count = 0
+    for n in sizes:
+        for k in wumpus_counts:
+            for p in pit_probs:
+                for i in range(0, len(seeds), shard_size):
+                    shard = {
+                        "id": f"shard-{count:06d}",
+                        "world_size": n,
+                        "k": k,
+                        "p": p,
+                        "agents": agents,
+                        "seeds": seeds[i:i + shard_size],
+                        "advance_mode": advance_mode,
+                        "max_steps": max_steps,
+                    }
+                    tmp = _path(root, "todo", f".{shard['id']}.tmp")
+                    with open(tmp, "w") as f:
+                        json.dump(shard, f)
+                    os.replace(tmp, _path(root, "todo", f"{shard['id']}.json"))
+                    count += 1
+    return count
+
+
+def requeue_stale(root: str, lease: float = DEFAULT_LEASE) -> List[str]:
+    """Đưa các shard không còn nhịp tim về lại todo."""
+    requeued = []
+    now = time.time()
+    for path in glob.glob(_path(root, "claimed", "*.json")):
+        try:
+            if now - os.path.getmtime(path) > lease:
+                os.rename(path, _path(root, "todo", os.path.basename(path)))
+                requeued.append(os.path.basename(path))
+        except FileNotFoundError:
+            continue  # worker khác vừa xong hoặc vừa đưa về todo
+    return requeued
+
+
+def claim(root: str) -> Optional[str]:
+    """Nhận một shard từ todo; trả về tên file, hoặc None nếu hết việc."""
+    for path in sorted(glob.glob(_path(root, "todo", "shard-*.json"))):
+        name = os.path.basename(path)
+        try:
+            # Chạm trước khi rename: rename giữ nguyên mtime, nên shard vừa nhận có nhịp tim mới
+            os.utime(path)
+            os.rename(path, _path(root, "claimed", name))
+            return name
+        except FileNotFoundError:
+            continue
+    return None
+
+
+class LostLease(Exception):
+    """Shard đã bị đưa về todo (nhịp tim quá hạn) trong khi worker vẫn đang chạy nó."""
+
+
+def run_shard(root: str, name: str, worker_id: str, cache: WorldCache, lease: float = DEFAULT_LEASE) -> int:
+    """Chạy các (agent, seed) chưa có kết quả của shard; trả về số episode đã chạy."""
+    claimed = _path(root, "claimed", name)
+    with open(claimed) as f:
+        shard = json.load(f)
+    n, k, p = shard["world_size"], shard["k"], shard["p"]
+
+    done = set()
+    for results in glob.glob(_path(root, "results", f"{shard['id']}.*.jsonl")):
+        done.update((r["agent"], r["seed"]) for r in read_records(results))
+
+    writer = RecordWriter(_path(root, "results", f"{shard['id']}.{worker_id}.jsonl"))
+    ran = 0
+    heartbeat = min(HEARTBEAT_EVERY, lease / 3)
+    last_beat = time.monotonic()
+    try:
+        for seed in shard["seeds"]:
+            for agent in shard["agents"]:
+                if (agent, seed) in done:
+                    continue
+                writer.write(run_episode(
+                    n, k, p, seed, agent=agent, world=cache.world(n, k, p, seed),
+                    advance_mode=shard["advance_mode"], max_steps=shard["max_steps"],
+                ))
+                ran += 1
+            if time.monotonic() - last_beat > heartbeat:
+                try:
+                    os.utime(claimed)
+                except FileNotFoundError:
+                    raise LostLease(name)
+                last_beat = time.monotonic()
+    finally:
+        writer.close()
+    try:
+        os.rename(claimed, _path(root, "done", name))
+    except FileNotFoundError:
+        raise LostLease(name)
+    return ran
+
+
+def work(root: str, worker_id: Optional[str] = None, lease: float = DEFAULT_LEASE) -> int:
+    """Nhận và chạy shard cho tới khi todo rỗng; trả về số shard đã hoàn thành."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    cache = WorldCache(maxsize=4)
+    finished = 0
+    while True:
+        requeue_stale(root, lease)
+        name = claim(root)
+        if name is None:
+            return finished
+        try:
+            run_shard(root, name, worker_id, cache, lease)
+            finished += 1
+        except LostLease:
+            continue
+
+
+def status(root: str) -> Dict[str, int]:
+    return {subdir: len(glob.glob(_path(root, subdir, "shard-*.json"))) for subdir in ("todo", "claimed", "done")}
+
+
+def merge(root: str, records_path: Optional[str] = None) -> GroupedStats:
+    """
+    Gộp kết quả mọi shard (bỏ bản ghi trùng khi một shard bị chạy lại) thành một GroupedStats;
+    records_path, nếu có, nhận toàn bộ bản ghi đã khử trùng.
+    """
+    grouped = GroupedStats()
+    seen = set()
+    writer = RecordWriter(records_path) if records_path else None
+    try:
+        for results in sorted(glob.glob(_path(root, "results", "*.jsonl"))):
+            for record in read_records(results):
+                key = (record["world_size"], record["k"], record["p"], record["agent"], record["seed"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                grouped.add(record)
+                if writer is not None:
+                    writer.write(record)
+    finally:
+        if writer is not None:
+            writer.close()
+    return grouped
+
+
+def _split(text: str, cast) -> list:
+    return [cast(x) for x in text.split(",")]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded evaluation over a shared directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_init = sub.add_parser("init", help="write shard manifests")
+    p_init.add_argument("root")
+    p_init.add_argument("--sizes", default="8")
+    p_init.add_argument("--k", default="2")
+    p_init.add_argument("--p", default="0.2")
+    p_init.add_argument("--agents", default="hybrid")
+    p_init.add_argument("--seeds", default="0-9999", help="range 'a-b' or list 'a,b,c'")
+    p_init.add_argument("--shard-size", type=int, default=1000)
+    p_init.add_argument("--max-steps", type=int, default=None)
+    p_init.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+
+    p_work = sub.add_parser("work", help="claim and run shards until none are left")
+    p_work.add_argument("root")
+    p_work.add_argument("--processes", type=int, default=1)
+    p_work.add_argument("--worker-id", default=None)
+    p_work.add_argument("--lease", type=float, default=DEFAULT_LEASE, help="seconds before an idle claim is requeued")
+
+    p_status = sub.add_parser("status")
+    p_status.add_argument("root")
+
+    p_merge = sub.add_parser("merge", help="merge shard results into one report")
+    p_merge.add_argument("root")
+    p_merge.add_argument("--output", default=None, help="write the grouped summary to this JSON file")
+    p_merge.add_argument("--records", default=None, help="also write all deduplicated records (.jsonl/.csv)")
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        count = init_shards(
+            args.root, _split(args.sizes, int), _split(args.k, int), _split(args.p, float),
+            args.agents.split(","), parse_seeds(args.seeds), args.shard_size, args.advance, args.max_steps,
+        )
+        print(f"Wrote {count} shards to {args.root}")
+    elif args.command == "work":
+        base = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        if args.processes == 1:
+            work(args.root, base, args.lease)
+        else:
+            procs = [
+                multiprocessing.Process(target=work, args=(args.root, f"{base}-{i}", args.lease))
+                for i in range(args.processes)
+            ]
+            for proc in procs:
+                proc.start()
+            for proc in procs:
+                proc.join()
+        print(status(args.root))
+    elif args.command == "status":
+        print(status(args.root))
+    else:
+        state = status(args.root)
+        grouped = merge(args.root, args.records)
+        if state["todo"] or state["claimed"]:
+            print(f"Warning: report is partial ({state['todo']} todo, {state['claimed']} claimed)")
+        print("\n".join(format_table(grouped)))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({
+                    "shards": state,
+                    "groups": [{"world_size": n, "k": k, "p": p, "agent": agent, **row}
+                               for (n, k, p, agent), row in grouped.summary().items()],
+                }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import queue
+import threading
+import time
+from typing import Callable, FrozenSet, Optional, Tuple
+
+from gui import GameMode
+from movingwumpus import MovingWumpusModule
+from sparseworld import _SparseGrid
+
+Cell = Tuple[int, int]
+# Số bước giữa hai lần Wumpus di chuyển (ADVANCE_MODE), như vòng lặp cũ của main
+WUMPUS_MOVE_EVERY = 5
+# Ở chế độ Turbo, ảnh chụp chỉ được công bố tối đa ~60 lần mỗi giây
+TURBO_PUBLISH_INTERVAL = 1 / 60
+
+
+class WorldSnapshot:
+    """Bản chụp bất biến của WumpusWorld, đủ cho GUI vẽ (world[x][y] là view như SparseWumpusWorld)."""
+
+    def __init__(self, world, cells: Tuple[FrozenSet[Cell], FrozenSet[Cell]], status: str):
+        self.grid_size = world.grid_size
+        self.agent_pos = world.agent_pos
+        self.agent_dir = world.agent_dir
+        self.has_gold = world.has_gold
+        self.has_arrow = world.has_arrow
+        self.score = world.score
+        self.seed = world.seed
+        self.percept_bits = world.percept_bits
+        self.percepts = world.percepts
+        self.status = status
+        self.wumpus_positions = frozenset(world.wumpus_positions)
+        self._pits, gold = cells
+        # Chỉ có một thỏi vàng: agent đã nhặt thì không còn vàng trên bản đồ
+        self.gold_cells = frozenset() if world.has_gold else gold
+        self.world = _SparseGrid(self)
+
+    def _is_pit(self, pos: Cell) -> bool:
+        return pos in self._pits
+
+    def is_game_over(self, agent=None) -> str:
+        return self.status
+
+
+class AgentSnapshot:
+    """Bản chụp các tập kiến thức của agent mà GUI hiển thị."""
+
+    def __init__(self, agent):
+        self.safe_cells = frozenset(agent.safe_cells)
+        self.visited_cells = frozenset(agent.visited_cells)
+        self.unsafe_cells = frozenset(agent.unsafe_cells)
+        self.warning_cells = frozenset(agent.warning_cells)
+        self.breeze_cells = frozenset(agent.breeze_cells)
+        self.stench_cells = frozenset(agent.stench_cells)
+        self.knowledge_base = tuple(agent.knowledge_base[-10:])
+        self.last_action = agent.last_action
+
+
+class Snapshot:
+    __slots__ = ("world", "agent", "game", "steps")
+
+    def __init__(self, world: WorldSnapshot, agent: AgentSnapshot, game: int, steps: int):
+        self.world = world
+        self.agent = agent
+        self.game = game
+        self.steps = steps
+
+
+class DoubleBuffer:
+    """
+    Bộ đệm đôi cho ảnh chụp: worker dựng ảnh mới ở "back" rồi hoán đổi tham chiếu "front".
+    latest() chỉ đọc một tham chiếu nên luồng render không bao giờ phải chờ worker.
+    Ảnh chụp của ván cũ (đến muộn sau khi reset) bị bỏ qua. on_publish(), nếu có, được gọi
+    sau mỗi lần hoán đổi (ví dụ để đánh thức vòng lặp sự kiện của pygame).
+    """
+
+    def __init__(self, snapshot: Snapshot, on_publish: Optional[Callable[[], None]] = None):
+        self._front = snapshot
+        self._lock = threading.Lock()
+        self.version = 0
+        self.on_publish = on_publish
+
+    def publish(self, snapshot: Snapshot) -> bool:
+        with self._lock:
+            if snapshot.game < self._front.game:
+                return False
+            self._front = snapshot
+            self.version += 1
+        if self.on_publish is not None:
+            self.on_publish()
+        return True
+
+    def latest(self) -> Snapshot:
+        return self._front
+
+
+class SimulationThread(threading.Thread):
+    """
+    Chạy agent, hành động và Wumpus di chuyển trên một luồng riêng. Luồng pygame chỉ gửi
+    thông điệp (step, đổi chế độ, advance, reset, đổi agent) và vẽ ảnh chụp mới nhất.
+    """
+
+    def __init__(self, world, agent, auto_delay: float = 0.1, on_publish: Optional[Callable[[], None]] = None):
+        super().__init__(name="simulation", daemon=True)
+        self.world = world
+        self.agent = agent
+        self.auto_delay = auto_delay
+        self.mode = GameMode.STEP
+        self.advance_mode = False
+        self.steps = 0
+        self.game = 0
+        self.inbox: "queue.Queue[tuple]" = queue.Queue()
+        self._mover = MovingWumpusModule(world)
+        self._cells = world.static_cells()
+        self._status = world.is_game_over(agent)
+        self._game = 0
+        self._last_publish = 0.0
+        self.buffer = DoubleBuffer(self._snapshot(), on_publish)
+
+    # ---- API cho luồng pygame ----
+    def request_step(self) -> None:
+        self.inbox.put(("step",))
+
+    def set_mode(self, mode: GameMode) -> None:
+        self.inbox.put(("mode", mode))
+
+    def set_advance(self, enabled: bool) -> None:
+        self.inbox.put(("advance", enabled))
+
+    def reset(self, world, agent) -> None:
+        """Bắt đầu ván mới; ảnh chụp đầu tiên được công bố ngay để GUI không vẽ ván cũ."""
+        self.game += 1
+        status = world.is_game_over(agent)
+        self.buffer.publish(Snapshot(WorldSnapshot(world, world.static_cells(), status), AgentSnapshot(agent), self.game, 0))
+        self.inbox.put(("reset", world, agent, self.game))
+
+    def switch_agent(self, agent) -> None:
+        self.inbox.put(("agent", agent))
+
+    def stop(self) -> None:
+        self.inbox.put(("stop",))
+
+    def latest(self) -> Snapshot:
+        return self.buffer.latest()
+
+    # ---- Luồng mô phỏng ----
+    def run(self) -> None:
+        next_step = time.monotonic()
+        while True:
+            running = self._status == "continue"
+            if running and self.mode == GameMode.TURBO:
+                timeout = 0.0
+            elif running and self.mode == GameMode.AUTO:
+                timeout = max(0.0, next_step - time.monotonic())
+            else:
+                timeout = None
+            try:
+                message = self.inbox.get(block=timeout != 0.0, timeout=timeout)
+            except queue.Empty:
+                self._step()
+                next_step = time.monotonic() + self.auto_delay
+                continue
+            if not self._handle(message):
+                return
+
+    def _handle(self, message: tuple) -> bool:
+        kind = message[0]
+        if kind == "stop":
+            return False
+        if kind == "step":
+            if self._status == "continue":
+                action = self._step()
+                print(f"Executed action: {action}")
+        elif kind == "mode":
+            self.mode = message[1]
+            self._publish(force=True)
+        elif kind == "advance":
+            self.advance_mode = message[1]
+        elif kind == "reset":
+            _, self.world, self.agent, self._game = message
+            self._mover = MovingWumpusModule(self.world)
+            self._cells = self.world.static_cells()
+            self.steps = 0
+            self._status = self.world.is_game_over(self.agent)
+            self._publish(force=True)
+        elif kind == "agent":
+            self.agent = message[1]
+            self._status = self.world.is_game_over(self.agent)
+            self._publish(force=True)
+        return True
+
+    def _step(self):
+        world, agent = self.world, self.agent
+        agent.update_knowledge(world.agent_pos, world.percept_bits, world)
+        action = agent.act(world.agent_pos, world.agent_dir, world)
+        world.step(action)
+        self.steps += 1
+        if self.advance_mode and self.steps % WUMPUS_MOVE_EVERY == 0:
+            self._mover.update(world, None, agent)
+        self._status = world.is_game_over(agent)
+        self._publish(force=self.mode != GameMode.TURBO or self._status != "continue")
+        return action
+
+    def _snapshot(self) -> Snapshot:
+        # self._game là ván mà worker đang chạy (self.game do luồng pygame tăng khi reset)
+        return Snapshot(
+            WorldSnapshot(self.world, self._cells, self._status),
+            AgentSnapshot(self.agent),
+            self._game,
+            self.steps,
+        )
+
+    def _publish(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_publish < TURBO_PUBLISH_INTERVAL:
+            return
+        self._last_publish = now
+        self.buffer.publish(self._snapshot())
@@ -0,0 +1,140 @@
+import random
+from typing import Dict, FrozenSet, Set, Tuple
+
+from environment import WumpusWorld
+
+Cell = Tuple[int, int]
+
+
+class _SparseCell:
+    """Ô ảo trả lời world[x][y]["pit" | "wumpus" | "gold"] từ các tập toạ độ."""
+
+    __slots__ = ("_owner", "_pos")
+
+    def __init__(self, owner, pos: Cell):
+        self._owner = owner
+        self._pos = pos
+
+    def __getitem__(self, key: str) -> bool:
+        if key == "pit":
+            return self._owner._is_pit(self._pos)
+        if key == "wumpus":
+            return self._pos in self._owner.wumpus_positions
+        if key == "gold":
+            return self._pos in self._owner.gold_cells
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: bool) -> None:
+        # Vị trí Wumpus do chỉ mục của WumpusWorld quản lý, nên bỏ qua ghi "wumpus"
+        if key == "gold":
+            if value:
+                self._owner.gold_cells.add(self._pos)
+            else:
+                self._owner.gold_cells.discard(self._pos)
+        elif key == "pit":
+            self._owner._pit_overrides[self._pos] = value
+        elif key != "wumpus":
+            raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class _SparseRow:
+    __slots__ = ("_owner", "_x")
+
+    def __init__(self, owner, x: int):
+        self._owner = owner
+        self._x = x
+
+    def __getitem__(self, y: int) -> _SparseCell:
+        return _SparseCell(self._owner, (self._x, y))
+
+
+class _SparseGrid:
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __getitem__(self, x: int) -> _SparseRow:
+        return _SparseRow(self._owner, x)
+
+    def __len__(self) -> int:
+        return self._owner.grid_size
+
+
+class SparseWumpusWorld(WumpusWorld):
+    """
+    Thế giới thưa cho bản đồ rất lớn (2000x2000 trở lên): chỉ lưu toạ độ Wumpus, vàng và pit.
+    Pit được sinh lười theo từng chunk với seed riêng suy ra từ seed của thế giới,
+    nên bộ nhớ tăng theo vùng đã khám phá thay vì N² và cùng seed luôn cho cùng bản đồ.
+    """
+
+    def __init__(self, world_size=2000, k=2, p=0.2, seed=36, chunk_size=64):
+        self.chunk_size = chunk_size
+        self.gold_cells: Set[Cell] = set()
+        self._chunks: Dict[Cell, FrozenSet[Cell]] = {}
+        self._pit_overrides: Dict[Cell, bool] = {}
+        self._initial_wumpus: FrozenSet[Cell] = frozenset()
+        self._initial_gold: FrozenSet[Cell] = frozenset()
+        super().__init__(world_size, k, p, seed=seed)
+
+    def _generate_world(self):
+        # Đặt k Wumpus (không ở (0,0))
+        while len(self.wumpus_positions) < self.K:
+            wx = random.randint(0, self.grid_size - 1)
+            wy = random.randint(0, self.grid_size - 1)
+            if (wx, wy) != (0, 0) and (wx, wy) not in self.wumpus_positions:
+                self._index_wumpus((wx, wy))
+
+        # Đặt gold (không ở ô có Wumpus); pit của chunk sẽ tránh ô này
+        while True:
+            gx = random.randint(0, self.grid_size - 1)
+            gy = random.randint(0, self.grid_size - 1)
+            if (gx, gy) not in self.wumpus_positions:
+                self.gold_cells.add((gx, gy))
+                break
+
+        # Chunk luôn tránh vị trí ban đầu, kể cả khi Wumpus đã di chuyển
+        self._initial_wumpus = frozenset(self.wumpus_positions)
+        self._initial_gold = frozenset(self.gold_cells)
+        self.initial_gold = self._initial_gold
+        return _SparseGrid(self)
+
+    def _chunk_rng(self, chunk: Cell) -> random.Random:
+        # Seed dạng chuỗi được băm ổn định, không phụ thuộc PYTHONHASHSEED
+        return random.Random(f"{self.seed}:{chunk[0]}:{chunk[1]}")
+
+    def _generate_chunk(self, chunk: Cell) -> FrozenSet[Cell]:
+        rng = self._chunk_rng(chunk)
+        x0 = chunk[0] * self.chunk_size
+        y0 = chunk[1] * self.chunk_size
+        pits = set()
+        for i in range(x0, min(x0 + self.chunk_size, self.grid_size)):
+            for j in range(y0, min(y0 + self.chunk_size, self.grid_size)):
+                # Luôn rút số ngẫu nhiên để kết quả không phụ thuộc các ô bị loại trừ
+                roll = rng.random()
+                if (i, j) == (0, 0) or (i, j) in self._initial_wumpus or (i, j) in self._initial_gold:
+                    continue
+                if roll < self.pit_prob:
+                    pits.add((i, j))
+        return frozenset(pits)
+
+    def _is_pit(self, pos: Cell) -> bool:
+        if pos in self._pit_overrides:
+            return self._pit_overrides[pos]
+        chunk = (pos[0] // self.chunk_size, pos[1] // self.chunk_size)
+        pits = self._chunks.get(chunk)
+        if pits is None:
+            pits = self._generate_chunk(chunk)
+            self._chunks[chunk] = pits
+        return pos in pits
+
+    @property
+    def generated_chunks(self) -> int:
+        """Số chunk đã được sinh, tỉ lệ với vùng đã khám phá."""
+        return len(self._chunks)
@@ -0,0 +1,365 @@
+"""
+Thống kê trực tuyến cho các lượt chạy lớn: không giữ điểm số từng episode trong bộ nhớ.
+
+- RunningStats: trung bình/phương sai theo Welford, gộp được (Chan et al.).
+- QuantileSketch: DDSketch, phân vị xấp xỉ với sai số tương đối alpha, bộ nhớ giới hạn.
+- EpisodeStats: tỉ lệ thắng/thua/dừng, thống kê score và steps của một nhóm.
+- GroupedStats: EpisodeStats theo (world_size, k, p, agent).
+
+Mọi lớp đều có merge() và to_dict()/from_dict(), nên mỗi tiến trình gửi về bản tổng hợp
+của mình thay vì các episode thô.
+
+    python stats.py --sizes 8,16 --k 1,2 --p 0.1,0.2 --agents hybrid,random --seeds 0-99999
+"""
+import argparse
+import math
+import multiprocessing
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from runner import parse_seeds, run_episode
+
+OUTCOMES = ("win", "lose", "stall")
+GroupKey = Tuple[int, int, float, str]
+
+
+class RunningStats:
+    """Số lượng, trung bình, phương sai, min, max theo thuật toán Welford."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunningStats":
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        stats.min, stats.max = data["min"], data["max"]
+        return stats
+
+
+class QuantileSketch:
+    """
+    DDSketch: giá trị được xếp vào bucket logarit sao cho mọi phân vị trả về có sai số
+    tương đối không quá alpha. Giá trị âm và số 0 có kho riêng. Khi số bucket vượt max_bins,
+    các bucket có độ lớn nhỏ nhất được gộp lại (chỉ ảnh hưởng các phân vị gần 0).
+    """
+
+    def __init__(self, alpha: float = 0.01, max_bins: int = 2048):
+        self.alpha = alpha
+        self.max_bins = max_bins
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _index(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, x: float, weight: int = 1) -> None:
+        self.count += weight
+        if x > 0:
+            store = self.positive
+            idx = self._index(x)
+        elif x < 0:
+            store = self.negative
+            idx = self._index(-x)
+        else:
+            self.zero += weight
+            return
+        store[idx] = store.get(idx, 0) + weight
+        if len(store) > self.max_bins:
+            self._collapse(store)
+
+    def _collapse(self, store: Dict[int, int]) -> None:
+        ordered = sorted(store)
+        excess = len(store) - self.max_bins
+        target = ordered[excess]
+        for idx in ordered[:excess]:
+            store[target] += store.pop(idx)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.alpha != self.alpha:
+            raise ValueError("cannot merge sketches with different alpha")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for idx, count in theirs.items():
+                mine[idx] = mine.get(idx, 0) + count
+            if len(mine) > self.max_bins:
+                self._collapse(mine)
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for idx in sorted(self.negative, reverse=True):
+            seen += self.negative[idx]
+            if seen > rank:
+                return -self._value(idx)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for idx in sorted(self.positive):
+            seen += self.positive[idx]
+            if seen > rank:
+                return self._value(idx)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "alpha": self.alpha,
+            "max_bins": self.max_bins,
+            "positive": sorted(self.positive.items()),
+            "negative": sorted(self.negative.items()),
+            "zero": self.zero,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        sketch = cls(data["alpha"], data["max_bins"])
+        sketch.positive = {int(idx): count for idx, count in data["positive"]}
+        sketch.negative = {int(idx): count for idx, count in data["negative"]}
+        sketch.zero = data["zero"]
+        sketch.count = data["count"]
+        return sketch
+
+
+class EpisodeStats:
+    """Tổng hợp các bản ghi episode (của runner.run_episode) thuộc một nhóm."""
+
+    def __init__(self, alpha: float = 0.01):
+        self.outcomes = {outcome: 0 for outcome in OUTCOMES}
+        self.score = RunningStats()
+        self.steps = RunningStats()
+        self.score_sketch = QuantileSketch(alpha)
+        self.steps_sketch = QuantileSketch(alpha)
+
+    @property
+    def count(self) -> int:
+        return self.score.count
+
+    def add(self, record: Dict) -> None:
+        self.outcomes[record["outcome"]] = self.outcomes.get(record["outcome"], 0) + 1
+        self.score.add(record["score"])
+        self.steps.add(record["steps"])
+        self.score_sketch.add(record["score"])
+        self.steps_sketch.add(record["steps"])
+
+    def merge(self, other: "EpisodeStats") -> "EpisodeStats":
+        for outcome, n in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + n
+        self.score.merge(other.score)
+        self.steps.merge(other.steps)
+        self.score_sketch.merge(other.score_sketch)
+        self.steps_sketch.merge(other.steps_sketch)
+        return self
+
+    def rate(self, outcome: str) -> float:
+        return self.outcomes.get(outcome, 0) / self.count if self.count else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            "episodes": self.count,
+            "win_rate": self.rate("win"),
+            "loss_rate": self.rate("lose"),
+            "stall_rate": self.rate("stall"),
+            "score_mean": self.score.mean,
+            "score_std": self.score.std,
+            "score_p50": self.score_sketch.quantile(0.5),
+            "score_p99": self.score_sketch.quantile(0.99),
+            "steps_mean": self.steps.mean,
+            "steps_p50": self.steps_sketch.quantile(0.5),
+            "steps_p99": self.steps_sketch.quantile(0.99),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "outcomes": dict(self.outcomes),
+            "score": self.score.to_dict(),
+            "steps": self.steps.to_dict(),
+            "score_sketch": self.score_sketch.to_dict(),
+            "steps_sketch": self.steps_sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EpisodeStats":
+        stats = cls()
+        stats.outcomes = dict(data["outcomes"])
+        stats.score = RunningStats.from_dict(data["score"])
+        stats.steps = RunningStats.from_dict(data["steps"])
+        stats.score_sketch = QuantileSketch.from_dict(data["score_sketch"])
+        stats.steps_sketch = QuantileSketch.from_dict(data["steps_sketch"])
+        return stats
+
+
+class GroupedStats:
+    """EpisodeStats theo nhóm (world_size, k, p, agent)."""
+
+    def __init__(self):
+        self.groups: Dict[GroupKey, EpisodeStats] = {}
+
+    @staticmethod
+    def key(record: Dict) -> GroupKey:
+        return (record["world_size"], record["k"], record["p"], record["agent"])
+
+    def add(self, record: Dict) -> None:
+        key = self.key(record)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = EpisodeStats()
+        group.add(record)
+
+    def add_all(self, records: Iterable[Dict]) -> "GroupedStats":
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other: "GroupedStats") -> "GroupedStats":
+        for key, stats in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(stats)
+            else:
+                self.groups[key] = stats
+        return self
+
+    def summary(self) -> Dict[GroupKey, Dict]:
+        return {key: self.groups[key].summary() for key in sorted(self.groups)}
+
+    def to_dict(self) -> Dict:
+        return {"groups": [[list(key), stats.to_dict()] for key, stats in self.groups.items()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "GroupedStats":
+        grouped = cls()
+        for key, stats in data["groups"]:
+            grouped.groups[tuple(key)] = EpisodeStats.from_dict(stats)
+        return grouped
+
+
+def format_table(grouped: GroupedStats) -> List[str]:
+    lines = [
+        f"{'n':>4s} {'k':>3s} {'p':>5s} {'agent':20s} {'episodes':>9s} {'win':>7s} {'lose':>7s} {'stall':>7s}"
+        f" {'score':>8s} {'std':>8s} {'p50':>8s} {'p99':>8s} {'steps':>8s} {'p99':>8s}"
+    ]
+    for (n, k, p, agent), row in grouped.summary().items():
+        lines.append(
+            f"{n:4d} {k:3d} {p:5.2f} {agent:20s} {row['episodes']:9d} {row['win_rate']:7.1%} {row['loss_rate']:7.1%}"
+            f" {row['stall_rate']:7.1%} {row['score_mean']:8.1f} {row['score_std']:8.1f} {row['score_p50']:8.1f}"
+            f" {row['score_p99']:8.1f} {row['steps_mean']:8.1f} {row['steps_p99']:8.1f}"
+        )
+    return lines
+
+
+def _run_chunk(job) -> Dict:
+    """Chạy một khối seed trong tiến trình con và chỉ trả về bản tổng hợp."""
+    world_size, k, p, agent, seeds, advance_mode = job
+    grouped = GroupedStats()
+    for seed in seeds:
+        grouped.add(run_episode(world_size, k, p, seed, agent=agent, advance_mode=advance_mode))
+    return grouped.to_dict()
+
+
+def run_batch(
+    sizes: List[int],
+    wumpus_counts: List[int],
+    pit_probs: List[float],
+    agents: List[str],
+    seeds: List[int],
+    workers: Optional[int] = None,
+    chunk: int = 256,
+    advance_mode: bool = False,
+) -> GroupedStats:
+    jobs = [
+        (n, k, p, agent, seeds[i:i + chunk], advance_mode)
+        for n in sizes
+        for k in wumpus_counts
+        for p in pit_probs
+        for agent in agents
+        for i in range(0, len(seeds), chunk)
+    ]
+    total = GroupedStats()
+    if workers == 1:
+        for job in jobs:
+            total.merge(GroupedStats.from_dict(_run_chunk(job)))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for partial in pool.imap_unordered(_run_chunk, jobs):
+                total.merge(GroupedStats.from_dict(partial))
+    return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Aggregate episode statistics over large seed ranges")
+    parser.add_argument("--sizes", default="8")
+    parser.add_argument("--k", default="2")
+    parser.add_argument("--p", default="0.2")
+    parser.add_argument("--agents", default="hybrid")
+    parser.add_argument("--seeds", default="0-999", help="range 'a-b' or list 'a,b,c'")
+    parser.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    grouped = run_batch(
+        [int(x) for x in args.sizes.split(",")],
+        [int(x) for x in args.k.split(",")],
+        [float(x) for x in args.p.split(",")],
+        args.agents.split(","),
+        parse_seeds(args.seeds),
+        workers=args.workers,
+        advance_mode=args.advance,
+    )
+    print("\n".join(format_table(grouped)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Quét lưới tham số (world_size, k, pit_prob) x dải seed, song song, với cache theo nội dung.
+
+    python sweep.py --sizes 4,8,16 --k 1,2 --p 0.1,0.2,0.3 --agents hybrid,random --seeds 0-999
+
+Khoá của mỗi episode là SHA-256 của tham số, seed, agent và mã băm mã nguồn các module mà
+agent đó phụ thuộc. Sửa inference.py chỉ làm tính lại các job của HybridAgent; job của
+RandomAgent vẫn lấy từ cache. Với agent "module:Class", mọi module của repo mà nó import
+(trực tiếp hay gián tiếp) đều được băm.
+"""
+import argparse
+import ast
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from runner import parse_seeds, run_episode
+from stats import GroupedStats, format_table
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Các module quyết định kết quả của một episode
+COMMON_SOURCES = ("environment.py", "runner.py")
+AGENT_SOURCES = {
+    "hybrid": ("agent.py", "inference.py", "planning.py", "hierarchical.py", "dstarlite.py"),
+    "random": ("agent.py",),
+}
+ADVANCE_SOURCES = ("movingwumpus.py",)
+
+Job = Tuple[int, int, float, int, str]  # world_size, k, p, seed, agent
+
+
+def _local_imports(path: str) -> List[str]:
+    """File .py cạnh path hoặc trong ROOT mà path import (bỏ qua thư viện ngoài)."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    found = []
+    for name in names:
+        relative = name.replace(".", os.sep) + ".py"
+        for base in (os.path.dirname(path), ROOT):
+            candidate = os.path.join(base, relative)
+            if os.path.isfile(candidate):
+                found.append(os.path.abspath(candidate))
+                break
+    return found
+
+
+def _import_closure(path: str) -> List[str]:
+    seen = {os.path.abspath(path)}
+    stack = [os.path.abspath(path)]
+    while stack:
+        for dep in _local_imports(stack.pop()):
+            if dep not in seen:
+                seen.add(dep)
+                stack.append(dep)
+    return sorted(seen)
+
+
+def _agent_sources(agent: str) -> List[str]:
+    if agent in AGENT_SOURCES:
+        return [os.path.join(ROOT, name) for name in AGENT_SOURCES[agent]]
+    # Agent thử nghiệm "module:Class": băm module đó và mọi module của repo mà nó import
+    spec = importlib.util.find_spec(agent.split(":", 1)[0])
+    if spec is None or spec.origin is None:
+        raise ValueError(f"Unknown agent: {agent}")
+    return _import_closure(spec.origin)
+
+
+def source_hash(agent: str, advance_mode: bool = False) -> str:
+    digest = hashlib.sha256()
+    paths = [os.path.join(ROOT, name) for name in COMMON_SOURCES] + _agent_sources(agent)
+    if advance_mode:
+        paths += [os.path.join(ROOT, name) for name in ADVANCE_SOURCES]
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def job_key(job: Job, source: str, advance_mode: bool, max_steps: Optional[int]) -> str:
+    world_size, k, p, seed, agent = job
+    payload = {
+        "world_size": world_size, "k": k, "p": p, "seed": seed, "agent": agent,
+        "advance": advance_mode, "max_steps": max_steps, "source": source,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Bản ghi episode theo khoá nội dung, lưu trong SQLite."""
+
+    def __init__(self, path: str = "sweep_cache.sqlite"):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, record TEXT)")
+        self.conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        found = {}
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            for key, record in self.conn.execute(f"SELECT key, record FROM results WHERE key IN ({marks})", batch):
+                found[key] = json.loads(record)
+        return found
+
+    def put_many(self, items: List[Tuple[str, Dict]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?)",
+                [(key, json.dumps(record)) for key, record in items],
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def expand_grid(sizes, wumpus_counts, pit_probs, agents, seeds) -> List[Job]:
+    return [(n, k, p, seed, agent) for n in sizes for k in wumpus_counts for p in pit_probs
+            for agent in agents for seed in seeds]
+
+
+def _run_jobs(batch) -> List[Tuple[str, Dict]]:
+    items, advance_mode, max_steps = batch
+    return [
+        (key, run_episode(n, k, p, seed, agent=agent, advance_mode=advance_mode, max_steps=max_steps))
+        for key, (n, k, p, seed, agent) in items
+    ]
+
+
+def run_sweep(
+    jobs: List[Job],
+    cache: ResultCache,
+    workers: Optional[int] = None,
+    advance_mode: bool = False,
+    max_steps: Optional[int] = None,
+    chunk: int = 64,
+) -> Tuple[GroupedStats, int, int]:
+    """Chạy các job chưa có trong cache; trả về (thống kê theo nhóm, số lấy từ cache, số đã chạy)."""
+    sources = {agent: source_hash(agent, advance_mode) for agent in {job[4] for job in jobs}}
+    keyed = [(job_key(job, sources[job[4]], advance_mode, max_steps), job) for job in jobs]
+    cached = cache.get_many([key for key, _ in keyed])
+
+    grouped = GroupedStats()
+    for record in cached.values():
+        grouped.add(record)
+
+    missing = [(key, job) for key, job in keyed if key not in cached]
+    batches = [(missing[i:i + chunk], advance_mode, max_steps) for i in range(0, len(missing), chunk)]
+    pool = multiprocessing.Pool(workers) if workers != 1 else None
+    try:
+        results = pool.imap_unordered(_run_jobs, batches) if pool else map(_run_jobs, batches)
+        for items in results:
+            cache.put_many(items)
+            for _, record in items:
+                grouped.add(record)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return grouped, len(cached), len(missing)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sweep world_size x k x pit_prob x seeds with cached results")
+    parser.add_argument("--sizes", default="4,8")
+    parser.add_argument("--k", default="1,2")
+    parser.add_argument("--p", default="0.1,0.2")
+    parser.add_argument("--agents", default="hybrid")
+    parser.add_argument("--seeds", default="0-99", help="range 'a-b' or list 'a,b,c'")
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--cache", default="sweep_cache.sqlite")
+    parser.add_argument("--output", help="write the grouped summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    jobs = expand_grid(
+        [int(x) for x in args.sizes.split(",")],
+        [int(x) for x in args.k.split(",")],
+        [float(x) for x in args.p.split(",")],
+        args.agents.split(","),
+        parse_seeds(args.seeds),
+    )
+    cache = ResultCache(args.cache)
+    try:
+        grouped, hits, ran = run_sweep(jobs, cache, args.workers, args.advance, args.max_steps)
+    finally:
+        cache.close()
+
+    print(f"{len(jobs)} jobs: {hits} cached, {ran} ran")
+    print("\n".join(format_table(grouped)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([{"world_size": n, "k": k, "p": p, "agent": agent, **row}
+                       for (n, k, p, agent), row in grouped.summary().items()], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
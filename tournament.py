@@ -0,0 +1,259 @@
+"""
+Giải đấu: chạy mọi agent trên cùng một tập seed bằng process pool.
+
+    python tournament.py --agents hybrid,random --seeds 0-9999 --size 8 --output results.jsonl
+    python tournament.py --agents hybrid,mymodule:MyAgent --seeds 0-999 --output results.csv
+
+Mỗi bản ghi episode được ghi nối vào file (JSON-lines, hoặc CSV nếu đuôi .csv) ngay khi xong.
+Chạy lại cùng lệnh sẽ bỏ qua các (agent, seed) đã có trong file với cùng cấu hình (kích thước,
+k, p, advance, max-steps), nên có thể dừng và chạy tiếp; cấu hình khác được chạy và tổng hợp riêng.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from runner import RECORD_FIELDS, default_max_steps, parse_seeds, run_episode
+from stats import GroupedStats
+from worldcache import WorldCache
+
+# Mỗi tiến trình con sinh bản đồ một lần cho mọi agent của cùng seed
+_worker_cache = WorldCache(maxsize=4)
+
+
+def _is_csv(path: str) -> bool:
+    return path.endswith(".csv")
+
+
+def settings_key(record: Dict) -> Tuple:
+    """
+    Mọi tham số ảnh hưởng tới kết quả của một bản ghi. Bản ghi cũ (chưa có advance_mode/max_steps)
+    được coi là chạy với giá trị mặc định.
+    """
+    max_steps = record.get("max_steps")
+    if max_steps is None:
+        max_steps = default_max_steps(record["world_size"])
+    return record["world_size"], record["k"], record["p"], bool(record.get("advance_mode", False)), max_steps
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Đọc lần lượt các bản ghi đã ghi (bỏ qua dòng cuối bị cắt dở khi tiến trình bị dừng)."""
+    if not os.path.exists(path):
+        return
+    with open(path, newline="") as f:
+        if _is_csv(path):
+            for row in csv.DictReader(f):
+                try:
+                    yield {
+                        "seed": int(row["seed"]),
+                        "agent": row["agent"],
+                        "world_size": int(row["world_size"]),
+                        "k": int(row["k"]),
+                        "p": float(row["p"]),
+                        "advance_mode": row.get("advance_mode") == "True",
+                        "max_steps": int(row["max_steps"]) if row.get("max_steps") else None,
+                        "outcome": row["outcome"],
+                        "score": int(row["score"]),
+                        "steps": int(row["steps"]),
+                        "wall_time": float(row["wall_time"]),
+                    }
+                except (TypeError, ValueError):
+                    continue
+        else:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class RecordWriter:
+    """Ghi nối bản ghi vào JSON-lines/CSV, flush sau mỗi dòng."""
+
+    def __init__(self, path: str):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        torn = not new_file and self._ends_mid_line(path)
+        self._file = open(path, "a", newline="")
+        if torn:
+            # Dòng cuối bị cắt dở: bắt đầu dòng mới để bản ghi tiếp theo không dính vào nó
+            self._file.write("\n")
+        self._csv = None
+        if _is_csv(path):
+            # Giữ đúng các cột của file đang có để các dòng ghi thêm khớp với header
+            fields = RECORD_FIELDS if new_file else self._header(path)
+            self._csv = csv.DictWriter(self._file, fieldnames=fields, extrasaction="ignore")
+            if new_file:
+                self._csv.writeheader()
+
+    @staticmethod
+    def _header(path: str) -> List[str]:
+        with open(path, newline="") as f:
+            return next(csv.reader(f), None) or list(RECORD_FIELDS)
+
+    @staticmethod
+    def _ends_mid_line(path: str) -> bool:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def write(self, record: Dict) -> None:
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _run_seed(job) -> List[Dict]:
+    world_size, k, p, seed, agents, advance_mode, max_steps = job
+    records = []
+    for agent in agents:
+        world = _worker_cache.world(world_size, k, p, seed)
+        records.append(
+            run_episode(world_size, k, p, seed, agent=agent, max_steps=max_steps, advance_mode=advance_mode, world=world)
+        )
+    return records
+
+
+def run_tournament(
+    agents: List[str],
+    seeds: List[int],
+    world_size: int,
+    k: int,
+    p: float,
+    output: str,
+    workers: Optional[int] = None,
+    advance_mode: bool = False,
+    max_steps: Optional[int] = None,
+) -> int:
+    """Chạy các (agent, seed) chưa có trong output với cùng cấu hình; trả về số episode đã chạy thêm."""
+    settings = settings_key(
+        {"world_size": world_size, "k": k, "p": p, "advance_mode": advance_mode, "max_steps": max_steps}
+    )
+    done = {(r["agent"], r["seed"]) for r in read_records(output) if settings_key(r) == settings}
+    jobs = []
+    for seed in seeds:
+        pending = [agent for agent in agents if (agent, seed) not in done]
+        if pending:
+            jobs.append((world_size, k, p, seed, pending, advance_mode, max_steps))
+
+    writer = RecordWriter(output)
+    pool = multiprocessing.Pool(workers) if workers != 1 else None
+    count = 0
+    try:
+        results = pool.imap_unordered(_run_seed, jobs, chunksize=8) if pool else map(_run_seed, jobs)
+        for records in results:
+            for record in records:
+                writer.write(record)
+                count += 1
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+    return count
+
+
+def summarize(
+    output: str,
+    agents: List[str],
+    seeds: List[int],
+    world_size: int,
+    k: int,
+    p: float,
+    advance_mode: bool = False,
+    max_steps: Optional[int] = None,
+) -> Tuple[Dict, Dict]:
+    """
+    Tổng hợp theo agent và so sánh từng cặp agent trên các seed mà cả hai đã chạy.
+    Trả về (theo agent, theo cặp).
+    """
+    wanted = set(seeds)
+    settings = settings_key(
+        {"world_size": world_size, "k": k, "p": p, "advance_mode": advance_mode, "max_steps": max_steps}
+    )
+    grouped = GroupedStats()
+    per_seed: Dict[int, Dict[str, Tuple[str, int]]] = {}
+    for r in read_records(output):
+        if (
+            r["agent"] in agents
+            and r["seed"] in wanted
+            and settings_key(r) == settings
+        ):
+            grouped.add(r)
+            per_seed.setdefault(r["seed"], {})[r["agent"]] = (r["outcome"], r["score"])
+
+    by_agent = {
+        agent: grouped.groups[(world_size, k, p, agent)].summary()
+        for agent in agents
+        if (world_size, k, p, agent) in grouped.groups
+    }
+
+    pairs = {}
+    for a, b in combinations(agents, 2):
+        shared = [s for s in per_seed.values() if a in s and b in s]
+        if not shared:
+            continue
+        a_better = sum(1 for s in shared if s[a][1] > s[b][1])
+        b_better = sum(1 for s in shared if s[b][1] > s[a][1])
+        pairs[(a, b)] = {
+            "seeds": len(shared),
+            "a_wins_only": sum(1 for s in shared if s[a][0] == "win" and s[b][0] != "win"),
+            "b_wins_only": sum(1 for s in shared if s[b][0] == "win" and s[a][0] != "win"),
+            "a_better": a_better,
+            "b_better": b_better,
+            "ties": len(shared) - a_better - b_better,
+            "mean_score_diff": sum(s[a][1] - s[b][1] for s in shared) / len(shared),
+        }
+    return by_agent, pairs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run every agent on the same seeds and compare them")
+    parser.add_argument("--agents", default="hybrid,random", help="comma separated names or module:Class")
+    parser.add_argument("--seeds", default="0-99", help="range 'a-b' or list 'a,b,c'")
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--p", type=float, default=0.2)
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--advance", action="store_true", help="let the Wumpus move every 5 steps")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", default="tournament.jsonl", help="append-only .jsonl or .csv file")
+    args = parser.parse_args(argv)
+
+    agents = args.agents.split(",")
+    seeds = parse_seeds(args.seeds)
+    ran = run_tournament(
+        agents, seeds, args.size, args.k, args.p, args.output,
+        workers=args.workers, advance_mode=args.advance, max_steps=args.max_steps,
+    )
+    print(f"Ran {ran} new episodes -> {args.output}")
+
+    by_agent, pairs = summarize(
+        args.output, agents, seeds, args.size, args.k, args.p, args.advance, args.max_steps
+    )
+    print(f"\n{'agent':30s} {'episodes':>9s} {'win':>7s} {'lose':>7s} {'stall':>7s} {'score':>8s} {'p50':>8s} {'p99':>8s}")
+    for agent, row in by_agent.items():
+        print(
+            f"{agent:30s} {row['episodes']:9d} {row['win_rate']:7.1%} {row['loss_rate']:7.1%} {row['stall_rate']:7.1%}"
+            f" {row['score_mean']:8.1f} {row['score_p50']:8.1f} {row['score_p99']:8.1f}"
+        )
+    for (a, b), row in pairs.items():
+        print(
+            f"\n{a} vs {b} on {row['seeds']} seeds: "
+            f"only {a} won {row['a_wins_only']}, only {b} won {row['b_wins_only']}; "
+            f"higher score {a} {row['a_better']} / {b} {row['b_better']} / tie {row['ties']}; "
+            f"mean score diff {row['mean_score_diff']:+.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import random
+from collections import OrderedDict
+from typing import Dict, FrozenSet, NamedTuple, Tuple
+
+from environment import WumpusWorld
+from sparseworld import _SparseGrid
+
+Cell = Tuple[int, int]
+
+
+class Layout(NamedTuple):
+    """Bố cục bất biến của một thế giới đã sinh, cùng trạng thái random ngay sau khi sinh."""
+    world_size: int
+    k: int
+    p: float
+    seed: int
+    pits: FrozenSet[Cell]
+    wumpus: Tuple[Cell, ...]
+    gold: Tuple[Cell, ...]
+    attempts: int
+    rng_state: tuple
+
+    @classmethod
+    def generate(cls, world_size: int, k: int, p: float, seed: int) -> "Layout":
+        world = WumpusWorld(world_size, k, p, seed=seed)
+        rng_state = random.getstate()
+        cells = [(x, y) for x in range(world_size) for y in range(world_size)]
+        return cls(
+            world_size,
+            k,
+            p,
+            seed,
+            frozenset(c for c in cells if world.world[c[0]][c[1]]["pit"]),
+            tuple(sorted(world.wumpus_positions)),
+            tuple(sorted(world.initial_gold)),
+            world.generation_attempts,
+            rng_state,
+        )
+
+
+class LayoutWorld(WumpusWorld):
+    """
+    WumpusWorld dùng chung một Layout bất biến. Chỉ trạng thái của ván chơi (agent, Wumpus,
+    vàng, pit bị ghi đè) thuộc về đối tượng này, nên tạo/reset chỉ tốn O(K) thay vì dựng N*N ô.
+    world[x][y] là view giống SparseWumpusWorld.
+    """
+
+    def __init__(self, layout: Layout):
+        self.layout = layout
+        self._init_state(layout.world_size, layout.k, layout.p, layout.seed)
+        self.generation_attempts = layout.attempts
+        self.gold_cells = set(layout.gold)
+        self.initial_gold = frozenset(layout.gold)
+        self._pit_overrides: Dict[Cell, bool] = {}
+        for pos in layout.wumpus:
+            self._index_wumpus(pos)
+        self.world = _SparseGrid(self)
+        # Giữ random toàn cục như khi vừa sinh thế giới từ seed
+        random.setstate(layout.rng_state)
+        self.percept_bits = self._compute_percept_bits()
+
+    def _is_pit(self, pos: Cell) -> bool:
+        if self._pit_overrides and pos in self._pit_overrides:
+            return self._pit_overrides[pos]
+        return pos in self.layout.pits
+
+    def static_cells(self) -> Tuple[FrozenSet[Cell], FrozenSet[Cell]]:
+        # Pit lấy thẳng từ Layout, trừ khi đã có ô bị ghi đè
+        if not self._pit_overrides:
+            return self.layout.pits, self.initial_gold
+        return super().static_cells()
+
+
+class WorldCache:
+    """
+    LRU các Layout theo (grid, K, p, seed). world() trả về một LayoutWorld mới mỗi lần,
+    nên reset hay nhiều agent cùng seed chỉ sinh bản đồ một lần.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._layouts: "OrderedDict[tuple, Layout]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def layout(self, world_size: int, k: int, p: float, seed: int) -> Layout:
+        key = (world_size, k, p, seed)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self.hits += 1
+            self._layouts.move_to_end(key)
+            return layout
+        self.misses += 1
+        layout = Layout.generate(world_size, k, p, seed)
+        if self.maxsize > 0:
+            self._layouts[key] = layout
+            while len(self._layouts) > self.maxsize:
+                self._layouts.popitem(last=False)
+                self.evictions += 1
+        return layout
+
+    def world(self, world_size: int, k: int, p: float, seed: int) -> LayoutWorld:
+        return LayoutWorld(self.layout(world_size, k, p, seed))
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        while len(self._layouts) > max(maxsize, 0):
+            self._layouts.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._layouts.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._layouts),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
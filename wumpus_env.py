@@ -0,0 +1,220 @@
+import random
+from typing import Optional, Tuple
+
+from environment import WumpusWorld, Action
+from inference import LogicInference
+from movingwumpus import MovingWumpusModule, BatchMovingWumpus
+from observation import ObservationBuffer, BatchObservation, CHANNELS
+
+try:
+    import numpy as np
+except ImportError:  # numpy chỉ cần cho môi trường kiểu Gym
+    np = None
+
+
+class Discrete:
+    """Không gian hành động rời rạc {0, ..., n-1} (tương thích gym.spaces.Discrete)."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.shape = ()
+        self.dtype = np.int64 if np is not None else int
+
+    def sample(self, rng=None) -> int:
+        return (rng or random).randrange(self.n)
+
+    def contains(self, x) -> bool:
+        return isinstance(x, (int, np.integer)) and 0 <= x < self.n
+
+    def __repr__(self):
+        return f"Discrete({self.n})"
+
+
+class Box:
+    """Không gian observation dạng mảng (tương thích gym.spaces.Box)."""
+
+    def __init__(self, low, high, shape, dtype):
+        self.low = low
+        self.high = high
+        self.shape = shape
+        self.dtype = dtype
+
+    def contains(self, x) -> bool:
+        return x.shape == self.shape and x.dtype == self.dtype
+
+    def __repr__(self):
+        return f"Box({self.low}, {self.high}, {self.shape}, {self.dtype})"
+
+
+class WumpusEnv:
+    """
+    Môi trường kiểu Gym bao quanh WumpusWorld và MovingWumpusModule.
+
+    - reset(seed) -> (obs, info); step(action) -> (obs, reward, terminated, truncated, info).
+    - Observation là mảng uint8 (C, N, N) của ObservationBuffer, cập nhật tại chỗ và dùng lại.
+    - Reward là thay đổi của world.score, nên tổng reward của một episode bằng điểm của ván.
+      death_penalty (mặc định 0) là phần phạt thêm, tuỳ chọn, khi agent rơi xuống pit hoặc bị
+      Wumpus ăn; khác 0 thì tổng reward không còn bằng điểm.
+    - info là dict mới ở mỗi lần reset/step.
+    """
+
+    def __init__(
+        self,
+        world_size: int = 8,
+        k: int = 2,
+        p: float = 0.2,
+        max_steps: Optional[int] = None,
+        moving_wumpus: bool = False,
+        move_every: int = 5,
+        death_penalty: int = 0,
+        seed: Optional[int] = None,
+        out=None,
+    ):
+        if np is None:
+            raise ImportError("WumpusEnv requires numpy")
+        self.world_size = world_size
+        self.k = k
+        self.p = p
+        self.max_steps = max_steps if max_steps is not None else 4 * world_size * world_size
+        self.moving_wumpus = moving_wumpus
+        self.move_every = move_every
+        self.death_penalty = death_penalty
+
+        self.observation_space = Box(0, 255, (len(CHANNELS), world_size, world_size), np.uint8)
+        self.action_space = Discrete(len(Action))
+        self.obs = ObservationBuffer(world_size, out=out)
+        self._seed_rng = random.Random(seed)
+        self._seed: Optional[int] = None
+
+        self.world: Optional[WumpusWorld] = None
+        self.knowledge: Optional[LogicInference] = None
+        self.mover: Optional[MovingWumpusModule] = None
+        self.steps = 0
+
+    def reset(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = self._seed_rng.randrange(2 ** 31)
+        self.world = WumpusWorld(self.world_size, self.k, self.p, seed=seed)
+        self.knowledge = LogicInference(self.world_size)
+        self.obs.bind(self.knowledge, self.world)
+        self.mover = MovingWumpusModule(self.world) if self.moving_wumpus else None
+        self.steps = 0
+        self.knowledge.update_knowledge(self.world.agent_pos, self.world.percept_bits, self.world)
+        self._seed = seed
+        return self.obs.get(), self._make_info("continue")
+
+    def step(self, action) -> Tuple[object, float, bool, bool, dict]:
+        reward, terminated = self._act(action)
+        if self._move_due(terminated):
+            terminated = self.mover.advance()
+            self.knowledge.on_wumpus_moved()
+        return self._finish(reward, terminated)
+
+    # step được tách làm ba pha để BatchWumpusEnv di chuyển Wumpus của cả lô một lần
+    def _act(self, action) -> Tuple[float, bool]:
+        if not self.action_space.contains(action):
+            raise ValueError(f"invalid action {action!r} for {self.action_space}")
+        _, reward, terminated = self.world.step(int(action))
+        self.steps += 1
+        return reward, terminated
+
+    def _move_due(self, terminated: bool) -> bool:
+        return not terminated and self.mover is not None and self.steps % self.move_every == 0
+
+    def _finish(self, reward: float, terminated: bool) -> Tuple[object, float, bool, bool, dict]:
+        world = self.world
+        if self.death_penalty and terminated and world.game_over_state == "lose" and self._died_in_place():
+            reward += self.death_penalty
+        if not terminated:
+            self.knowledge.update_knowledge(world.agent_pos, world.percept_bits, world)
+
+        truncated = not terminated and self.steps >= self.max_steps
+        outcome = world.game_over_state or ("truncated" if truncated else "continue")
+        return self.obs.get(), float(reward), terminated, truncated, self._make_info(outcome)
+
+    def _died_in_place(self) -> bool:
+        x, y = self.world.agent_pos
+        cell = self.world.world[x][y]
+        return cell["pit"] or cell["wumpus"]
+
+    def _make_info(self, outcome: str) -> dict:
+        return {
+            "score": self.world.score,
+            "steps": self.steps,
+            "percepts": self.world.percept_bits,
+            "outcome": outcome,
+            "seed": self._seed,
+        }
+
+
+class BatchWumpusEnv:
+    """
+    N môi trường WumpusEnv chạy song song theo lô, tự reset khi một episode kết thúc.
+    Các buffer observation/reward/terminated/truncated được cấp phát một lần và dùng lại.
+    Sau khi tự reset, observation trả về là của episode mới; điểm và độ dài của episode
+    vừa xong nằm trong episode_scores/episode_lengths (chỉ hợp lệ ở các vị trí done).
+    Với moving_wumpus=True, Wumpus của mọi môi trường đến lượt được di chuyển cùng lúc
+    bằng BatchMovingWumpus (RNG numpy riêng, nên quỹ đạo khác với chạy từng WumpusEnv).
+    """
+
+    def __init__(self, num_envs: int, world_size: int = 8, seed: Optional[int] = None, **kwargs):
+        if np is None:
+            raise ImportError("BatchWumpusEnv requires numpy")
+        self.num_envs = num_envs
+        self.observations = BatchObservation(num_envs, world_size)
+        self.envs = [
+            WumpusEnv(world_size, out=self.observations.array[i], **kwargs)
+            for i in range(num_envs)
+        ]
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+        self._seed_rng = random.Random(seed)
+        self._mover_seed = seed
+        self.mover: Optional[BatchMovingWumpus] = None
+
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.episode_scores = np.zeros(num_envs, dtype=np.int64)
+        self.episode_lengths = np.zeros(num_envs, dtype=np.int64)
+
+    def _next_seed(self) -> int:
+        return self._seed_rng.randrange(2 ** 31)
+
+    def reset(self, seeds=None):
+        for i, env in enumerate(self.envs):
+            env.reset(seeds[i] if seeds is not None else self._next_seed())
+        if self.envs[0].moving_wumpus:
+            if self.mover is None:
+                self.mover = BatchMovingWumpus([env.world for env in self.envs], seed=self._mover_seed)
+            else:
+                for i, env in enumerate(self.envs):
+                    self.mover.replace(i, env.world)
+        self.rewards.fill(0)
+        self.terminated.fill(False)
+        self.truncated.fill(False)
+        return self.observations.get()
+
+    def step(self, actions):
+        due = np.zeros(self.num_envs, dtype=bool)
+        for i, env in enumerate(self.envs):
+            self.rewards[i], self.terminated[i] = env._act(actions[i])
+            due[i] = env._move_due(self.terminated[i])
+
+        if self.mover is not None and due.any():
+            self.terminated |= self.mover.advance(due)
+            for i in np.flatnonzero(due):
+                self.envs[i].knowledge.on_wumpus_moved()
+
+        for i, env in enumerate(self.envs):
+            _, reward, terminated, truncated, info = env._finish(float(self.rewards[i]), bool(self.terminated[i]))
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            if terminated or truncated:
+                self.episode_scores[i] = info["score"]
+                self.episode_lengths[i] = info["steps"]
+                env.reset(self._next_seed())
+                if self.mover is not None:
+                    self.mover.replace(i, env.world)
+        return self.observations.get(), self.rewards, self.terminated, self.truncated